@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+
+# Headless batch export: turns FreeCAD documents (.FCStd) with a HWS route
+# into G-Code files (.nc) without the GUI, one document per worker process.
+#
+# Run it with a python interpreter that can import FreeCAD, for example:
+#   python HWS_Batch.py --freecad-lib /usr/lib/freecad/lib -j 4 -o out/ jobs/
+# or from FreeCADCmd with a single worker:
+#   FreeCADCmd HWS_Batch.py -j 1 jobs/
+#
+# Every input is opened, recomputed, traced with traceObjectsAndLinksForRawPath
+# and written with writeGCodeFile. A JSON summary with the timing of every step
+# is written next to the G-Code files.
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+if __dir__ not in sys.path:
+    sys.path.insert(0, __dir__)
+
+from hws_core.workers import initWorker
+
+
+def findDocuments(inputs):
+    # expand directories to the .FCStd files they contain
+    documents = []
+    for item in inputs:
+        if os.path.isdir(item):
+            found = glob.glob(os.path.join(item, '*.FCStd')) + glob.glob(os.path.join(item, '*.fcstd'))
+            documents.extend(sorted(set(found)))
+        else:
+            documents.append(item)
+    return documents
+
+
+def processDocument(job):
+    # worker: export one document, never raises so one broken document does
+    # not stop the batch
+    fcstd_path, out_dir, force_recompute = job
+    result = {'input': fcstd_path,
+              'output': None,
+              'status': 'ok',
+              'timings': {}}
+    t_start = time.perf_counter()
+    doc = None
+    try:
+        import FreeCAD
+        import HWS_Path
+
+        t = time.perf_counter()
+        doc = FreeCAD.openDocument(fcstd_path)
+        FreeCAD.setActiveDocument(doc.Name)
+        result['timings']['open'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        if force_recompute:
+            for obj in doc.findObjects('Part::FeaturePython', 'ShapePath_'):
+                obj.touch()
+        doc.recompute()
+        result['timings']['recompute'] = time.perf_counter() - t
+
+        G93 = doc.HWS_Machine.G93
+        t = time.perf_counter()
+        route = HWS_Path.traceObjectsAndLinksForRawPath(G93)
+        result['timings']['trace'] = time.perf_counter() - t
+        result['points'] = route.count
+
+        name = os.path.splitext(os.path.basename(fcstd_path))[0] + '.nc'
+        out_path = os.path.join(out_dir or os.path.dirname(os.path.abspath(fcstd_path)), name)
+        t = time.perf_counter()
+        HWS_Path.writeGCodeFile(route, out_path, G93)
+        result['timings']['write'] = time.perf_counter() - t
+        result['output'] = out_path
+
+    except Exception:
+        result['status'] = 'error'
+        result['error'] = traceback.format_exc()
+
+    finally:
+        if doc is not None:
+            try:
+                FreeCAD.closeDocument(doc.Name)
+            except Exception:
+                pass
+
+    result['timings']['total'] = time.perf_counter() - t_start
+    return result
+
+
+def runBatch(documents, out_dir=None, jobs=None, extra_paths=(), force_recompute=False):
+    extra_paths = list(extra_paths) + [__dir__]
+    tasks = [(d, out_dir, force_recompute) for d in documents]
+    if jobs == 1:
+        initWorker(extra_paths)
+        return [processDocument(t) for t in tasks]
+
+    # spawn: FreeCAD is not fork safe, every worker opens its own application
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(processes=jobs,
+                  initializer=initWorker,
+                  initargs=(extra_paths,),
+                  maxtasksperchild=1) as pool:
+        return pool.map(processDocument, tasks, chunksize=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export G-Code from HWS FreeCAD documents without the GUI')
+    parser.add_argument('inputs', nargs='+', help='.FCStd files or directories containing them')
+    parser.add_argument('-o', '--out-dir', default=None, help='directory for the .nc files (default: next to each document)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes (default: number of cores)')
+    parser.add_argument('--summary', default=None, help='JSON summary file (default: hws_batch_summary.json in the output directory)')
+    parser.add_argument('--freecad-lib', default=os.environ.get('FREECAD_LIB'), help='directory containing FreeCAD.so/FreeCAD.pyd')
+    parser.add_argument('--force-recompute', action='store_true', help='recompute every ShapePath even if it is up to date')
+    args = parser.parse_args(argv)
+
+    extra_paths = []
+    if args.freecad_lib:
+        extra_paths.append(args.freecad_lib)
+
+    documents = findDocuments(args.inputs)
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    t = time.perf_counter()
+    results = runBatch(documents, args.out_dir, args.jobs, extra_paths, args.force_recompute)
+    wall_time = time.perf_counter() - t
+
+    failed = [r for r in results if r['status'] != 'ok']
+    summary = {'documents': len(results),
+               'failed': len(failed),
+               'wall_time': wall_time,
+               'results': results}
+    summary_path = args.summary or os.path.join(args.out_dir or os.getcwd(), 'hws_batch_summary.json')
+    with open(summary_path, 'w') as summary_file:
+        json.dump(summary, summary_file, indent=2)
+
+    for r in results:
+        print('%-6s %6.2fs %s' % (r['status'], r['timings']['total'], r['input']))
+    print('%d documents, %d failed, %.2fs, summary: %s' % (len(results), len(failed), wall_time, summary_path))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+
+# Benchmarks of the path pipeline on generated workloads, runs headless.
+#
+#   python HWS_Benchmark.py                        run and print the timings
+#   python HWS_Benchmark.py --save-baseline b.json store the results
+#   python HWS_Benchmark.py --compare b.json       fail (exit 1) on regressions
+#
+# Workloads:
+#   wing_<density>   NACA root and tip profiles of a tapered wing
+#   rib_<holes>      NACA rib with round lightening holes
+#   layout_<parts>   parts placed on the table joined by links in one route
+# Every stage is timed (best of --repeat runs) and its peak memory recorded.
+# The hws_core stages always run, the FreeCAD stages only if FreeCAD can be
+# imported (--freecad-lib or FREECAD_LIB): ShapeToHWSPath, addKerf2Faces and
+# PathToShape on the wing and rib shapes, and traceObjectsAndLinksForRawPath,
+# writeGCodeFile and the simulation player on a document built of every
+# workload (machine, routed ShapePaths, planned links) and on the documents
+# given with --documents.
+
+import argparse
+import io
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+if __dir__ not in sys.path:
+    sys.path.insert(0, __dir__)
+
+from hws_core import rawpath, offset, projection, arcs, feed, collision, gcode
+
+
+# default max slowdown (0.25 = 25 % slower) before a stage is a regression
+DEFAULT_THRESHOLD = 0.25
+# differences below this are measurement noise, seconds
+MIN_TIME_DIFFERENCE = 0.002
+
+FOAM = ["Default", 1.6, 4.0, 1.9, 75]
+Z_LENGTH = 500.0
+MAX_SPEED = 10.0
+# frames the simulation stage draws
+SIMULATION_FRAMES = 2000
+
+
+# workloads -------------------------------------------------------------------
+
+def naca4(code, chord, count):
+    # closed NACA 4 digit profile (count, 2) from the trailing edge over the
+    # upper side and back, cosine spacing
+    m = int(code[0]) / 100.0
+    p = int(code[1]) / 10.0
+    t = int(code[2:]) / 100.0
+    beta = np.linspace(0, math.pi, count // 2 + 1)
+    x = (1 - np.cos(beta)) / 2
+    yt = 5 * t * (0.2969 * np.sqrt(x) - 0.1260 * x - 0.3516 * x**2 + 0.2843 * x**3 - 0.1036 * x**4)
+    if m > 0:
+        yc = np.where(x < p, m / p**2 * (2 * p * x - x**2), m / (1 - p)**2 * ((1 - 2 * p) + 2 * p * x - x**2))
+    else:
+        yc = np.zeros_like(x)
+    upper = np.column_stack((x, yc + yt))[::-1]
+    lower = np.column_stack((x, yc - yt))[1:-1]
+    return np.vstack((upper, lower)) * chord
+
+
+def profileCount(chord, density):
+    # points of a profile of chord length at density mm/point
+    return max(16, int(2.1 * chord / density))
+
+
+def wingParts(density, root=200.0, tip=120.0, span=400.0, sweep=30.0):
+    # tapered wing, side A root at z = 0, side B tip at z = span
+    count = profileCount(root, density)
+    A = naca4('2412', root, count)
+    B = naca4('2412', tip, count) + [sweep, 0.0]
+    return [np.stack([np.column_stack((A + [50.0, 100.0], np.zeros(len(A)))),
+                      np.column_stack((B + [50.0, 100.0], np.full(len(B), span)))], axis=1)]
+
+
+def ribParts(holes, density=0.5, chord=250.0, thickness=5.0):
+    # rib outline and its lightening holes, every part (N, 2, 3)
+    outline = naca4('4415', chord, profileCount(chord, density))
+    parts = [outline]
+    for k in range(holes):
+        x = chord * (0.2 + 0.55 * (k + 0.5) / holes)
+        r = min(chord * 0.25 / holes, 0.04 * chord)
+        t = np.linspace(0, 2 * math.pi, max(12, int(2 * math.pi * r / density)), endpoint=False)
+        parts.append(np.column_stack((x + r * np.cos(t), 0.02 * chord + r * np.sin(t))))
+    return [np.stack([np.column_stack((p + [20.0, 100.0], np.zeros(len(p)))),
+                      np.column_stack((p + [20.0, 100.0], np.full(len(p), thickness)))], axis=1)
+            for p in parts]
+
+
+def layoutShapes(count, density=1.0):
+    # count ribs in rows on the table, the parts of every rib
+    return [[part + [30.0 + 270.0 * (k % 4), 20.0 + 60.0 * (k // 4), 0.0]
+             for part in ribParts(2, density, chord=240.0, thickness=Z_LENGTH)]
+            for k in range(count)]
+
+
+def layoutRoute(shapes):
+    # the ribs of layoutShapes joined by links, as one route
+    points = [np.zeros((1, 2, 3)) + [[0, 0, 0], [0, 0, Z_LENGTH]]]
+    owners = [[0, 'InitialPath']]
+    start = 1
+    for k, shape in enumerate(shapes):
+        for j, part in enumerate(shape):
+            link = np.linspace(points[-1][-1], part[0], 4)[1:-1]
+            owners.append([start, 'Link_%d_%d' % (k, j)])
+            owners.append([start + len(link), 'ShapePath_%d_%d' % (k, j)])
+            points.extend([link, part, part[:1]])
+            start += len(link) + len(part) + 1
+    owners.append([start, 'FinalPath'])
+    points.append(np.zeros((1, 2, 3)) + [[0, 0, 0], [0, 0, Z_LENGTH]])
+    return rawpath.RawPath(np.vstack(points), owners)
+
+
+def workloads(names=None):
+    # [name, parts, shapes], parts are the hws_core input (a layout is one
+    # route), shapes the parts of every solid of the FreeCAD document
+    found = []
+    for density in (2.0, 1.0, 0.5, 0.25):
+        parts = wingParts(density)
+        found.append(['wing_%g' % density, parts, [parts]])
+    for holes in (0, 4, 12):
+        parts = ribParts(holes)
+        found.append(['rib_%d' % holes, parts, [parts]])
+    for count in (4, 16, 48):
+        shapes = layoutShapes(count)
+        found.append(['layout_%d' % count, [layoutRoute(shapes)], shapes])
+    if names:
+        found = [w for w in found if any(w[0].startswith(n) for n in names)]
+    return found
+
+
+# stages ----------------------------------------------------------------------
+
+def asRoute(parts):
+    # one route of all parts of a workload
+    if isinstance(parts[0], rawpath.RawPath):
+        return parts[0]
+    owners = []
+    start = 0
+    for k, part in enumerate(parts):
+        owners.append([start, 'ShapePath_%d' % k])
+        start += len(part)
+    return rawpath.RawPath(np.vstack(parts), owners)
+
+
+def coreStages(parts):
+    # [name, function] of the hws_core stages of a workload
+    route = asRoute(parts)
+    A, B = route.A, route.B
+    axes = projection.machineAxes(A, B, 0, Z_LENGTH)
+    dist_A = gcode.xyDistances(A, [0, 0])
+    dist_B = gcode.xyDistances(B, [0, 0])
+    owner_index = route.ownerIndexes().tolist()
+    owner_lengths = [[1.0, 1.0]] * len(route.owners)
+    base = [np.array([[0.0, 0.0, -20.0], [800.0, 400.0, 0.0]])]
+
+    def kerf():
+        for part in parts:
+            offset.offsetSides(part[:, 0], part[:, 1], FOAM[1] / 2, FOAM[3] / 2)
+
+    def program():
+        sink = io.StringIO()
+        times, lengths = feed.planMoves(dist_A, dist_B, axes, FOAM[2], MAX_SPEED)
+        sink.writelines(gcode.iterGCodeLines(axes, dist_A, dist_B, owner_index, owner_lengths,
+                                             FOAM[4] * 10, FOAM[2], True, None, times, lengths))
+
+    stages = []
+    if not isinstance(parts[0], rawpath.RawPath):
+        # layouts are routes already, their parts have the kerf
+        stages.append(['addKerf2Faces (offset)', kerf])
+    return stages + [
+            ['simplify', lambda: route.simplified(0.01)],
+            ['projection', lambda: projection.machineAxes(A, B, 0, Z_LENGTH)],
+            ['arc fitting', lambda: arcs.fitArcs(axes[:, :2], axes[:, 2:], 0.01, owner_index)],
+            ['feed planning', lambda: feed.planMoves(dist_A, dist_B, axes, FOAM[2], MAX_SPEED)],
+            ['collision', lambda: collision.collidingSegments(A, B, base)],
+            ['gcode', program]]
+
+
+def partSolid(parts):
+    # loft between the side A and side B profile of the first part, the
+    # other parts cut out as holes
+    import FreeCAD
+    import Part
+
+    def wire(part, side):
+        return Part.makePolygon([FreeCAD.Vector(*p) for p in part[:, side]] +
+                                [FreeCAD.Vector(*part[0, side])])
+
+    solids = [Part.makeLoft([wire(p, 0), wire(p, 1)], True) for p in parts]
+    shape = solids[0]
+    for hole in solids[1:]:
+        shape = shape.cut(hole)
+    return shape
+
+
+def shapeDocument(name, shapes):
+    # new document with a machine and a routed ShapePath of every shape,
+    # linked by planCutOrder, as the Route and Plan Cut Order commands make it
+    import FreeCAD
+    import HWS_Path
+    import HWS_SimMachine
+    doc = FreeCAD.newDocument('Benchmark_' + name.replace('.', '_'))
+    FreeCAD.setActiveDocument(doc.Name)
+    machine = doc.addObject('App::DocumentObjectGroupPython', 'HWS_Machine')
+    HWS_SimMachine.HWS_Machine(machine)
+    folder = doc.addObject('App::DocumentObjectGroupPython', 'WirePath')
+    HWS_Path.WirePathFolder(folder)
+    machine.addObject(folder)
+
+    paths = []
+    for k, parts in enumerate(shapes):
+        solid = doc.addObject('Part::Feature', 'Part_%d' % k)
+        solid.Shape = partSolid(parts)
+        path_obj = doc.addObject('Part::FeaturePython', 'ShapePath_' + solid.Name)
+        HWS_Path.ShapePath(path_obj, solid, route=False)
+        folder.addObject(path_obj)
+        paths.append([path_obj, solid])
+    for (path_obj, solid), result in zip(paths, HWS_Path.routeShapes([p[0] for p in paths])):
+        if isinstance(result, str):
+            raise RuntimeError(result)
+        path_obj.Proxy.setParts(path_obj, solid, result[0], result[1])
+    doc.recompute()
+    HWS_Path.planCutOrder()
+    doc.recompute()
+    return doc
+
+
+def routeStages(doc):
+    # [name, function] of the stages of a document with a planned route: the
+    # trace, the G-Code export and the simulation player (setup and frames)
+    import FreeCAD
+    import HWS_Path
+    import HWS_SimMachine
+    FreeCAD.setActiveDocument(doc.Name)
+    G93 = doc.HWS_Machine.G93
+    route = HWS_Path.traceObjectsAndLinksForRawPath(G93)
+
+    def simulation():
+        player = HWS_SimMachine.SimulationPlayer(route, 1.0, 0.0)
+        player.attach()
+        for t in np.linspace(0, player.times[-1], SIMULATION_FRAMES):
+            player.frame(t)
+
+    return [['traceObjectsAndLinksForRawPath', lambda: HWS_Path.traceObjectsAndLinksForRawPath(G93)],
+            ['writeGCodeFile', lambda: HWS_Path.writeGCodeFile(route, io.StringIO(), G93)],
+            ['simulation (%d frames)' % SIMULATION_FRAMES, simulation]]
+
+
+def freecadStages(name, parts, shapes):
+    # [name, function] of the FreeCAD stages, parts rebuilt as Part shapes
+    import HWS_Path
+    stages = routeStages(shapeDocument(name, shapes))
+    if isinstance(parts[0], rawpath.RawPath):
+        return stages
+
+    holder = type('Shape', (), {'Shape': partSolid(parts)})()
+    trajectories = HWS_Path.shapeToFaceTrajectories(holder, 1.0)
+
+    def route():
+        HWS_Path.faces_cache.clear()
+        HWS_Path.kerf_cache.clear()
+        HWS_Path.ShapeToHWSPath(holder, 1.0, foam=FOAM)
+
+    def kerf():
+        for trajectory, is_inner_part in trajectories:
+            HWS_Path.addKerf2Faces(trajectory, FOAM, is_inner_part)
+
+    paths = HWS_Path.ShapeToHWSPath(holder, 1.0, foam=FOAM)[0]
+    return [['ShapeToHWSPath', route],
+            ['addKerf2Faces', kerf],
+            ['PathToShape', lambda: [HWS_Path.PathToShape(p) for p in paths]]] + stages
+
+
+def documentStages(fcstd_path):
+    # routeStages of a saved document
+    import FreeCAD
+    doc = FreeCAD.openDocument(fcstd_path)
+    FreeCAD.setActiveDocument(doc.Name)
+    doc.recompute()
+    return routeStages(doc)
+
+
+def measure(function, repeat):
+    # (best time in seconds, peak traced memory in bytes)
+    best = None
+    for r in range(repeat):
+        t = time.perf_counter()
+        function()
+        t = time.perf_counter() - t
+        best = t if best is None else min(best, t)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def runBenchmarks(names=None, repeat=3, with_freecad=False, documents=()):
+    results = {}
+    for name, parts, shapes in workloads(names):
+        stages = coreStages(parts)
+        if with_freecad:
+            stages += freecadStages(name, parts, shapes)
+        for stage, function in stages:
+            t, peak = measure(function, repeat)
+            results[name + '/' + stage] = {'time': t, 'peak_memory': peak, 'points': asRoute(parts).count}
+    for fcstd_path in documents:
+        name = os.path.splitext(os.path.basename(fcstd_path))[0]
+        for stage, function in documentStages(fcstd_path):
+            t, peak = measure(function, repeat)
+            results[name + '/' + stage] = {'time': t, 'peak_memory': peak, 'points': None}
+    return results
+
+
+def compareResults(results, baseline, threshold=DEFAULT_THRESHOLD, stage_thresholds=None,
+                   memory_threshold=None):
+    # regressions as [key, what, baseline value, value, allowed ratio]
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        allowed = threshold
+        for stage, value in (stage_thresholds or {}).items():
+            if key.endswith('/' + stage) or key.startswith(stage + '/') or key == stage:
+                allowed = value
+        if (result['time'] > base['time'] * (1 + allowed) and
+                result['time'] - base['time'] > MIN_TIME_DIFFERENCE):
+            regressions.append([key, 'time', base['time'], result['time'], allowed])
+        if memory_threshold is not None and result['peak_memory'] > base['peak_memory'] * (1 + memory_threshold):
+            regressions.append([key, 'peak_memory', base['peak_memory'], result['peak_memory'], memory_threshold])
+    return regressions
+
+
+def printResults(results, baseline=None):
+    print('%-44s %8s %10s %10s %9s' % ('workload/stage', 'points', 'time ms', 'peak KiB', 'change'))
+    for key in sorted(results):
+        r = results[key]
+        change = ''
+        if baseline and key in baseline and baseline[key]['time'] > 0:
+            change = '%+.0f%%' % (100 * (r['time'] / baseline[key]['time'] - 1))
+        print('%-44s %8s %10.2f %10.1f %9s' % (key, r['points'] if r['points'] is not None else '',
+                                                r['time'] * 1000, r['peak_memory'] / 1024.0, change))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the HWS path pipeline on generated workloads')
+    parser.add_argument('workloads', nargs='*', help='only run workloads starting with these names (wing, rib_4, layout...)')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='runs per stage, the best one counts')
+    parser.add_argument('--save-baseline', default=None, help='write the results to this JSON file')
+    parser.add_argument('--compare', default=None, help='baseline JSON file to compare with')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='allowed slowdown, 0.25 = 25 %%')
+    parser.add_argument('--stage-threshold', action='append', default=[], metavar='STAGE=VALUE',
+                        help='allowed slowdown of one stage or workload, can be repeated')
+    parser.add_argument('--memory-threshold', type=float, default=None, help='allowed peak memory growth, off by default')
+    parser.add_argument('--freecad-lib', default=os.environ.get('FREECAD_LIB'), help='directory containing FreeCAD.so/FreeCAD.pyd')
+    parser.add_argument('--documents', nargs='*', default=[], help='.FCStd files to time trace, G-Code export and simulation on')
+    args = parser.parse_args(argv)
+
+    if args.freecad_lib and args.freecad_lib not in sys.path:
+        sys.path.insert(0, args.freecad_lib)
+    try:
+        import FreeCAD
+        with_freecad = True
+    except ImportError:
+        with_freecad = False
+        print('FreeCAD not found, only the hws_core stages are run')
+
+    results = runBenchmarks(args.workloads, args.repeat, with_freecad, args.documents if with_freecad else ())
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+    printResults(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as baseline_file:
+            json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                       'python': sys.version.split()[0],
+                       'numpy': np.__version__,
+                       'results': results}, baseline_file, indent=2)
+        print('baseline saved to', args.save_baseline)
+
+    if baseline is not None:
+        stage_thresholds = {}
+        for item in args.stage_threshold:
+            stage, value = item.rsplit('=', 1)
+            stage_thresholds[stage] = float(value)
+        regressions = compareResults(results, baseline, args.threshold, stage_thresholds, args.memory_threshold)
+        for key, what, old, new, allowed in regressions:
+            print('REGRESSION %s %s: %.6g -> %.6g (allowed +%d%%)' % (key, what, old, new, allowed * 100))
+        if regressions:
+            return 1
+        print('no regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -38,3 +38,9 @@ def getFoamProperties(obj):
     heat = foam_cfg[4] * 10 
     speed = foam_cfg[2]
     return heat, speed
+
+def getTableMaxSpeed():
+    # max axis speed (Speed_Max) of the selected table
+    m = FreeCAD.ActiveDocument.HWS_Machine
+    table_cfg = json.JSONDecoder().decode(m.TableConfig[m.TableIndex])
+    return float(table_cfg[4])
@@ -33,6 +33,7 @@ import FreeCADGui
 import Part
 import HWS_SimMachine as HWS_SM
 import HWS_Path
+import HWS_Profile
 import json
 
 #todo find and use a pyside converter for qtdesign .ui file
@@ -1464,6 +1465,7 @@ class ClearWireTraces:
             return False
         
     def Activated(self):
+        # also stops a running animation
         HWS_SM.clearWireTrack()
         print("Wire traces removed")
 
@@ -2064,9 +2066,14 @@ class CreateShapePath:
             return False
 
 
+    @HWS_Profile.profiledCommand('Route')
     def Activated(self):
         # retrieve Selection
         selection = FreeCAD.Gui.Selection.getSelectionEx()
+        # all objects are created first, their paths are computed together in
+        # worker processes and the document is recomputed once at the end
+        FreeCAD.ActiveDocument.openTransaction("Route")
+        new_paths = []
         for i in range(len(selection)):
             """
             # create WirePath folder if it does not exist
@@ -2098,7 +2105,7 @@ class CreateShapePath:
             shapepathobj = FreeCAD.ActiveDocument.addObject('Part::FeaturePython', shapepath_name)
             #print(shapepathobj.Name)
             # initialize python object
-            HWS_Path.ShapePath(shapepathobj, selObj)
+            HWS_Path.ShapePath(shapepathobj, selObj, route=False)
             HWS_Path.ShapePathViewProvider(shapepathobj.ViewObject)
             # modify color
             shapepathobj.ViewObject.ShapeColor = (1.0, 1.0, 1.0)
@@ -2106,6 +2113,19 @@ class CreateShapePath:
             # ToDo add margins to bounding box in XY plane
             #shapepathobj.ViewObject.BoundingBox = True
             WPFolder.addObject(shapepathobj)
+            new_paths.append([shapepathobj, selObj])
+
+        results = HWS_Path.routeShapes([p[0] for p in new_paths])
+        for (shapepathobj, selObj), result in zip(new_paths, results):
+            if isinstance(result, str):
+                # failed shapes are reported and left out, the others are routed
+                FreeCAD.Console.PrintError('Route failed for ' + selObj.Label + ':\n' + result + '\n')
+                FreeCAD.ActiveDocument.removeObject(shapepathobj.Name)
+                continue
+            shapepathobj.Proxy.setParts(shapepathobj, selObj, result[0], result[1])
+
+        FreeCAD.ActiveDocument.recompute()
+        FreeCAD.ActiveDocument.commitTransaction()
 
 
 
@@ -2124,6 +2144,7 @@ class CreatePathLink:
             return False
 
 
+    @HWS_Profile.profiledCommand('Link Path')
     def Activated(self):
         # retrieve selection
         selection = FreeCAD.Gui.Selection.getSelectionEx()
@@ -2219,6 +2240,32 @@ class CreatePathLink:
             FreeCAD.ActiveDocument.WirePath.addObject(LinkObj)
 
 
+class PlanCutOrder:
+    def GetResources(self):
+        return {'Pixmap': __dir__ + '/icons/PathLink.svg',
+                'MenuText': 'Auto Link Paths',
+                'ToolTip': 'Order all paths for the shortest travel and create the links, initial and final path'}
+
+    def IsActive(self):
+        try:
+            a = FreeCAD.ActiveDocument.WirePath
+            return True
+
+        except:
+            return False
+
+    @HWS_Profile.profiledCommand('Auto Link Paths')
+    def Activated(self):
+        # replaces the links made by hand, undo brings them back
+        FreeCAD.ActiveDocument.openTransaction("Auto Link Paths")
+        ordered, travel = HWS_Path.planCutOrder()
+        FreeCAD.ActiveDocument.recompute()
+        FreeCAD.ActiveDocument.commitTransaction()
+        if ordered:
+            FreeCAD.Console.PrintMessage('Cut order: ' + ', '.join(obj.Label for obj in ordered) +
+                                         ' (travel ' + str(round(travel, 1)) + ' mm)\n')
+
+
 class SaveGCode:
     def GetResources(self):
         return {'Pixmap': __dir__ + '/icons/SaveGCode.svg',
@@ -2232,6 +2279,7 @@ class SaveGCode:
         except:
             return False
 
+    @HWS_Profile.profiledCommand('Save G-Code')
     def Activated(self):
         HWS_Path.saveGCodeFile()
 
@@ -2253,7 +2301,7 @@ class RunPathSimulation:
     def GetResources(self):
         return {'Pixmap': __dir__ + '/icons/AnimateMachine.svg',
                 'MenuText': 'Start Animation',
-                'ToolTip': 'Start animation of the current toolpath'}
+                'ToolTip': 'Start animation of the current toolpath, pause or resume a running animation'}
 
     def IsActive(self):
         try:
@@ -2263,15 +2311,17 @@ class RunPathSimulation:
             return False
 
     def Activated(self):
+        if HWS_SM.toggleSimulation():
+            return
         full_path = HWS_Path.traceObjectsAndLinksForRawPath() #CreateCompleteRawPath()
+        # returns at once, the animation finishes (and returns home) by itself
         HWS_SM.runSimulation(full_path)
-        FreeCAD.Console.PrintMessage('Simulation finished\n')
-        HWS_SM.returnHome()
 
 if FreeCAD.GuiUp:
     FreeCAD.Gui.addCommand('CreateHWSMachine', CreateHWSMachine())
     FreeCAD.Gui.addCommand('CreateToolPath', CreateShapePath())
     FreeCAD.Gui.addCommand('CreatePathLink', CreatePathLink())
+    FreeCAD.Gui.addCommand('PlanCutOrder', PlanCutOrder())
     FreeCAD.Gui.addCommand('SaveGCode', SaveGCode())
     FreeCAD.Gui.addCommand('CutGCode', cutGCode())
     FreeCAD.Gui.addCommand('RunPathSimulation', RunPathSimulation())
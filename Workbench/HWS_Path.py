@@ -28,13 +28,33 @@
 
 
 import FreeCAD
-import FreeCADGui
 import Part
 import time
 import json
+import os
+import gzip
+import sys
+import types
+import traceback
+import multiprocessing
 import HWS_SimMachine as HWS_SM
 import HWS_Foam
-from PySide import QtGui
+import HWS_Profile
+from hws_core import spatial as HWS_Spatial
+from hws_core import rawpath as HWS_RawPath
+from hws_core import collision as HWS_Collision
+from hws_core import arcs as HWS_Arcs
+from hws_core import feed as HWS_Feed
+from hws_core import offset as HWS_Offset
+from hws_core import cache as HWS_Cache
+from hws_core import projection as HWS_Projection
+from hws_core import gcode as HWS_GCode
+from hws_core import ordering as HWS_Ordering
+from hws_core import workers as HWS_Workers
+import numpy as np
+
+# size in characters of the blocks the G-Code is written in
+GCODE_CHUNK_SIZE = 64 * 1024
 
 #remova when not needed
 from pprint import pprint
@@ -173,10 +193,17 @@ class InnerPath:
         pass
         # handle attatchment
         #fp.positionBySupport()
+
+    def __getstate__(self):
+        # the point grid is rebuilt from RawPath, nothing to save
+        return None
+
+    def __setstate__(self, state):
+        return None
         
 
 class ShapePath:
-    def __init__(self, obj, selObj):
+    def __init__(self, obj, selObj, route=True):
         obj.addProperty('App::PropertyString',
                         'ShapeName',
                         'Path Data').ShapeName = selObj.Name
@@ -210,6 +237,11 @@ class ShapePath:
                         'Path Settings',
                         'Path density in mm/point').PointDensity = 5.0
 
+        obj.addProperty('App::PropertyFloat',
+                        'ChordTolerance',
+                        'Path Settings',
+                        'Max distance in mm between curves and the path (0.0 = use PointDensity)').ChordTolerance = 0.05
+
         obj.addProperty('App::PropertyBool',
                         'Reverse',
                         'Path Settings',
@@ -227,43 +259,36 @@ class ShapePath:
                         'Shows the path projected to the machine sides')
         """
         obj.Proxy = self
+
+        # with route=False the path is set later with setParts (batch route)
+        if not route:
+            return
         
         shape = FreeCAD.ActiveDocument.getObject(obj.ShapeName)
 
         obj_parts = []
         inner_parts_Path_AB = []
-        obj_parts, inner_parts_Path_AB = ShapeToHWSPath(shape, obj.PointDensity, reverse=obj.Reverse)
-        
+        obj_parts, inner_parts_Path_AB = ShapeToHWSPath(shape, obj.PointDensity, reverse=obj.Reverse,
+                                                        inverse_kerf=obj.InverseKerf,
+                                                        chord_tolerance=obj.ChordTolerance)
+        self.setParts(obj, selObj, obj_parts, inner_parts_Path_AB)
+        FreeCAD.ActiveDocument.recompute()
+
+    def setParts(self, obj, selObj, obj_parts, inner_parts_Path_AB):
         obj.RawPath = obj_parts[0]
+        obj.PathALength = inner_parts_Path_AB[0][0]
+        obj.PathBLength = inner_parts_Path_AB[0][1]
         obj.Shape = PathToShape(obj.RawPath)
 
         #add inner parts
-        if len(obj_parts) > 1:
-            inner_shapepathobj = []
-            for i in range(1, len(obj_parts)):
-                inner_PartName = 'ShapePath_' + selObj.Name+"_" + str(i-1)
-                inner_part_obj = FreeCAD.ActiveDocument.addObject('Part::FeaturePython', inner_PartName)
-                inner_part_obj.Label = inner_part_obj.Name
-                inner_shapepathobj.append( inner_part_obj )
-                
-                # initialize python object
-                InnerPath(inner_shapepathobj[i-1], obj_parts[i], selObj)
-                InnerPathViewProvider(inner_shapepathobj[i-1].ViewObject)
-                # modify color
-                inner_shapepathobj[i-1].ViewObject.ShapeColor = (1.0, 1.0, 1.0)
-                inner_shapepathobj[i-1].ViewObject.LineWidth = 1.0
-                
-                inner_shapepathobj[i-1].PathALength = inner_parts_Path_AB[i][0]
-                inner_shapepathobj[i-1].PathBLength = inner_parts_Path_AB[i][1]
-                # ToDo add margins to bounding box in XY plane
-                
-                WPFolder = FreeCAD.ActiveDocument.WirePath
-                WPFolder.addObject(inner_shapepathobj[i-1])
+        for i in range(1, len(obj_parts)):
+            addInnerPath('ShapePath_' + selObj.Name+"_" + str(i-1), obj_parts[i], inner_parts_Path_AB[i], selObj)
 
         # hide original shape
-        FreeCAD.ActiveDocument.getObject(obj.ShapeName).ViewObject.Visibility = False
-        FreeCAD.ActiveDocument.recompute()
+        if FreeCAD.GuiUp:
+            FreeCAD.ActiveDocument.getObject(obj.ShapeName).ViewObject.Visibility = False
 
+    @HWS_Profile.profiled('ShapePath.execute')
     def execute(self, fp):
         #print('from class shapepath',fp.ShapeName, fp.Lable, fp.Name)
         #print(fp.TypeId)
@@ -271,74 +296,158 @@ class ShapePath:
         #print(fp.ShapeName)
         fp_parts = []
         fs_inner_parts_Path_AB = []
-        fp_parts, fs_inner_parts_Path_AB  = ShapeToHWSPath(shape, fp.PointDensity, reverse=fp.Reverse)
+        fp_parts, fs_inner_parts_Path_AB  = ShapeToHWSPath(shape, fp.PointDensity, reverse=fp.Reverse,
+                                                           inverse_kerf=fp.InverseKerf,
+                                                           chord_tolerance=getattr(fp, 'ChordTolerance', 0.0))
+        old_raw = getOldRawPath(fp)
         fp.RawPath = fp_parts[0]
+        fp.PathALength = fs_inner_parts_Path_AB[0][0]
+        fp.PathBLength = fs_inner_parts_Path_AB[0][1]
         fp.Shape = PathToShape(fp.RawPath)
+        updatePathPointGrid(fp)
+        # links, InitialPath and FinalPath follow the new path
+        remapPathReferences(fp, old_raw)
+
+        # reuse the inner part objects of the loops that are still there, only
+        # their path is replaced. Inner parts of loops that are gone are removed
+        # with their links, new loops get new objects
+        inner_objs = [obj for obj in FreeCAD.ActiveDocument.WirePath.Group
+                      if isinstance(getattr(obj, 'Proxy', None), InnerPath) and obj.ShapeName == fp.ShapeName]
+        old_raws = [getOldRawPath(obj) for obj in inner_objs]
+        new_raws = fp_parts[1:]
+        matches = matchInnerParts(old_raws, new_raws)
+
+        for old_i in range(len(inner_objs)):
+            if old_i not in matches:
+                removePathAndReferences(inner_objs[old_i])
+
+        reused = dict((new_i, old_i) for old_i, new_i in matches.items())
+        for i in range(len(new_raws)):
+            AB_length = fs_inner_parts_Path_AB[i + 1]
+            if i in reused:
+                inner_obj = inner_objs[reused[i]]
+                inner_obj.RawPath = new_raws[i]
+                inner_obj.PathALength = AB_length[0]
+                inner_obj.PathBLength = AB_length[1]
+                inner_obj.Shape = PathToShape(inner_obj.RawPath)
+                updatePathPointGrid(inner_obj)
+                remapPathReferences(inner_obj, old_raws[reused[i]])
+            else:
+                k = 0
+                while FreeCAD.ActiveDocument.getObject(fp.Name + "_" + str(k)):
+                    k += 1
+                addInnerPath(fp.Name + "_" + str(k), new_raws[i], AB_length, shape)
 
-        # remove child and parent link objects (they need to be re-defined)
-        for obj in FreeCAD.ActiveDocument.WirePath.Group:
-            try:
-                if obj.PathName == fp.Name:
-                    FreeCAD.ActiveDocument.removeObject(obj.Name)
-            except AttributeError:
-                pass
+            #tree view
+        HWS_SM.clearWireTrack()
 
-            try:
-                if obj.PathNameA == fp.Name:
-                    FreeCAD.ActiveDocument.removeObject(obj.Name)
-            except AttributeError:
-                pass
+    def __getstate__(self):
+        # the point grid is rebuilt from RawPath, nothing to save
+        return None
 
-            try:
-                if obj.PathNameB == fp.Name:
-                    FreeCAD.ActiveDocument.removeObject(obj.Name)
-            except AttributeError:
-                pass
-            
-            try:
-                obj_split = obj.PathNameA.split('_')
-                #print(obj.PathNameA, len(obj_split), obj_split[0]+'_'+obj_split[1] , fp.Name)
-                if len(obj_split) > 2 and obj_split[0]+'_'+obj_split[1] == fp.Name:
-                    FreeCAD.ActiveDocument.removeObject(obj.Name)
-            except AttributeError:
-                pass
-            """
-            try:
-                obj_split = obj.PathNameB.split('_')
-                if len(obj_split) > 2 and obj_split[0]+'_'+obj_split[1] == fp.Name:
-                    FreeCAD.ActiveDocument.removeObject(obj.Name)
-            except AttributeError:
-                pass
-            """
-
-        # rename remove and add new inner part
-        if len(fp_parts) > 1:
-            inner_shapepathobj = []
-            for i in range(1, len(fp_parts)):
-                #print(fp.Name)
-                tmp_obj = FreeCAD.ActiveDocument.getObjectsByLabel(fp.Name+"_" + str(i-1))[0]
-                tmp_obj.Label = "tmp_" + str(i-1)
-                FreeCAD.ActiveDocument.removeObject(tmp_obj.Name)
-
-                inner_part_obj = FreeCAD.ActiveDocument.addObject('Part::FeaturePython', fp.Name+"_" + str(i-1))
-                inner_part_obj.Label = fp.Name+"_" + str(i-1)
-                inner_shapepathobj.append( inner_part_obj )
-                # initialize python object
-                InnerPath(inner_shapepathobj[i-1], fp_parts[i], shape)
-                InnerPathViewProvider(inner_shapepathobj[i-1].ViewObject)
-                # modify color
-                inner_shapepathobj[i-1].ViewObject.ShapeColor = (1.0, 1.0, 1.0)
-                inner_shapepathobj[i-1].ViewObject.LineWidth = 1.0
-                
-                inner_shapepathobj[i-1].PathALength = fs_inner_parts_Path_AB[i][0]
-                inner_shapepathobj[i-1].PathBLength = fs_inner_parts_Path_AB[i][1]
+    def __setstate__(self, state):
+        return None
 
-                WPFolder = FreeCAD.ActiveDocument.WirePath
-                WPFolder.addObject(inner_shapepathobj[i-1])
 
-                
-            #tree view
-        HWS_SM.clearWireTrack()
+def addInnerPath(name, inner_path, AB_length, orig_obj):
+    inner_part_obj = FreeCAD.ActiveDocument.addObject('Part::FeaturePython', name)
+    inner_part_obj.Label = inner_part_obj.Name
+
+    # initialize python object
+    InnerPath(inner_part_obj, inner_path, orig_obj)
+    if FreeCAD.GuiUp:
+        InnerPathViewProvider(inner_part_obj.ViewObject)
+        # modify color
+        inner_part_obj.ViewObject.ShapeColor = (1.0, 1.0, 1.0)
+        inner_part_obj.ViewObject.LineWidth = 1.0
+
+    inner_part_obj.PathALength = AB_length[0]
+    inner_part_obj.PathBLength = AB_length[1]
+    # ToDo add margins to bounding box in XY plane
+
+    WPFolder = FreeCAD.ActiveDocument.WirePath
+    WPFolder.addObject(inner_part_obj)
+    return inner_part_obj
+
+
+def getOldRawPath(path_obj):
+    # RawPath of a path object before it is replaced, None if it has none yet
+    try:
+        return getRawPath(path_obj)
+    except:
+        return None
+
+
+def pathReferences(path_name):
+    # [object, index property] of the links, InitialPath and FinalPath that
+    # start or end on path_name
+    references = []
+    for obj in FreeCAD.ActiveDocument.WirePath.Group:
+        for name_prop, index_prop in (('PathName', 'PathIndex'), ('PathNameA', 'PathIndexA'), ('PathNameB', 'PathIndexB')):
+            if getattr(obj, name_prop, None) == path_name:
+                references.append([obj, index_prop])
+    return references
+
+
+@HWS_Profile.profiled('remap references')
+def remapPathReferences(path_obj, old_raw):
+    # moves the indexes referencing path_obj to the point of the new path
+    # closest to the point they referenced on old_raw
+    new_raw = getRawPath(path_obj)
+    if old_raw != None and old_raw.count == new_raw.count and np.array_equal(old_raw.points, new_raw.points):
+        return
+    for obj, index_prop in pathReferences(path_obj.Name):
+        old_index = getattr(obj, index_prop)
+        if old_raw != None and 0 <= old_index < old_raw.count:
+            new_index, d = nearestPathPoint(old_raw.point(0, old_index), path_obj)
+        else:
+            new_index = min(max(old_index, 0), new_raw.count - 1)
+        if new_index != old_index:
+            setattr(obj, index_prop, new_index)
+        # the link shape has to follow the new path
+        obj.touch()
+
+
+def removePathAndReferences(path_obj):
+    for obj, index_prop in pathReferences(path_obj.Name):
+        if FreeCAD.ActiveDocument.getObject(obj.Name):
+            FreeCAD.ActiveDocument.removeObject(obj.Name)
+    FreeCAD.ActiveDocument.removeObject(path_obj.Name)
+
+
+def pathSignature(raw):
+    # centroid, length and size of side A, to recognise a loop after the
+    # shape has been edited
+    A = raw.A
+    length = float(np.sum(np.linalg.norm(np.diff(A, axis=0), axis=1)))
+    size = float(np.linalg.norm(A.max(axis=0) - A.min(axis=0)))
+    return A.mean(axis=0), length, size
+
+
+def matchInnerParts(old_raws, new_raws):
+    # pairs old loops with new loops, {old index: new index}. Loops pair up if
+    # their centroids are closer than half their size, the most alike (closest
+    # centroid and length) first
+    old_sig = [pathSignature(raw) if raw != None and raw.count else None for raw in old_raws]
+    new_sig = [pathSignature(raw) for raw in new_raws]
+    candidates = []
+    for i in range(len(old_sig)):
+        if old_sig[i] == None:
+            continue
+        for j in range(len(new_sig)):
+            d = float(np.linalg.norm(old_sig[i][0] - new_sig[j][0]))
+            if d > max(old_sig[i][2], new_sig[j][2]) / 2:
+                continue
+            candidates.append((d + abs(old_sig[i][1] - new_sig[j][1]), i, j))
+    candidates.sort()
+
+    matches = {}
+    used_new = set()
+    for cost, i, j in candidates:
+        if i not in matches and j not in used_new:
+            matches[i] = j
+            used_new.add(j)
+    return matches
 
 
 class ShapePathViewProvider:
@@ -363,11 +472,11 @@ class LinkPath:
                                                                 #sel_point_AB[0]
         obj.addProperty('App::PropertyInteger',
                         'PathIndexA',                   
-                        'Link Data').PathIndexA = pointFromPath(sel_point_AB[0], selA.Object.RawPath)
+                        'Link Data').PathIndexA = pointFromPath(sel_point_AB[0], selA.Object)
                                                                 #sel_point_AB[1]
         obj.addProperty('App::PropertyInteger',
                         'PathIndexB',
-                        'Link Data').PathIndexB = pointFromPath(sel_point_AB[1], selB.Object.RawPath)
+                        'Link Data').PathIndexB = pointFromPath(sel_point_AB[1], selB.Object)
         
         obj.addProperty('App::PropertyFloat',
                         'PathALength',
@@ -400,11 +509,11 @@ class LinkPath:
         lp_B = []  # link_path_A (machine side A = lower Z)
         # append initial point from pathshape A
         # Fix for xrossing initpath and endpath 0 - 1
-        lp_A.append(FreeCAD.ActiveDocument.getObject(obj.PathNameA).RawPath[0][obj.PathIndexA])
-        lp_B.append(FreeCAD.ActiveDocument.getObject(obj.PathNameA).RawPath[1][obj.PathIndexA])
+        lp_A.append(pathPoint(obj.PathNameA, 0, obj.PathIndexA))
+        lp_B.append(pathPoint(obj.PathNameA, 1, obj.PathIndexA))
         # append destination point in pathshape B
-        lp_A.append(FreeCAD.ActiveDocument.getObject(obj.PathNameB).RawPath[0][obj.PathIndexB])
-        lp_B.append(FreeCAD.ActiveDocument.getObject(obj.PathNameB).RawPath[1][obj.PathIndexB])
+        lp_A.append(pathPoint(obj.PathNameB, 0, obj.PathIndexB))
+        lp_B.append(pathPoint(obj.PathNameB, 1, obj.PathIndexB))
 
         #print(lp_A)
         #print(lp_B)
@@ -428,8 +537,8 @@ class LinkPath:
         lp_A_len = 0
         lp_B_len = 0
         # append initial point from pathshape A
-        lp_A.append(FreeCAD.ActiveDocument.getObject(fp.PathNameA).RawPath[0][fp.PathIndexA])
-        lp_B.append(FreeCAD.ActiveDocument.getObject(fp.PathNameA).RawPath[1][fp.PathIndexA])
+        lp_A.append(pathPoint(fp.PathNameA, 0, fp.PathIndexA))
+        lp_B.append(pathPoint(fp.PathNameA, 1, fp.PathIndexA))
 
         # append aux control points
         has_c_points = False
@@ -442,11 +551,11 @@ class LinkPath:
                 has_c_points = True
         # append destination point in pathshape B
         if has_c_points:
-            lp_A.append(FreeCAD.ActiveDocument.getObject(fp.PathNameB).RawPath[0][fp.PathIndexB])
-            lp_B.append(FreeCAD.ActiveDocument.getObject(fp.PathNameB).RawPath[1][fp.PathIndexB])
+            lp_A.append(pathPoint(fp.PathNameB, 0, fp.PathIndexB))
+            lp_B.append(pathPoint(fp.PathNameB, 1, fp.PathIndexB))
         else:
-            lp_A.append(FreeCAD.ActiveDocument.getObject(fp.PathNameB).RawPath[0][fp.PathIndexB])
-            lp_B.append(FreeCAD.ActiveDocument.getObject(fp.PathNameB).RawPath[1][fp.PathIndexB])
+            lp_A.append(pathPoint(fp.PathNameB, 0, fp.PathIndexB))
+            lp_B.append(pathPoint(fp.PathNameB, 1, fp.PathIndexB))
         
         for i in range(len(lp_A)):
             if i < len(lp_A) - 1:
@@ -482,7 +591,7 @@ class InitialPath:
         obj.addProperty('App::PropertyInteger', 
                         'PathIndex', 
                         'Link Data').PathIndex = pointFromPath(sel_point, 
-                                                               selObj.Object.RawPath)
+                                                               selObj.Object)
         """
         obj.addProperty('App::PropertyFloat',
                         'CutSpeed',
@@ -515,11 +624,11 @@ class InitialPath:
         lp_A = []  # link_path_A (machine side A = lower Z)
         lp_B = []  # link_path_A (machine side A = lower Z)
         # append initial point from pathshape A
-        lp_A.append(HWS_Machine.VirtualMachineZero + FreeCAD.Vector(0, 0, FreeCAD.ActiveDocument.getObject(obj.PathName).RawPath[0][obj.PathIndex][2]))
-        lp_B.append(HWS_Machine.VirtualMachineZero + FreeCAD.Vector(0, 0, FreeCAD.ActiveDocument.getObject(obj.PathName).RawPath[1][obj.PathIndex][2]))
+        lp_A.append(HWS_Machine.VirtualMachineZero + FreeCAD.Vector(0, 0, pathPoint(obj.PathName, 0, obj.PathIndex)[2]))
+        lp_B.append(HWS_Machine.VirtualMachineZero + FreeCAD.Vector(0, 0, pathPoint(obj.PathName, 1, obj.PathIndex)[2]))
         # append destination point in pathshape A
-        lp_A.append(FreeCAD.ActiveDocument.getObject(obj.PathName).RawPath[0][obj.PathIndex])
-        lp_B.append(FreeCAD.ActiveDocument.getObject(obj.PathName).RawPath[1][obj.PathIndex])
+        lp_A.append(pathPoint(obj.PathName, 0, obj.PathIndex))
+        lp_B.append(pathPoint(obj.PathName, 1, obj.PathIndex))
         
         obj.PathALength = FreeCAD.Vector(lp_A[0]).distanceToPoint(FreeCAD.Vector(lp_A[1]))
         obj.PathBLength = FreeCAD.Vector(lp_B[1]).distanceToPoint(FreeCAD.Vector(lp_B[0]))
@@ -539,8 +648,8 @@ class InitialPath:
         lp_A_len = 0
         lp_B_len = 0
         # append initial point from pathshape A
-        lp_A.append(HWS_Machine.VirtualMachineZero + FreeCAD.Vector(0, 0, FreeCAD.ActiveDocument.getObject(fp.PathName).RawPath[0][fp.PathIndex][2]))
-        lp_B.append(HWS_Machine.VirtualMachineZero + FreeCAD.Vector(0, 0, FreeCAD.ActiveDocument.getObject(fp.PathName).RawPath[1][fp.PathIndex][2]))
+        lp_A.append(HWS_Machine.VirtualMachineZero + FreeCAD.Vector(0, 0, pathPoint(fp.PathName, 0, fp.PathIndex)[2]))
+        lp_B.append(HWS_Machine.VirtualMachineZero + FreeCAD.Vector(0, 0, pathPoint(fp.PathName, 1, fp.PathIndex)[2]))
         # append aux control points
         for i in range(5):
             aux_p = fp.getPropertyByName('ControlPoint' + str(i))
@@ -550,8 +659,8 @@ class InitialPath:
                 lp_B.append([aux_p.x, aux_p.y, lp_B[0][2]])
 
         # append destination point in pathshape A
-        lp_A.append(FreeCAD.ActiveDocument.getObject(fp.PathName).RawPath[0][fp.PathIndex])
-        lp_B.append(FreeCAD.ActiveDocument.getObject(fp.PathName).RawPath[1][fp.PathIndex])
+        lp_A.append(pathPoint(fp.PathName, 0, fp.PathIndex))
+        lp_B.append(pathPoint(fp.PathName, 1, fp.PathIndex))
 
         for i in range(len(lp_A)):
             if i < len(lp_A) - 1:
@@ -579,7 +688,7 @@ class FinalPath:
 
         obj.addProperty('App::PropertyInteger',
                         'PathIndex',
-                        'Link Data').PathIndex = pointFromPath(sel_point, selObj.Object.RawPath)
+                        'Link Data').PathIndex = pointFromPath(sel_point, selObj.Object)
         
         """
         obj.addProperty('App::PropertyFloat',
@@ -622,11 +731,11 @@ class FinalPath:
         lp_A = []  # link_path_A (machine side A = lower Z)
         lp_B = []  # link_path_A (machine side A = lower Z)
         # append initial point from pathshape A
-        lp_A.append(FreeCAD.ActiveDocument.getObject(obj.PathName).RawPath[0][obj.PathIndex])
-        lp_B.append(FreeCAD.ActiveDocument.getObject(obj.PathName).RawPath[1][obj.PathIndex])
+        lp_A.append(pathPoint(obj.PathName, 0, obj.PathIndex))
+        lp_B.append(pathPoint(obj.PathName, 1, obj.PathIndex))
         # append destination point in pathshape A
-        lp_A.append(HWS_Machine.VirtualMachineZero + FreeCAD.Vector(0, 0, FreeCAD.ActiveDocument.getObject(obj.PathName).RawPath[0][obj.PathIndex][2]))
-        lp_B.append(HWS_Machine.VirtualMachineZero + FreeCAD.Vector(0, 0, FreeCAD.ActiveDocument.getObject(obj.PathName).RawPath[1][obj.PathIndex][2]))
+        lp_A.append(HWS_Machine.VirtualMachineZero + FreeCAD.Vector(0, 0, pathPoint(obj.PathName, 0, obj.PathIndex)[2]))
+        lp_B.append(HWS_Machine.VirtualMachineZero + FreeCAD.Vector(0, 0, pathPoint(obj.PathName, 1, obj.PathIndex)[2]))
 
         obj.PathALength = FreeCAD.Vector(lp_A[0]).distanceToPoint(FreeCAD.Vector(lp_A[1]))
         obj.PathBLength = FreeCAD.Vector(lp_B[1]).distanceToPoint(FreeCAD.Vector(lp_B[0]))
@@ -646,8 +755,8 @@ class FinalPath:
         lp_A_len = 0
         lp_B_len = 0
         # append initial point from pathshape A
-        lp_A.append(FreeCAD.ActiveDocument.getObject(fp.PathName).RawPath[0][fp.PathIndex])
-        lp_B.append(FreeCAD.ActiveDocument.getObject(fp.PathName).RawPath[1][fp.PathIndex])
+        lp_A.append(pathPoint(fp.PathName, 0, fp.PathIndex))
+        lp_B.append(pathPoint(fp.PathName, 1, fp.PathIndex))
         # append aux control points
         for i in range(5):
             aux_p = fp.getPropertyByName('ControlPoint' + str(i))
@@ -677,332 +786,268 @@ class FinalPathViewProvider:
     def __init__(self, obj):
         obj.Proxy = self
 
-def explore_lnk(dest_obj_name, prev_used_lnk, G93, len_pr_A = 0): 
-    n = 0
-    
-    #i_next = 0
-    add_last_point = False
-    used_links = []
-    ex_A = []
-    ex_B = []
-    rc = []
-    #exit_rc = []
-    HWS_M = FreeCAD.ActiveDocument.HWS_Machine
-    #link = False
-    
-
-    #print("len pr_A",len_pr_A)
-
-    used_links.extend(prev_used_lnk)
-
-    #add destination firstPath from obj_name
-    thisLink = FreeCAD.ActiveDocument.getObject(dest_obj_name)
-    #firstPath temperature and speed commands
-    
-
-    
-    #print(thisLink.Length)
-    rc.append([len(ex_A) + len_pr_A, 
-               None, #thisLink.CutSpeed, 
-               None, #thisLink.WireTemperature, 
-               thisLink.Name, 
-               [thisLink.PathALength, thisLink.PathBLength]])
-
-    for i in range(5):
-        aux_p = thisLink.getPropertyByName('ControlPoint' + str(i))
-        if (aux_p.x > 0 or aux_p.y > 0) and aux_p.z == 0:
-            # draw aux point if it has been modified
-            ex_A.append((aux_p.x, aux_p.y, 0))
-            ex_B.append((aux_p.x, aux_p.y, HWS_M.ZLength))
-            rc.append([len(ex_A) + len_pr_A, 
-                       None, #thisLink.CutSpeed, 
-                       None, #thisLink.WireTemperature, 
-                       thisLink.Name, 
-                       [thisLink.PathALength, thisLink.PathBLength]])
-
-    
-    #fix pathname, store name not label
-    #add destination firstPath from obj_name
-    try:
-        thisPath = FreeCAD.ActiveDocument.getObject(thisLink.PathName)
-    except:
-        thisPath = FreeCAD.ActiveDocument.getObject(thisLink.PathNameB)  #redo wiregroup parts
-    
-
-    #detect if firstPath have links to innerparts and do them first
-    #then detect if firstPath have links to other object
-    
-    def is_link_used(lnk_name):
-        for LN in used_links:
-            if LN == lnk_name:
-                return True
-        return False
-
-    try:
-        pI = thisLink.PathIndex
-    except:
-        pI = thisLink.PathIndexB
-
-    pI_passes = 0
-    num_link_at_pI = 0
 
-    
-
-    for obj in FreeCAD.ActiveDocument.findObjects('Part::FeaturePython','Link_'):
-        if obj.PathIndexA == pI:
-            num_link_at_pI += 1
-    #print("\nnumber of links from point", pI, " is ", num_link_at_pI) 
-
-    #print("length of path: ",len(thisPath.RawPath[0]))
-        
-    current_path_points_left = len(thisPath.RawPath[0])
-        
-    for i in range(len(thisPath.RawPath[0])):
-        #start at point firstPath of where initialpath ends
-        n = i + pI
-
-        #if firstPath is out of points break out and exit to finalpath
-
-        #do not exit from current obj until on last point
-        #
-
-
-        if n >= len(thisPath.RawPath[0]):
-            n = i + 1 + pI - len(thisPath.RawPath[0])
-
-
-
-        #detect if link is on last point to be able to follow through to next object
-        #print("point: ",n)
-        #print("index of points ", i)
-        #print("number of ponts", len(thisPath.RawPath[0]))
-        
-         
-
-        if n == pI:
-            pI_passes += 1
-        
-        #print('\n')
-        #input("Press Enter to continue...\n")
-
-        #print("current_path_points_left: ",current_path_points_left)
-        
-
-
-        """
-        if(n == pI):
-            print(num_link_at_pI, ' links at point: ', n)
-            print(pI_passes - 1, ' passes of point')
+def pathSelection(path_obj, index):
+    # selection like (.Object) of a path and its point at index, as the
+    # LinkPath, InitialPath and FinalPath constructors take them
+    return types.SimpleNamespace(Object=path_obj), FreeCAD.Vector(*pathPoint(path_obj.Name, 0, index))
+
+
+def addLinkPath(path_A, index_A, path_B, index_B):
+    # link from point index_A of path_A to point index_B of path_B, named as
+    # the links of the Link Path command
+    selA, point_A = pathSelection(path_A, index_A)
+    selB, point_B = pathSelection(path_B, index_B)
+    link_name = 'Link_' + path_A.Label[10:] + '_' + path_B.Label[10:]
+    link_obj = FreeCAD.ActiveDocument.addObject('Part::FeaturePython', link_name)
+    LinkPath(link_obj, selA, selB, [point_A, point_B])
+    # closed paths have their first point twice, keep the planned index
+    link_obj.PathIndexA = index_A
+    link_obj.PathIndexB = index_B
+    if FreeCAD.GuiUp:
+        LinkPathViewProvider(link_obj.ViewObject)
+        link_obj.ViewObject.Transparency = 15
+        link_obj.ViewObject.DisplayMode = "Shaded"
+    FreeCAD.ActiveDocument.WirePath.addObject(link_obj)
+    return link_obj
+
+
+def setInitialPath(path_obj, index):
+    # moves the InitialPath to point index of path_obj, creates it if needed
+    initial_obj = FreeCAD.ActiveDocument.getObject('InitialPath')
+    if initial_obj == None:
+        sel, point = pathSelection(path_obj, index)
+        initial_obj = FreeCAD.ActiveDocument.addObject('Part::FeaturePython', 'InitialPath')
+        InitialPath(initial_obj, sel, point)
+        if FreeCAD.GuiUp:
+            InitialPathViewProvider(initial_obj.ViewObject)
+            # initial trajectory is red
+            initial_obj.ViewObject.ShapeColor = (1.0, 0.0, 0.0)
+            initial_obj.ViewObject.Transparency = 15
+            initial_obj.ViewObject.DisplayMode = 'Shaded'
+        FreeCAD.ActiveDocument.WirePath.addObject(initial_obj)
+    initial_obj.PathName = path_obj.Name
+    initial_obj.PathIndex = index
+    initial_obj.touch()
+    return initial_obj
+
+
+def setFinalPath(path_obj, index):
+    # moves the FinalPath to point index of path_obj, creates it if needed
+    final_obj = FreeCAD.ActiveDocument.getObject('FinalPath')
+    if final_obj == None:
+        sel, point = pathSelection(path_obj, index)
+        final_obj = FreeCAD.ActiveDocument.addObject('Part::FeaturePython', 'FinalPath')
+        FinalPath(final_obj, sel, point)
+        if FreeCAD.GuiUp:
+            FinalPathViewProvider(final_obj.ViewObject)
+            final_obj.ViewObject.ShapeColor = (1.0, 1.0, 1.0)
+            final_obj.ViewObject.Transparency = 15
+            final_obj.ViewObject.DisplayMode = 'Shaded'
+        FreeCAD.ActiveDocument.WirePath.addObject(final_obj)
+    final_obj.PathName = path_obj.Name
+    final_obj.PathIndex = index
+    final_obj.touch()
+    return final_obj
+
+
+@HWS_Profile.profiled('plan cut order')
+def planCutOrder():
+    # orders all ShapePath objects of the WirePath folder for the shortest
+    # travel (hws_core.ordering) and replaces the links by the planned route:
+    # InitialPath to the first part, a link from every part to the next one at
+    # its entry point and FinalPath from the last part. The inner parts of a
+    # ShapePath get a link from its entry point so they are cut before it.
+    # Control points of InitialPath and FinalPath are kept, old links removed.
+    # Returns (ShapePath objects in cut order, planned travel)
+    doc = FreeCAD.ActiveDocument
+    HWS_M = doc.HWS_Machine
+    group = doc.WirePath.Group
+    outer = [obj for obj in group if isinstance(getattr(obj, 'Proxy', None), ShapePath)]
+    inner = [obj for obj in group if isinstance(getattr(obj, 'Proxy', None), InnerPath)]
+    holes = [[obj for obj in inner if obj.ShapeName == path_obj.ShapeName] for path_obj in outer]
+    if not outer:
+        FreeCAD.Console.PrintMessage('No paths to order, route the shapes first\n')
+        return [], 0.0
+
+    zero = HWS_M.VirtualMachineZero
+    start = [[zero.x, zero.y, zero.z], [zero.x, zero.y, zero.z + HWS_M.ZLength]]
+    order, entries, hole_entries, cost = HWS_Ordering.planCutOrder(
+        [getRawPath(obj).points for obj in outer], start,
+        holes=[[getRawPath(obj).points for obj in part_holes] for part_holes in holes])
+
+    for obj in group:
+        if isinstance(getattr(obj, 'Proxy', None), LinkPath):
+            doc.removeObject(obj.Name)
+
+    # links are followed in document order, the inner parts first
+    for k in order:
+        for hole, hole_entry in zip(holes[k], hole_entries[k]):
+            addLinkPath(outer[k], entries[k], hole, hole_entry)
+    for i in range(len(order) - 1):
+        addLinkPath(outer[order[i]], entries[order[i]], outer[order[i + 1]], entries[order[i + 1]])
+    setInitialPath(outer[order[0]], entries[order[0]])
+    setFinalPath(outer[order[-1]], entries[order[-1]])
+    return [outer[k] for k in order], cost
+
+def linkAdjacency():
+    # links leaving every path, found once per trace instead of once per point:
+    # links to inner parts by (path name, point index) and links to other
+    # objects by path name, with their position in the document so links can
+    # be followed in the same order as findObjects returns them
+    inner_links = {}
+    exit_links = {}
+    for order, obj in enumerate(FreeCAD.ActiveDocument.findObjects('Part::FeaturePython','Link_')):
+        link_lable_split = obj.Label.split("_")
+
+        if len(link_lable_split) > 4:
+            name_to_dest = link_lable_split[3]
         else:
-            print(n)   
-            print(pI_passes - 1, ' passes of point')
-        """
-        
-
-        """
-        if n == pI:
-            print('at path start:',pI)    
-        
-        #print('at last point')
-
-        print("at shape: ", thisPath.Name)
-        print("used links: ", used_links)
-        """
-
-        #    add_last_point = True
-        """
-        
-        print("last link: ", used_links[len(used_links) - 1])
-        print("links to path:", thisPath.Name)
-        print("link to check if to follow: ", obj.Name)
-        """
-
-        for obj in FreeCAD.ActiveDocument.findObjects('Part::FeaturePython','Link_'):
-            
-            #if is_link_used(obj.Name):
-            #    continue
-            
-            link_lable_split = obj.Label.split("_")
-
-            if len(link_lable_split) > 4:
-                name_to_dest = link_lable_split[3]
-            else:
-                name_to_dest = link_lable_split[2]
+            name_to_dest = link_lable_split[2]
 
+        try:
+            path_A = FreeCAD.ActiveDocument.getObject(obj.PathNameA)
+            links_to_inner_part = len(link_lable_split) > 3 and name_to_dest == path_A.ShapeName
+        except:
             links_to_inner_part = False
 
-            #print('checking link: ',obj.Name)
-            
+        if links_to_inner_part:
+            inner_links.setdefault((obj.PathNameA, obj.PathIndexA), []).append((order, obj, True))
+        else:
+            exit_links.setdefault(obj.PathNameA, []).append((order, obj, False))
 
+    return inner_links, exit_links
 
-            try:
-                if len(link_lable_split) > 3 and name_to_dest == thisPath.ShapeName:
-                    links_to_inner_part = True
-                    #print(obj.Name, ' links to inner part')
-                else:
-                    links_to_inner_part = False
-                    #print('at link: ',obj.Name)
-            except:
-                links_to_inner_part = False
-
-            if obj.PathIndexA == n and current_path_points_left >= 1 and links_to_inner_part and obj.PathNameA ==  thisPath.Name and not(is_link_used(obj.Name)):
-                #print("go to inner part")
-                #print(obj.PathIndexA)
-                #print('enter point:', obj.PathIndexA,' current point:', n)
-                ex_A.append(thisPath.RawPath[0][n])
-                ex_B.append(thisPath.RawPath[1][n])
-                
-                used_links.append(obj.Name)
-                used_links, ex_ln_A, ex_ln_B, ex_rc = explore_lnk(obj.Name, used_links, G93, len(ex_A) + len_pr_A)
-                            
-                ex_A.extend(ex_ln_A)
-                ex_B.extend(ex_ln_B)
-                rc.extend(ex_rc)
-                rc[len(rc) - 1] = [len(ex_A) + len_pr_A, 
-                                   None, #obj.CutSpeed, 
-                                   None, #obj.WireTemperature, 
-                                   obj.Name, 
-                                   [obj.PathALength, obj.PathBLength]]
-                 
-
-            elif current_path_points_left <= 1 and not(links_to_inner_part) and obj.PathNameA ==  thisPath.Name and not(is_link_used(obj.Name)):
-                #print('go to next part')
-                ex_A.append(thisPath.RawPath[0][n])
-                ex_B.append(thisPath.RawPath[1][n])
-
-                used_links.append(obj.Name)
-                used_links, ex_ln_A, ex_ln_B, ex_rc = explore_lnk(obj.Name, used_links, G93, len(ex_A) + len_pr_A)
-                ex_A.extend(ex_ln_A)
-                ex_B.extend(ex_ln_B)
-                rc.extend(ex_rc)
-                
-                
-                #print(len(rc))
-            
-            
-
-            """
-            add_last_point = False
-            
-            if not(is_link_used(obj.Name)) and not(links_to_inner_part) and n == obj.PathIndexA and pI_passes >= num_link_at_pI:
-                add_last_point = True
-                #              
-                #print(n, "link name: ",obj.Name)
-                #print(used_links)
-                #print("is link used :",is_link_used(obj.Name))
-                #print("number of used links: ", len(used_links))
-                #print("number of links att current point: ", num_link_at_pI)
-                #print("number off passes of point", n, pI_passes)
 
-                
-                #print("current shape/link: ",thisPath.Label)
-                #print("links from: ", obj.PathNameA)
-                #print("Current point nr.:", n)
-                #print("is last point: ", add_last_point)
-                #print("current point vector: ", thisPath.RawPath[1][n])
-                #print("links from point nr.: ",obj.PathIndexA)
-                
-                
-                #print("used links:")
-                #print(used_links)
-                #print(" ")
-                #
-            
-            
+@HWS_Profile.profiled('explore_lnk')
+def explore_lnk(dest_obj_name, prev_used_lnk, G93, len_pr_A = 0):
+    # walks the route from link (or InitialPath) dest_obj_name: every path is
+    # followed from the point its link ends at, once around. Links to inner
+    # parts are followed when their start point is reached, links to other
+    # objects at the last point. The walk uses a stack of paths instead of
+    # recursion, every stack entry is one path being followed
+    HWS_M = FreeCAD.ActiveDocument.HWS_Machine
+    inner_links, exit_links = linkAdjacency()
+    used_links = list(prev_used_lnk)
+    used = set(used_links)
+    ex_A = []
+    ex_B = []
+    rc = []
+    stack = []
+
+    def enter(link_name):
+        #add destination firstPath from obj_name
+        thisLink = FreeCAD.ActiveDocument.getObject(link_name)
+        #firstPath temperature and speed commands
+        rc.append([len(ex_A) + len_pr_A, 
+                   None, #thisLink.CutSpeed, 
+                   None, #thisLink.WireTemperature, 
+                   thisLink.Name, 
+                   [thisLink.PathALength, thisLink.PathBLength]])
 
-            if links_to_inner_part and obj.PathIndexA == n and obj.PathNameA ==  thisPath.Name and not(is_link_used(obj.Name)):
-                #innerpart temperature and speed commands
-                print('is folowing to inner part')
-                ex_A.append(thisPath.RawPath[0][n])
-                ex_B.append(thisPath.RawPath[1][n])
-                #print("inner part",obj.Label)
-                #rc.append([len(ex_A), thisPath.CutSpeed, thisPath.WireTemperature])
-                
-                used_links.append(obj.Name)
-                #print("into inner part explore_lnk", obj.Label)
-                #print("first point: ",ex_B[len(ex_B) - 1])
-                used_links, ex_ln_A, ex_ln_B, ex_rc = explore_lnk(obj.Name, used_links, G93, len(ex_A) + len_pr_A)
-                #print("out from inner part explore_lnk", obj.Label)
-                #
-                #print("last point: ",ex_ln_B[len(ex_ln_B) - 1])
-                #print("current pathName:", thisPath.Label)
-                #print("current linkName:", obj.Label)
-                            
-                ex_A.extend(ex_ln_A)
-                ex_B.extend(ex_ln_B)
-                rc.extend(ex_rc)
-                #print(rc[len(rc) - 1])
-                rc[len(rc) - 1] = [len(ex_A) + len_pr_A, 
-                                   None, #obj.CutSpeed, 
-                                   None, #obj.WireTemperature, 
-                                   obj.Name, 
-                                   [obj.PathALength, obj.PathBLength]]   
-
-            elif not(links_to_inner_part) and add_last_point and obj.PathIndexA == n and obj.PathNameA ==  thisPath.Name and not(is_link_used(obj.Name)):
-                # obj temperature and speed commands
-                print('is folowing to new path')
-                ex_A.append(thisPath.RawPath[0][n])
-                ex_B.append(thisPath.RawPath[1][n])
-                #print("object: ",obj.Label)
-                #print("last point", thisPath.Label,len(ex_A) + len_pr_A)
-                #rc.append([len(ex_A) + len_pr_A, thisPath.CutSpeed, thisPath.WireTemperature])
-
-                used_links.append(obj.Name)
-                #print("into obj part explore_lnk", obj.Label)
-                #print("first point: ",ex_B[len(ex_B) - 1])
-                used_links, ex_ln_A, ex_ln_B, ex_rc = explore_lnk(obj.Name, used_links, G93, len(ex_A) + len_pr_A)
-                #print("out obj part explore_lnk", obj.Label)
-                #print("last point: ",ex_ln_B[len(ex_ln_B) - 1])
-                #print("current pathName:", thisPath.Name)
-                #print("current linkName:", obj.Label)
-                ex_A.extend(ex_ln_A)
-                ex_B.extend(ex_ln_B)
-                rc.extend(ex_rc)
-
-                #exit_rc = [len(ex_A) + len_pr_A, 
-                #           obj.CutSpeed, 
-                #           obj.WireTemperature, 
-                #           obj.Name, 
-                #           [obj.PathALength, obj.PathBLength]]   
-
-            """ 
-        
-        #print(i, n, current_path_points_left, current_path_points_left)
+        for i in range(5):
+            aux_p = thisLink.getPropertyByName('ControlPoint' + str(i))
+            if (aux_p.x > 0 or aux_p.y > 0) and aux_p.z == 0:
+                # draw aux point if it has been modified
+                ex_A.append((aux_p.x, aux_p.y, 0))
+                ex_B.append((aux_p.x, aux_p.y, HWS_M.ZLength))
+                rc.append([len(ex_A) + len_pr_A, 
+                           None, #thisLink.CutSpeed, 
+                           None, #thisLink.WireTemperature, 
+                           thisLink.Name, 
+                           [thisLink.PathALength, thisLink.PathBLength]])
+
+        #fix pathname, store name not label
+        try:
+            thisPath = FreeCAD.ActiveDocument.getObject(thisLink.PathName)
+        except:
+            thisPath = FreeCAD.ActiveDocument.getObject(thisLink.PathNameB)  #redo wiregroup parts
 
-        if i == len(thisPath.RawPath[0]) and dest_obj_name == "InitialPath":
-            pass
-        else:
-            #print('adding last point')
-            #TODO: when add last point of shape use thisLink instead
-            
-            #if not(add_last_point):# and (len(ex_A) + len_pr_A) < len(thisPath.RawPath[0]):
-            
-            
-                
-            
-            ex_A.append(thisPath.RawPath[0][n])
-            ex_B.append(thisPath.RawPath[1][n])
-            
-            rc.append([len(ex_A) + len_pr_A, 
-                        None, #thisPath.CutSpeed, 
-                        None, #thisPath.WireTemperature, 
-                        thisPath.Name, 
-                        [thisPath.PathALength, thisPath.PathBLength]])
-                
-                #if len(rc) > 0 and rc[len(rc) - 1][3] != rc[len(rc) - 2][3]:
-                #    print("going back to shape, use link properties from link")
-                #    print("got to:",rc[len(rc) - 1][3])
-                #    print("go to point:", ex_B[len(ex_B) - 1])
-                    #print("exit rc command:",exit_rc)
-            
-                
+        try:
+            pI = thisLink.PathIndex
+        except:
+            pI = thisLink.PathIndexB
+
+        stack.append({'path': thisPath,
+                      'raw': getRawPath(thisPath),
+                      'pI': pI,
+                      'i': 0,
+                      'n': 0,
+                      'links': None,
+                      'next_link': 0,
+                      'inner_link': None})
+
+    enter(dest_obj_name)
+
+    while stack:
+        frame = stack[-1]
+        thisPath = frame['path']
+        thisRaw = frame['raw']
+
+        if frame['links'] is None:
+            i = frame['i']
+            if i == thisRaw.count:
+                # path done, back to the path the link was followed from
+                stack.pop()
+                if stack and stack[-1]['inner_link'] is not None:
+                    obj = stack[-1]['inner_link']
+                    rc[len(rc) - 1] = [len(ex_A) + len_pr_A, 
+                                       None, #obj.CutSpeed, 
+                                       None, #obj.WireTemperature, 
+                                       obj.Name, 
+                                       [obj.PathALength, obj.PathBLength]]
+                    stack[-1]['inner_link'] = None
+                continue
+
+            #start at point firstPath of where initialpath ends
+            n = i + frame['pI']
+            if n >= thisRaw.count:
+                n = i + 1 + frame['pI'] - thisRaw.count
+            frame['n'] = n
+
+            #do not exit from current obj until on last point
+            links = inner_links.get((thisPath.Name, n), [])
+            current_path_points_left = thisRaw.count - i
+            if current_path_points_left <= 1:
+                links = sorted(links + exit_links.get(thisPath.Name, []), key=lambda l: l[0])
+            frame['links'] = links
+            frame['next_link'] = 0
+
+        n = frame['n']
+        if frame['next_link'] < len(frame['links']):
+            order, obj, links_to_inner_part = frame['links'][frame['next_link']]
+            frame['next_link'] += 1
+            if obj.Name in used:
+                continue
+
+            # inner part or next part
+            ex_A.append(thisRaw.points[n, 0])
+            ex_B.append(thisRaw.points[n, 1])
+            used_links.append(obj.Name)
+            used.add(obj.Name)
+            if links_to_inner_part:
+                # the route returns from the inner part through this link
+                frame['inner_link'] = obj
+            enter(obj.Name)
+            continue
+
+        #TODO: when add last point of shape use thisLink instead
+        ex_A.append(thisRaw.points[n, 0])
+        ex_B.append(thisRaw.points[n, 1])
+
+        rc.append([len(ex_A) + len_pr_A, 
+                    None, #thisPath.CutSpeed, 
+                    None, #thisPath.WireTemperature, 
+                    thisPath.Name, 
+                    [thisPath.PathALength, thisPath.PathBLength]])
+
+        frame['i'] += 1
+        frame['links'] = None
 
-        current_path_points_left -= 1
-        #print('\n')
-        
     return [used_links, ex_A, ex_B, rc]
 
 
+@HWS_Profile.profiled('trace route')
 def traceObjectsAndLinksForRawPath(G93 = False):
     HWS_M = FreeCAD.ActiveDocument.HWS_Machine
     pr_A = []  # partial route A
@@ -1069,10 +1114,23 @@ def traceObjectsAndLinksForRawPath(G93 = False):
     pr_A.append([HWS_M.VirtualMachineZero.x, HWS_M.VirtualMachineZero.y, HWS_M.VirtualMachineZero.z])
     pr_B.append([HWS_M.VirtualMachineZero.x, HWS_M.VirtualMachineZero.y, HWS_M.VirtualMachineZero.z + HWS_M.ZLength])
 
-    complete_raw_path = (pr_A, pr_B, route_commands)
+    # complete route as one array, route_commands are kept on the route
+    complete_raw_path = HWS_RawPath.RawPath.fromSides(pr_A, pr_B, commands=route_commands)
+    complete_raw_path.owners = HWS_RawPath.commandsToOwners(route_commands)
+
+    # drop points both sides can lose (straight runs, merged short lines), side
+    # A and B keep the same points and route_commands are remapped
+    tolerance = getattr(HWS_M, 'SimplifyTolerance', 0.0)
+    if tolerance > 0:
+        with HWS_Profile.span('simplify', complete_raw_path.count):
+            complete_raw_path = complete_raw_path.simplified(tolerance)
+        HWS_Profile.count('route points', complete_raw_path.count)
     return complete_raw_path
 
-def addKerf2Faces(points, sel_obj, inner_part_index, foam_type=None, inner_part=False):
+@HWS_Profile.profiled('kerf (addKerf2Faces)')
+def addKerf2Faces(points, foam_type=None, inner_part=False, inverse_kerf=False):
+    # offsets the side A and B polygons of the discretized faces by the kerf of
+    # foam_type, returns the offset points and the [A, B] lengths of the profile
     #print(foam_type)
     if foam_type == None:
         foam_type = ["Default", 1.6, 4.0, 1.9, 75] #[0, 'EXP Wire 0.5', True, [4.5, 20], [2, 20], 0.6, 0.8]
@@ -1090,14 +1148,14 @@ def addKerf2Faces(points, sel_obj, inner_part_index, foam_type=None, inner_part=
 
     for p_i in range(len(points)):
         for i in range(len(points[p_i][0])):  # 0 = side A, 1 = side B            
-            w_list0.append(points[p_i][0][i])
-            w_list1.append(points[p_i][1][i])
+            w_list0.append(tuple(points[p_i][0][i]))
+            w_list1.append(tuple(points[p_i][1][i]))
 
-    wire0 = Part.makePolygon(w_list0)
-    wire1 = Part.makePolygon(w_list1)
+    wire0 = np.array(w_list0, dtype=float)
+    wire1 = np.array(w_list1, dtype=float)
 
-    length1 = wire0.Length
-    length2 = wire1.Length
+    length1 = float(HWS_RawPath.polylineLengths(wire0).sum())
+    length2 = float(HWS_RawPath.polylineLengths(wire1).sum())
     
     
 
@@ -1154,41 +1212,13 @@ def addKerf2Faces(points, sel_obj, inner_part_index, foam_type=None, inner_part=
     #print(tip_kerf)
 
     
-    inner_paths_AB = []
-
-    if not(inner_part):
-        current_obj = FreeCAD.ActiveDocument.getObjectsByLabel("ShapePath_"+sel_obj.Name)[0]
-        current_obj.PathALength = length1
-        current_obj.PathBLength = length2
-        inner_paths_AB = None
-    else:
-        
-        #TODO:add profile A and B lengths to inner parts
-        #inner parts not added until later
-        #pass A and B length to when inner parts are added?
-        #maybe store innerparts profile lengths i outer part?
-
-        #print("ShapePath_"+sel_obj.Name+"_"+str(inner_part_index - 1))
-        #current_obj = FreeCAD.ActiveDocument.getObjectsByLabel("ShapePath_"+sel_obj.Name+"_"+str(inner_part_index - 1))[0]
-        inner_paths_AB = [length1,length2]
-        #print("PathA length= ",length1)
-        #current_obj.PathALength = length1
-        #print("PathB length= ",length2)
-        #current_obj.PathBLength = length2
-
-    
+    # profile lengths, set on the path objects by the caller
+    inner_paths_AB = [length1,length2]
 
-    #makeoffset2d settings
-    join = 2
-    join_on_fail = 1
-    fill = False
-    openResult = False
-    intersection = False
     
-    #print(FreeCAD.ActiveDocument.getObjectsByLabel("ShapePath_"+sel_obj.Name)[0].InverseKerf)
 
     #add kerf negative to inner part
-    if inner_part or FreeCAD.ActiveDocument.getObjectsByLabel("ShapePath_"+sel_obj.Name)[0].InverseKerf:
+    if inner_part or inverse_kerf:
         root_kerf = kerf_one * -1
         tip_kerf = tip_kerf * -1
     else:
@@ -1199,48 +1229,259 @@ def addKerf2Faces(points, sel_obj, inner_part_index, foam_type=None, inner_part=
     #print('length1:', length1)
     #print('length2:', length2)
 
-    try:                        
-        if length1 > length2:
-            offset2d_face0 = wire0.makeOffset2D(root_kerf,join,fill,openResult,intersection) # root
-            offset2d_face1 = wire1.makeOffset2D(tip_kerf,join,fill,openResult,intersection) # tip
-        elif length2 > length1:
-            offset2d_face0 = wire0.makeOffset2D(tip_kerf,join,fill,openResult,intersection) # tip
-            offset2d_face1 = wire1.makeOffset2D(root_kerf,join,fill,openResult,intersection) # root
+    # both sides are offset together with one point for every input point
+    # (near duplicates and the closing point merged), the last edge closes it
+    if length1 > length2:
+        offset0, offset1 = HWS_Offset.offsetSides(wire0, wire1, root_kerf, tip_kerf) # root, tip
+    elif length2 > length1:
+        offset0, offset1 = HWS_Offset.offsetSides(wire0, wire1, tip_kerf, root_kerf) # tip, root
+    else:
+        offset0, offset1 = HWS_Offset.offsetSides(wire0, wire1, root_kerf, root_kerf) # go fast as root on both with same kerf
+
+    # one edge [[A start, A end], [B start, B end]] per offset segment
+    kerf_points = []
+    count = len(offset0)
+    for i in range(count):
+        j = (i + 1) % count
+        kerf_points.append([[FreeCAD.Vector(*offset0[i]), FreeCAD.Vector(*offset0[j])],
+                            [FreeCAD.Vector(*offset1[i]), FreeCAD.Vector(*offset1[j])]])
+  
+    return kerf_points, inner_paths_AB
+
+# results of the two stages of ShapeToHWSPath
+# faces stage: discretized faces, keyed by shape geometry, density and reverse
+# kerf stage: kerf offset paths, keyed by the faces key, kerf and InverseKerf
+faces_cache = HWS_Cache.LRUCache(32)
+kerf_cache = HWS_Cache.LRUCache(64)
+
+
+def ShapeToHWSPath(selected_object, precision, reverse=False, foam=None, inverse_kerf=False, chord_tolerance=0.0):
+
+    # Creates the wire path for an input shape. Returns the RawPath of every
+    # part of the shape (outer part first) and their [A, B] profile lengths
+    # precision -> distance between discrete points of the trajectory (mm/point)
+    # chord_tolerance -> if > 0 curves are sampled adaptively instead, so the
+    #                    path is never further than this from them (mm)
+    # foam -> foam config used for the kerf, default the foam of the WirePath
+    # Both stages are cached so recomputing an unchanged shape (or only
+    # changing the foam) does not rebuild the faces
+    if foam == None:
+        foam_cfg = FreeCAD.ActiveDocument.HWS_Machine.FoamConfig
+        foam_index = FreeCAD.ActiveDocument.WirePath.FoamIndex
+        foam = json.JSONDecoder().decode(foam_cfg[foam_index])
+
+    faces_key, kerf_key = pathCacheKeys(HWS_Cache.shapeHash(selected_object.Shape), precision, reverse,
+                                        chord_tolerance, foam, inverse_kerf)
+    paths = kerf_cache.get(kerf_key)
+    if paths == None:
+        HWS_Profile.count('kerf cache miss')
+        parts = faces_cache.get(faces_key)
+        if parts == None:
+            HWS_Profile.count('faces cache miss')
+            parts = shapeToFaceTrajectories(selected_object, precision, reverse, chord_tolerance)
+            faces_cache.put(faces_key, parts)
+        paths = [trajectoryToHWSPath(trajectory, foam, is_inner_part, inverse_kerf)
+                 for trajectory, is_inner_part in parts]
+        kerf_cache.put(kerf_key, paths)
+    else:
+        HWS_Profile.count('kerf cache hit')
+
+    # the cached paths are shared, hand out copies
+    wirepath_return = [HWS_RawPath.RawPath(wpa.points.copy()) for wpa, lpa in paths]
+    inner_part_AB_length = [list(lpa) for wpa, lpa in paths]
+    return wirepath_return, inner_part_AB_length
+
+
+def pathCacheKeys(shape_hash, precision, reverse, chord_tolerance, foam, inverse_kerf):
+    # keys of the faces and the kerf stage of ShapeToHWSPath
+    faces_key = (shape_hash, float(precision), bool(reverse), float(chord_tolerance))
+    kerf_key = faces_key + (float(foam[1]), float(foam[3]), bool(inverse_kerf))
+    return faces_key, kerf_key
+
+
+def routeShapeWorker(job):
+    # worker of routeShapes, runs both stages of ShapeToHWSPath on a shape
+    # sent as BREP string. Returns ['ok', [[points, [A, B length]], ...]] or
+    # ['error', traceback], never raises so one shape does not stop the batch
+    brep, precision, reverse, chord_tolerance, foam, inverse_kerf = job
+    try:
+        shape = Part.Shape()
+        shape.importBrepFromString(brep)
+        parts = shapeToFaceTrajectories(types.SimpleNamespace(Shape=shape), precision, reverse, chord_tolerance)
+        paths = [trajectoryToHWSPath(trajectory, foam, is_inner_part, inverse_kerf)
+                 for trajectory, is_inner_part in parts]
+        return ['ok', [[wpa.points, list(lpa)] for wpa, lpa in paths]]
+    except Exception:
+        return ['error', traceback.format_exc()]
+
+
+def routeWorkerPython():
+    # python interpreter for the route workers, the FreeCAD executable itself
+    # would start a new FreeCAD. None if there is none
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return sys.executable
+    for name in ('python3', 'python', 'python.exe'):
+        python = os.path.join(FreeCAD.getHomePath(), 'bin', name)
+        if os.path.isfile(python):
+            return python
+    return None
+
+
+def runRouteJobs(tasks, jobs=None):
+    # runs routeShapeWorker on every task in a pool of worker processes, in
+    # this process if there is only one task or no pool can be started
+    python = routeWorkerPython()
+    if len(tasks) > 1 and jobs != 1 and python:
+        try:
+            # spawn: FreeCAD is not fork safe, every worker imports its own
+            ctx = multiprocessing.get_context('spawn')
+            ctx.set_executable(python)
+            extra_paths = [os.path.join(FreeCAD.getHomePath(), 'lib'), os.path.dirname(os.path.abspath(__file__))]
+            with ctx.Pool(processes=min(jobs or os.cpu_count() or 1, len(tasks)),
+                          initializer=HWS_Workers.initWorker,
+                          initargs=(extra_paths,)) as pool:
+                return pool.map(routeShapeWorker, tasks, chunksize=1)
+        except Exception as e:
+            FreeCAD.Console.PrintMessage('Route workers could not be started (' + str(e) + '), routing in FreeCAD\n')
+    return [routeShapeWorker(t) for t in tasks]
+
+
+@HWS_Profile.profiled('route workers')
+def routeShapes(path_objs, jobs=None):
+    # computes the paths of new ShapePath objects (created with route=False)
+    # in parallel. Results go to the kerf cache, so the following recompute of
+    # the objects is a lookup. Returns [paths, lengths] or the error text of
+    # every object
+    foam_cfg = FreeCAD.ActiveDocument.HWS_Machine.FoamConfig
+    foam_index = FreeCAD.ActiveDocument.WirePath.FoamIndex
+    foam = json.JSONDecoder().decode(foam_cfg[foam_index])
+
+    keys = []
+    tasks = []
+    task_keys = []
+    for obj in path_objs:
+        brep = FreeCAD.ActiveDocument.getObject(obj.ShapeName).Shape.exportBrepToString()
+        faces_key, kerf_key = pathCacheKeys(HWS_Cache.brepHash(brep), obj.PointDensity, obj.Reverse,
+                                            obj.ChordTolerance, foam, obj.InverseKerf)
+        keys.append(kerf_key)
+        if kerf_key not in kerf_cache and kerf_key not in task_keys:
+            tasks.append([brep, obj.PointDensity, obj.Reverse, obj.ChordTolerance, foam, obj.InverseKerf])
+            task_keys.append(kerf_key)
+
+    errors = {}
+    for kerf_key, (status, result) in zip(task_keys, runRouteJobs(tasks, jobs)):
+        if status == 'ok':
+            kerf_cache.put(kerf_key, [[HWS_RawPath.RawPath(points), lpa] for points, lpa in result])
         else:
-            offset2d_face0 = wire0.makeOffset2D(root_kerf,join,fill,openResult,intersection)#,join,fill,openResult,intersection) # go fast as root on both with same kerf
-            offset2d_face1 = wire1.makeOffset2D(root_kerf,join,fill,openResult,intersection)#,join,fill,openResult,intersection)
+            errors[kerf_key] = result
+
+    results = []
+    for kerf_key in keys:
+        if kerf_key in errors:
+            results.append(errors[kerf_key])
+            continue
+        paths = kerf_cache.get(kerf_key)
+        results.append([[HWS_RawPath.RawPath(wpa.points.copy()) for wpa, lpa in paths],
+                        [list(lpa) for wpa, lpa in paths]])
+    return results
+
+
+def trajectoryToHWSPath(trajectory, foam, is_inner_part, inverse_kerf=False):
+    # kerf stage of ShapeToHWSPath, offsets one part and cleans it up
+    try:
+        trajectory, part_AB_length = addKerf2Faces(trajectory, foam, is_inner_part, inverse_kerf)
     except:
+        FreeCAD.Console.PrintMessage('error when adding kerf, trying with zero kerf')
+        zero_kerf_foam = [foam[0],0,foam[2],0,foam[4]]
         try:
-            if length1 > length2:
-                offset2d_face0 = wire0.makeOffset2D(root_kerf,join_on_fail,fill,openResult,intersection) # root
-                offset2d_face1 = wire1.makeOffset2D(tip_kerf,join_on_fail,fill,openResult,intersection) # tip
-            elif length2 > length1:
-                offset2d_face0 = wire0.makeOffset2D(tip_kerf,join_on_fail,fill,openResult,intersection) # tip
-                offset2d_face1 = wire1.makeOffset2D(root_kerf,join_on_fail,fill,openResult,intersection) # root
-            else:
-                offset2d_face0 = wire0.makeOffset2D(root_kerf,join_on_fail,fill,openResult,intersection)#,join,fill,openResult,intersection) # go fast as root on both with same kerf
-                offset2d_face1 = wire1.makeOffset2D(root_kerf,join_on_fail,fill,openResult,intersection)#,join,fill,openResult,intersection)
+            trajectory, part_AB_length = addKerf2Faces(trajectory, zero_kerf_foam, is_inner_part, inverse_kerf)
+            FreeCAD.Console.PrintMessage('created path with 0 kerf')
+            FreeCAD.Console.PrintMessage('this is often caused by vertexes too close together')
         except:
-            FreeCAD.Console.PrintMessage('Error, Check for vertexes too close to each other!')
-            return
-     
-    kerf_points = []
+            FreeCAD.Console.PrintMessage('error, can\'t create path')
 
-    for i in range(len(offset2d_face0.Edges)):
-        kerf0_points = []
-        kerf1_points = []
-        for v_i in range(len(offset2d_face0.Edges[i].Vertexes)):
-            kerf0_points.append(offset2d_face0.Edges[i].Vertexes[v_i].Point)
-            kerf1_points.append(offset2d_face1.Edges[i].Vertexes[v_i].Point)
-        kerf_points.append([kerf0_points, kerf1_points])
-  
-    return kerf_points, inner_paths_AB
+    
+    # ------------------------------------------------------------------------ 3
+    # trajectory structure
+    # trajectory [ faces ] [ sideA, sideB ], [TrajectoryPoints (min of 2) ], [X,Y,Z]
+    # -> clean trajectory list from repeated elements:
+    clean_list_A = []
+    clean_list_B = []
+    for pt in trajectory:
+        for i in range( len( pt[0] ) -1):
+            PA_0 = pt[0][i]
+            PA_1 = pt[0][i+1]
+            #print(PA_0, " - ",PA_1)
+            if (PA_0 - PA_1).Length > 0.001:
+                clean_list_A.append( pt[0][i] )
+                clean_list_B.append( pt[1][i] )
+            else:
+                pass
+    clt = [ clean_list_A, clean_list_B ] # clt -> clean trajectory
+    
+    # -> store trajectory as one (N, 2, 3) array, first point closes the path
+    wirepath = HWS_RawPath.RawPath.fromSides(clt[0] + clt[0][:1], clt[1] + clt[1][:1])
+    # check that sideA  has the lower z value:
+    if wirepath.points[0, 0, 2] > wirepath.points[0, 1, 2]:
+        wirepath = HWS_RawPath.RawPath(wirepath.points[:, ::-1])
+
+    return wirepath, part_AB_length
+
+
+def edgePointAtFraction(edge, reverse, t):
+    # point at fraction t of the length of edge, measured from its end if reverse
+    if reverse:
+        t = 1.0 - t
+    return edge.valueAt(edge.getParameterByLength(min(max(t, 0.0), 1.0) * edge.Length))
+
+
+def chordDeviation(p, a, b):
+    # distance from p to the chord a-b
+    ab = b - a
+    ab_2 = ab.dot(ab)
+    if ab_2 == 0:
+        return (p - a).Length
+    t = min(max((p - a).dot(ab) / ab_2, 0.0), 1.0)
+    return (a + ab * t - p).Length
+
+
+def adaptiveDiscretize(tr_edges, tolerance, max_depth=12):
+    # samples the edges [[edge, reverse], ...] at the same length fractions,
+    # a span is split until the chord of every edge is within tolerance of it
+    # (checked at 1/4, 1/2 and 3/4 of the span). Returns the points of every
+    # edge, all with the same count
+    def points_at(t):
+        return [edgePointAtFraction(edge, rev, t) for edge, rev in tr_edges]
+
+    points = [points_at(0.0)]
+    # spans still to check, first span last
+    spans = [(0.0, 1.0, points[0], points_at(1.0), 0)]
+    while spans:
+        t0, t1, p0, p1, depth = spans.pop()
+        split = False
+        if depth < max_depth:
+            for tm in (0.25, 0.5, 0.75):
+                pm = points_at(t0 + (t1 - t0) * tm)
+                if any(chordDeviation(pm[k], p0[k], p1[k]) > tolerance for k in range(len(tr_edges))):
+                    split = True
+                    break
+        if split:
+            tm = (t0 + t1) / 2
+            pm = points_at(tm)
+            spans.append((tm, t1, pm, p1, depth + 1))
+            spans.append((t0, tm, p0, pm, depth + 1))
+        else:
+            points.append(p1)
 
-def ShapeToHWSPath(selected_object, precision, reverse=False): #, inner_shape=False):
+    return [[p[k] for p in points] for k in range(len(tr_edges))]
 
-    # Creates the wire path for an input shape. Returns a list of points with
-    # a structure: trajectory_list[machine_side][xyz]
-    # precision -> distance between discrete points of the trajectory (mm/point)
+
+@HWS_Profile.profiled('faces (ShapeToHWSPath)')
+def shapeToFaceTrajectories(selected_object, precision, reverse=False, chord_tolerance=0.0): #, inner_shape=False):
+
+    # faces stage of ShapeToHWSPath. Returns [trajectory, is_inner_part] for
+    # every part of the shape, trajectory is the list of discretized
+    # transversal faces: trajectory[face][machine_side][point]
     #------------------------------------------------------------------------- 0
     # split faces in reference to XY plane
     
@@ -1272,19 +1513,54 @@ def ShapeToHWSPath(selected_object, precision, reverse=False): #, inner_shape=Fa
 
     find_tf_n_pf()
 
-    def doFacesTouch(face_A, face_B, show_edge = False):
-        # auxiliar function to test if two faces share and edge
-        for edge_A in face_A.Edges:
-            for edge_B in face_B.Edges:
-                v_AB = (edge_A.CenterOfMass - edge_B.CenterOfMass).Length
-                if v_AB < 0.001:
-                    return True
-        return False
+    #------------------------------------------------------------------------- 1
+    # index edge centers and vertexes of the transversal faces once per shape
+    # so coincident geometry is found by a hashed lookup instead of comparing
+    # every face (and every edge) with every other face
+    tolerance = 0.001
+    tf_com = []
+    tf_vertexes = []
+    com_grid = HWS_Spatial.PointGrid(tolerance)
+    edge_grid = HWS_Spatial.PointGrid(tolerance)
+    vertex_grid = HWS_Spatial.PointGrid(tolerance)
+    tf_edge_com = []
+
+    for f_i in range(len(transversal_faces)):
+        face = transversal_faces[f_i]
+        tf_com.append(face.CenterOfMass)
+        com_grid.add(tf_com[f_i], f_i)
+
+        edge_com = [edge.CenterOfMass for edge in face.Edges]
+        tf_edge_com.append(edge_com)
+        for e_com in edge_com:
+            edge_grid.add(e_com, f_i)
+
+        tf_vertexes.append(face.Vertexes)
+        for vertex in tf_vertexes[f_i]:
+            vertex_grid.add(vertex.Point, (f_i, vertex))
+
+    # faces touch if they share an edge (same edge center)
+    touching_faces = []
+    for f_i in range(len(transversal_faces)):
+        touching = set()
+        for e_com in tf_edge_com[f_i]:
+            touching.update(edge_grid.queryData(e_com))
+        touching.discard(f_i)
+        touching_faces.append(sorted(touching))
 
     #------------------------------------------------------------------------- 1
     # order transversal faces to be consecutive
+    # faces are handled by their index in transversal_faces
     consecutive_faces = []
-    consecutive_faces.append(transversal_faces[0])
+    used_faces = [False] * len(transversal_faces)
+
+    def use_face(f_i):
+        consecutive_faces.append(f_i)
+        # faces with the same center of mass count as the same face
+        for f_j in com_grid.queryData(tf_com[f_i]):
+            used_faces[f_j] = True
+
+    use_face(0)
     
     #reverse = True  # reverse the tool trajectory with this boolean
     
@@ -1296,83 +1572,57 @@ def ShapeToHWSPath(selected_object, precision, reverse=False): #, inner_shape=Fa
 
     parts = []
     parts.append(0)
+    first_unused = 0
    
     for i in range( len( transversal_faces ) ):
-      
-        
 
         if i == len(consecutive_faces):
-            consecutive_faces.append( transversal_faces[i] )
+            # current part is closed, start a new one with the next free face
+            if used_faces[i]:
+                while first_unused < len(used_faces) and used_faces[first_unused]:
+                    first_unused += 1
+                if first_unused < len(used_faces):
+                    use_face(first_unused)
+                else:
+                    use_face(i)
+            else:
+                use_face(i)
             parts.append(i)
             num_parts += 1
 
-        face_A = consecutive_faces[i]
-        for face_B in transversal_faces[1:]:
-            v_AB = (face_A.CenterOfMass - face_B.CenterOfMass).Length
-            if v_AB > 0.001:
-                if doFacesTouch( face_A, face_B ):
-                    appended = False
-                    for face_C in consecutive_faces:
-                        if (face_B.CenterOfMass - face_C.CenterOfMass).Length < 0.001:
-                            appended = True
-                        else:
-                            pass
-
-                    if not(appended):
-                        consecutive_faces.append( face_B )
-                        break
-                else:
-                    pass
+        # continue with the first touching face not already in the path
+        # (the face itself and face 0 are always marked as used)
+        f_a = consecutive_faces[i]
+        for f_b in touching_faces[f_a]:
+            if not(used_faces[f_b]):
+                use_face(f_b)
+                break
 
     #------------------------------------------------------------------------- 2
     # project path vertexes to a XY plane placed at wire start and end so they form
     # the toolpath
-    def vertexesInCommon( face_a, face_b ):
+    def vertexesInCommon( f_a, f_b ):
         # aux function to find the vertexes shared by two connected rectangles
-        a_i = 0
-        b_i = 0
-        cm_a_found = False
-        cm_b_found = False
-
-        """
-        #Old Algoritm
-        for vertex_a in face_a.Vertexes:
-            for vertex_b in face_b.Vertexes:
-                if (vertex_a.Point - vertex_b.Point).Length < 0.01:
-                    cm_a = vertex_a
-                    for v_a in face_a.Vertexes:
-                        for v_b in face_b.Vertexes:
-                            if (v_a.Point-cm_a.Point).Length > 0.001:
-                                if (v_a.Point - v_b.Point ).Length < 0.001:
-                                    cm_b = v_a
-                                    return [cm_a, cm_b]
-        """
-        # new algoritm
-        #print(len(face_a.Vertexes),len(face_b.Vertexes))
-        for a_i in range(len(face_a.Vertexes)):
-            
-            for b_i in range(len(face_b.Vertexes)):
-                if not(cm_a_found) and (face_a.Vertexes[a_i].Point - face_b.Vertexes[b_i].Point).Length < 0.001:
-                    cm_a = face_a.Vertexes[a_i]
-                    cm_a_found = True
-
-                if not(cm_b_found) and cm_a_found: 
-                    if (cm_a.Point - face_a.Vertexes[a_i].Point).Length > 0.001 and (face_a.Vertexes[a_i].Point - face_b.Vertexes[b_i].Point).Length < 0.001:
-                        cm_b = face_b.Vertexes[b_i]
-                        cm_b_found = True
-                
-                if cm_a_found and cm_b_found:
-                    cm = [cm_a, cm_b]
-                    return cm
-        
-        if a_i < 4 or b_i < 4 or a_i > 4 or b_i > 4:
-            print('error when comparing number of points in faces, should be 4 by 4',a_i, b_i)
-            print('try to find loose points or lines in the shape')
-            print('and remove them')
-        #return [cm_a, cm_b]
-        
-
-
+        # returns the first shared vertex of face a and the vertex of face b
+        # matching the next shared vertex of face a
+        cm_a = None
+        for vertex_a in tf_vertexes[f_a]:
+            matches = [v for f_i, v in vertex_grid.queryData(vertex_a.Point) if f_i == f_b]
+            if not(matches):
+                continue
+
+            if cm_a is None:
+                cm_a = vertex_a
+            elif (cm_a.Point - vertex_a.Point).Length > tolerance:
+                return [cm_a, matches[0]]
+
+        print('error when comparing number of points in faces, should be 4 by 4',
+              len(tf_vertexes[f_a]), len(tf_vertexes[f_b]))
+        print('try to find loose points or lines in the shape')
+        print('and remove them')
+
+
+    @HWS_Profile.profiled('discretize')
     def last_part_of_ToHWSPath(c_faces, p_faces, resoluiton, inner_part_index, is_inner_part):
 
         # discretize length
@@ -1383,10 +1633,9 @@ def ShapeToHWSPath(selected_object, precision, reverse=False): #, inner_shape=Fa
         part_AB_length = []
         wirepath = []
         for i in range(len(c_faces)-1): # xrange -> range ok?
-            face_a = c_faces[i]
-            face_b = c_faces[i+1]
+            face_a = transversal_faces[c_faces[i]]
 
-            cm = vertexesInCommon( face_a, face_b)
+            cm = vertexesInCommon( c_faces[i], c_faces[i+1])
             #print(cm)
             cm_a = cm[0]
             cm_b = cm[1]
@@ -1433,6 +1682,10 @@ def ShapeToHWSPath(selected_object, precision, reverse=False): #, inner_shape=Fa
                 if tr_edge[1][1]:
                     TB.reverse()
 
+            elif chord_tolerance > 0:
+                # as many points as the curves need, same count on both sides
+                TA, TB = adaptiveDiscretize(tr_edge[:2], chord_tolerance)
+
             else:
                 #print(tr_edge)
                 n_discretize = max( tr_edge[0][0].Length/discrete_length, tr_edge[1][0].Length/discrete_length )
@@ -1493,81 +1746,13 @@ def ShapeToHWSPath(selected_object, precision, reverse=False): #, inner_shape=Fa
 
             #print(i, (trajectory[i][0][0] - trajectory[i][0][1]).Length)
      
-        #todo add negative kerf to inner shape, done
-
-        #TODO get foam setting from UI
-
-        foam_cfg = FreeCAD.ActiveDocument.HWS_Machine.FoamConfig
-        foam_index = FreeCAD.ActiveDocument.WirePath.FoamIndex
-
-        #print(foam_cfg[foam_index])
-
-        #foam = ["Default", 1.6, 4.0, 1.9, 75] #[0, 'EXP Wire 0.5', True, [4.5, 20], [2, 20], 0.6, 0.8]
-        
-        foam =  json.JSONDecoder().decode(foam_cfg[foam_index])
-        try:
-            trajectory, part_AB_length = addKerf2Faces(trajectory, selected_object, inner_part_index, foam, is_inner_part)
-        except:
-            FreeCAD.Console.PrintMessage('error when adding kerf, trying with zero kerf')
-            zero_kerf_foam = [foam[0],0,foam[2],0,foam[4]]
-            try:
-                trajectory, part_AB_length = addKerf2Faces(trajectory, selected_object, inner_part_index, zero_kerf_foam, is_inner_part)
-                FreeCAD.Console.PrintMessage('created path with 0 kerf')
-                FreeCAD.Console.PrintMessage('this is often caused by vertexes too close together')
-            except:
-                FreeCAD.Console.PrintMessage('error, can\'t create path')
-
-        
-        # ------------------------------------------------------------------------ 3
-        # trajectory structure
-        # trajectory [ faces ] [ sideA, sideB ], [TrajectoryPoints (min of 2) ], [X,Y,Z]
-        # -> clean trajectory list from repeated elements:
-        clean_list_A = []
-        clean_list_B = []
-        for pt in trajectory:
-            for i in range( len( pt[0] ) -1):
-                PA_0 = pt[0][i]
-                PA_1 = pt[0][i+1]
-                #print(PA_0, " - ",PA_1)
-                if (PA_0 - PA_1).Length > 0.001:
-                    clean_list_A.append( pt[0][i] )
-                    clean_list_B.append( pt[1][i] )
-                else:
-                    pass
-        clt = [ clean_list_A, clean_list_B ] # clt -> clean trajectory
-        
-        # -> transform trajectory to a simple list to allow JSON serialization (save list)
-        Tr_list_A = []
-        Tr_list_B = []
-        for i in range( len( clt[0] ) ): # xrange -> range ok?
-            PA = [ clt[0][i].x, clt[0][i].y, clt[0][i].z ]
-            PB = [ clt[1][i].x, clt[1][i].y, clt[1][i].z ]
-            #print(PA)
-            #print(PB)
-            #print(' ')
-            Tr_list_A.append( PA )
-            Tr_list_B.append( PB )
-
-        Tr_list_A.append( Tr_list_A[0] )
-        Tr_list_B.append( Tr_list_B[0] )
-
-        #print(Tr_list_B)
-        
-        wirepath = [ Tr_list_A, Tr_list_B ]
-        # check that sideA  has the lower z value:
-        if Tr_list_A[0][2] > Tr_list_B[0][2]:
-            wirepath = [ Tr_list_B, Tr_list_A ]
-
-        return wirepath, part_AB_length
+        return trajectory
     
     # itare through consecutive_faces splitt up by parts[]
-    wirepath_return = []
-    inner_part_AB_length = []
+    parts_return = []
     
     #handle each part separat in last part
     r_cf = []
-    lpa = []
-    wpa = []
     parts_i = 0
     n = 0
 
@@ -1582,9 +1767,7 @@ def ShapeToHWSPath(selected_object, precision, reverse=False): #, inner_shape=Fa
                     r_cf.reverse()
 
                 #wirepath_return.append(last_part_of_ToNiCrPath(r_cf, parallel_faces, precision, parts_i, True))
-                wpa, lpa = last_part_of_ToHWSPath(r_cf, parallel_faces, precision, parts_i, True)
-                wirepath_return.append(wpa)
-                inner_part_AB_length.append(lpa)
+                parts_return.append([last_part_of_ToHWSPath(r_cf, parallel_faces, precision, parts_i, True), True])
             else:
                 r_cf = consecutive_faces[parts[parts_i]*1:parts[parts_i+1]]
                 
@@ -1594,14 +1777,10 @@ def ShapeToHWSPath(selected_object, precision, reverse=False): #, inner_shape=Fa
 
                 if parts_i > 0:
                     #wirepath_return.append(last_part_of_ToNiCrPath(r_cf, parallel_faces, precision, parts_i, True))
-                    wpa, lpa = last_part_of_ToHWSPath(r_cf, parallel_faces, precision, parts_i, True)
-                    wirepath_return.append(wpa)
-                    inner_part_AB_length.append(lpa)
+                    parts_return.append([last_part_of_ToHWSPath(r_cf, parallel_faces, precision, parts_i, True), True])
                 else:
                     #wirepath_return.append(last_part_of_ToHWSPath(r_cf, parallel_faces, precision, parts_i, False))
-                    wpa, lpa = last_part_of_ToHWSPath(r_cf, parallel_faces, precision, parts_i, False)
-                    wirepath_return.append(wpa)
-                    inner_part_AB_length.append(lpa)
+                    parts_return.append([last_part_of_ToHWSPath(r_cf, parallel_faces, precision, parts_i, False), False])
     else:
         r_cf = consecutive_faces
         
@@ -1610,21 +1789,54 @@ def ShapeToHWSPath(selected_object, precision, reverse=False): #, inner_shape=Fa
             r_cf.reverse()
         
         #wirepath_return.append(last_part_of_ToNiCrPath(r_cf, parallel_faces, precision, parts_i, False))
-        wpa, lpa = last_part_of_ToHWSPath(r_cf, parallel_faces, precision, parts_i, False)
-        wirepath_return.append(wpa)
-        inner_part_AB_length.append(lpa)
+        parts_return.append([last_part_of_ToHWSPath(r_cf, parallel_faces, precision, parts_i, False), False])
     
-    return wirepath_return, inner_part_AB_length
+    return parts_return
+
+# build the wire surface with one loft per segment (slow, the shape of older
+# versions), for comparing against the ruled surface
+LEGACY_PATH_SHAPE = False
+
+
+@HWS_Profile.profiled('PathToShape')
+def PathToShape(point_list, legacy=None):
+    # creates the shape that representates the wire trajectory of a HWS point
+    # list: one ruled (degree 1) B-spline face through side A and B and the
+    # wire line at every point, so points and wire positions can be selected
+    if legacy == None:
+        legacy = LEGACY_PATH_SHAPE
+    points = HWS_RawPath.asRawPath(point_list).points.tolist()
+    if legacy:
+        return PathToShapeLofts(points)
+    if len(points) < 2:
+        return Part.makeCompound([])
+
+    poles = [[FreeCAD.Vector(*p[0]), FreeCAD.Vector(*p[1])] for p in points]
+    umults = [2] + [1] * (len(points) - 2) + [2]
+    uknots = [float(i) for i in range(len(points))]
+    try:
+        surface = Part.BSplineSurface()
+        surface.buildFromPolesMultsKnots(poles, umults, [2, 2], uknots, [0.0, 1.0],
+                                         False, False, 1, 1)
+        comp = [surface.toShape()]
+    except:
+        return PathToShapeLofts(points)
+
+    for p in poles:
+        comp.append(Part.LineSegment(p[0], p[1]).toShape())
+    return Part.makeCompound(comp)
+
 
-def PathToShape(point_list):
+def PathToShapeLofts(point_list):
     # creates a compound of faces from a HWS point list to representate the wire
     # trajectory
     comp = []
-    for i in range(len(point_list[0])-1):
-        temp_list0 = list(point_list[0][i])
-        temp_list0_i = list(point_list[0][i+1])
-        temp_list1 = list(point_list[1][i])
-        temp_list1_i = list(point_list[1][i+1])
+    points = HWS_RawPath.asRawPath(point_list).points.tolist()
+    for i in range(len(points)-1):
+        temp_list0 = points[i][0]
+        temp_list0_i = points[i+1][0]
+        temp_list1 = points[i][1]
+        temp_list1_i = points[i+1][1]
 
         l0 = Part.LineSegment()
         l1 = Part.LineSegment()
@@ -1643,162 +1855,276 @@ def PathToShape(point_list):
 
     return Part.makeCompound(comp)
 
-def pointFromPath(vector, raw_path):
-    # returns the position of vector in raw_path list
-    for side in raw_path:
-        for i in range(len(side)):
-            v = side[i]
-            Fv = FreeCAD.Vector(v[0], v[1], v[2])
-            if (Fv - vector).Length < 0.001:
-                return i
-
-def writeGCodeFile(wirepath, directory, G93):
+def getRawPath(path_obj):
+    # RawPath of a path object, documents saved before the array representation
+    # store it as [side_A, side_B] lists
+    return HWS_RawPath.asRawPath(path_obj.RawPath)
+
+def pathPoint(path_name, side, index):
+    # one point of the RawPath of the path object named path_name as [x, y, z]
+    return getRawPath(FreeCAD.ActiveDocument.getObject(path_name)).point(side, index)
+
+@HWS_Profile.profiled('path point grid')
+def updatePathPointGrid(path_obj):
+    # (re)builds the spatial index of a path object, called when its RawPath
+    # changes. It is kept on the proxy as [RawPath property value, PointGrid],
+    # so it goes with the object and is not saved. Side A points are added
+    # before side B points so the grid index i is point i of side A and
+    # i - count point i - count of side B
+    raw = getRawPath(path_obj)
+    # cells about the size of the distance between points
+    spacing = 1.0
+    if raw.count > 1:
+        steps = np.linalg.norm(np.diff(raw.A, axis=0), axis=1)
+        if steps.max() > 0:
+            spacing = float(np.mean(steps))
+    grid = HWS_Spatial.PointGrid(spacing)
+    for side in range(2):
+        for p in raw.points[:, side].tolist():
+            grid.add(p)
+    path_obj.Proxy.point_grid = [path_obj.RawPath, grid]
+    return grid
+
+
+def pathPointGrid(path_obj):
+    grid = getattr(path_obj.Proxy, 'point_grid', None)
+    if grid is None or grid[0] is not path_obj.RawPath:
+        return updatePathPointGrid(path_obj)
+    return grid[1]
+
+
+def nearestPathPoint(vector, path_obj):
+    # index and distance of the path point (side A or B) closest to vector
+    grid = pathPointGrid(path_obj)
+    i, d = grid.nearest(vector)
+    if i is None:
+        return None, None
+    return i % (len(grid) // 2), d
+
+
+def pointFromPath(vector, path):
+    # returns the position of vector in the path object (or raw path) path,
+    # side A is searched before side B. If vector is not on the path the
+    # closest point of a path object is used
+    if hasattr(path, 'RawPath'):
+        grid = pathPointGrid(path)
+        count = len(grid) // 2
+        match = grid.query(vector, 0.001)
+        if match:
+            return match[0] % count
+        i, d = nearestPathPoint(vector, path)
+        if i is not None:
+            FreeCAD.Console.PrintMessage('Point not on ' + path.Label + ', using closest point ' + str(i) + '\n')
+        return i
+
+    points = HWS_RawPath.asRawPath(path).points
+    d = np.linalg.norm(points - np.array([vector[0], vector[1], vector[2]]), axis=2)
+    for side in range(2):
+        match = np.flatnonzero(d[:, side] < 0.001)
+        if len(match):
+            return int(match[0])
+
+# objects with a label starting with this are checked as clamps
+CLAMP_PREFIX = 'Clamp'
+
+
+def boxFromBoundBox(bb):
+    return np.array([[bb.XMin, bb.YMin, bb.ZMin], [bb.XMax, bb.YMax, bb.ZMax]], dtype=float)
+
+
+def obstacleBoxes(doc):
+    # [min, max] boxes of the base plate and all clamps of the document
+    boxes = []
+    base = doc.getObject('Base')
+    if base:
+        boxes.append(boxFromBoundBox(base.Shape.BoundBox))
+    for obj in doc.Objects:
+        if obj.Label.startswith(CLAMP_PREFIX) and hasattr(obj, 'Shape') and not obj.Shape.isNull():
+            boxes.append(boxFromBoundBox(obj.Shape.BoundBox))
+    return boxes
+
+
+# objects with a label starting with this are the foam stock
+STOCK_PREFIX = 'Stock'
+# distance in mm to the stock where a move still counts as cutting
+STOCK_MARGIN = 1.0
+
+
+def stockBoxes(doc):
+    # [min, max] boxes of the foam stock, the objects labeled Stock.. or,
+    # with StockFromCutConfig, the block of the Cut Settings standing on the
+    # base plate from X = position to position + depth over the whole wire
+    boxes = []
+    for obj in doc.Objects:
+        if obj.Label.startswith(STOCK_PREFIX) and hasattr(obj, 'Shape') and not obj.Shape.isNull():
+            boxes.append(boxFromBoundBox(obj.Shape.BoundBox))
+    machine = doc.HWS_Machine
+    if not boxes and getattr(machine, 'StockFromCutConfig', False):
+        cut_cfg = json.JSONDecoder().decode(machine.CutConfig[0])
+        base = doc.getObject('Base')
+        table_top = base.Shape.BoundBox.YMax if base else 0.0
+        boxes.append(np.array([[cut_cfg[0], table_top, 0.0],
+                               [cut_cfg[0] + cut_cfg[2], table_top + cut_cfg[1], machine.ZLength]], dtype=float))
+    return boxes
+
+
+def iterGCodeLines(wirepath, G93):
+    """
+    Generator yielding the G-Code instructions, that can be read by GRBL, one
+    line at a time so the program never has to be held in memory.
+    wirepath -> traced route (RawPath) from traceObjectsAndLinksForRawPath,
+                its owner table tells which object every move belongs to
+    Reads the machine, foam and owner settings of the active document, the
+    program itself is made by hws_core.gcode
+    """
     HWS_Machine = FreeCAD.ActiveDocument.HWS_Machine
-    tr_A = []
-    tr_B = []
+    zeroPoint = HWS_Machine.VirtualMachineZero
+    axis_name = HWS_GCode.AXIS_NAMES #Make axis name changable from freecad
+
+    #get selected foam type 
+    heat, speed  = HWS_Foam.getFoamProperties(FreeCAD.ActiveDocument.WirePath)
 
+    route = HWS_RawPath.asRawPath(wirepath)
+    route_A = route.A
+    route_B = route.B
+
+    #translate path to steppermotor positions
+    with HWS_Profile.span('projection', route.count):
+        wire_A, wire_B = HWS_Projection.projectRoute(route.points, 0, HWS_Machine.ZLength)
+        axes = np.column_stack((wire_A[:, :2], wire_B[:, :2]))
+
+    limits = [HWS_Machine.XLength, HWS_Machine.YLength, HWS_Machine.XLength, HWS_Machine.YLength]
+    for i in range(len(axes)):
+        for c in range(4):
+            if axes[i][c] < 0 or axes[i][c] > limits[c]:
+                print("Waring "+axis_name[c]+" is out of range", axes[i][c])
+
+    # surface swept by the wire against base plate and clamps
+    obstacles = obstacleBoxes(FreeCAD.ActiveDocument)
+    if route.count and obstacles:
+        with HWS_Profile.span('collision', route.count):
+            colliding = HWS_Collision.collidingSegments(wire_A, wire_B, obstacles)
+        for segment in colliding:
+            print("Warning, wire intersects base plate or clamp between point", segment, "and", segment + 1)
+
+    # owner of every move and the profile lengths of the owners
+    owner_index = route.ownerIndexes().tolist()
+    owner_AB_length = []
+    for o in route.owners:
+        owner_obj = FreeCAD.ActiveDocument.getObject(o[1])
+        owner_AB_length.append([float(owner_obj.PathALength), float(owner_obj.PathBLength)])
+
+    # distance moved in the XY plane by each side, first move starts at machine zero
+    zero_xy = [zeroPoint.x, zeroPoint.y]
+    dist_A = HWS_GCode.xyDistances(route_A, zero_xy)
+    dist_B = HWS_GCode.xyDistances(route_B, zero_xy)
+
+    # moves where the wire stays outside the foam stock
+    in_air = None
+    rapids = None
+    stock = stockBoxes(FreeCAD.ActiveDocument)
+    if route.count and stock:
+        with HWS_Profile.span('stock check', route.count):
+            in_air = HWS_Collision.movesInAir(wire_A, wire_B, stock, STOCK_MARGIN)
+        HWS_Profile.count('moves in air', int(in_air.sum()))
+        if getattr(HWS_Machine, 'RapidTravel', False):
+            rapids = in_air.tolist()
+
+    # circular runs sent as one G2/G3 move, {first move: (last point, center, ccw)}
+    arcs = {}
+    if getattr(HWS_Machine, 'ArcFitting', False) and route.count:
+        # runs don't cross an owner change or the stock surface
+        groups = owner_index
+        if in_air is not None:
+            groups = (np.array(owner_index) * 2 + in_air).tolist()
+        with HWS_Profile.span('arc fitting', route.count):
+            arcs = HWS_Arcs.fitArcs(axes[:, :2], axes[:, 2:], HWS_Machine.ArcTolerance, groups,
+                                    congruent=getattr(HWS_Machine, 'ArcPlanes', 'XY only') == 'XY and AZ')
+        HWS_Profile.count('arcs', len(arcs))
+
+    # feed of every move from the foam cut speed and the table max speed,
+    # moves in air at the travel speed
+    move_times = None
+    move_lengths = None
+    if getattr(HWS_Machine, 'FeedPlanning', False) and route.count:
+        with HWS_Profile.span('feed planning', route.count):
+            move_times, move_lengths = HWS_Feed.planMoves(dist_A, dist_B, axes, speed,
+                                                          HWS_Foam.getTableMaxSpeed(), in_air,
+                                                          getattr(HWS_Machine, 'TravelSpeed', 0.0),
+                                                          zero_xy + zero_xy)
+
+    compact = getattr(HWS_Machine, 'CompactGCode', False)
+    precision = HWS_Machine.GCodePrecision if compact else 6
+    lines = HWS_GCode.iterGCodeLines(axes, dist_A.tolist(), dist_B.tolist(), owner_index, owner_AB_length,
+                                     heat, speed, G93, arcs, move_times, move_lengths, axis_name, rapids,
+                                     precision)
+    if compact:
+        # only the words that change something, fixed point numbers
+        lines = HWS_GCode.compactLines(lines, precision, axis_name)
+    return lines
+
+
+def writeGCodeLines(lines, sink, progress=None, cancel=None, total=None, chunk_size=GCODE_CHUNK_SIZE):
+    # writes the lines to any file-like sink (file, sys.stdout, gzip file,
+    # socket.makefile('w'), ...) in chunks of about chunk_size characters.
+    # After every chunk progress(lines_written, total) is called and cancel()
+    # is asked if the export should stop, returns False if it was cancelled
+    chunk = []
+    chunk_length = 0
+    written = 0
+    for line in lines:
+        chunk.append(line)
+        chunk_length += len(line)
+        written += 1
+        if chunk_length >= chunk_size:
+            sink.write(''.join(chunk))
+            chunk = []
+            chunk_length = 0
+            if progress:
+                progress(written, total)
+            if cancel and cancel():
+                return False
+
+    if chunk:
+        sink.write(''.join(chunk))
+    if progress:
+        progress(written, total)
+    return True
+
+
+def writeGCodeFile(wirepath, directory, G93, progress=None, cancel=None):
     """
     This functions creates a file containing the G-Code instructions that can be
     read by GRBL.
-    wirepath[0],wirepath[1] > trajectory points
-    wirepath[2] -> wire speed and temperature
-    directory = '/home/user/whatever...''
+    wirepath -> traced route (RawPath) from traceObjectsAndLinksForRawPath
+    directory = '/home/user/whatever...'' or an open file-like object,
+                a path ending with .gz is written gzip compressed
+    progress, cancel -> optional callbacks, see writeGCodeLines
     
     """
-    if G93:
-        GCode_init = 'G21\nG17\nG90\nG93\n'
-        #Gcode_final = 'M5\nG94'
-    else:
-        GCode_init = 'G21\nG17\nG90\nG94\n'
-        #Gcode_final = 'M5'
-
-    Gcode_final = 'M5\nG94'
-    
-    zeroPoint = FreeCAD.ActiveDocument.HWS_Machine.VirtualMachineZero
-    ins = GCode_init
-    f = ''
-    f_G93 = ''
-    axis_name = ['X','Y','A','Z'] #Make axis name changable from freecad
-
-    #get selected foam type 
-    heat, speed  = HWS_Foam.getFoamProperties(FreeCAD.ActiveDocument.WirePath)
-    base = FreeCAD.ActiveDocument.Base
-
-    for i in range(len(wirepath[0])):
-
-        #heat = 500 #heat = wirepath[2][i][2] * 10
+    route = HWS_RawPath.asRawPath(wirepath)
+    lines = iterGCodeLines(route, G93)
+    total = HWS_GCode.countLines(route.count, len(route.owners), G93)
 
-        #speed = 4 #wirepath[2][i][1]
-
-        #translate path to steppermotor positions
-        tr_A, tr_B = HWS_SM.projectEdgeToTrajectory(wirepath[0][i],wirepath[1][i],0,HWS_Machine.ZLength)
-        
-        if tr_A[0] < 0:
-            print("Waring "+axis_name[0]+" is out of range", tr_A[0])
-        if tr_A[1] < 0:
-            print("Waring "+axis_name[1]+" is out of range", tr_A[1])
-        if tr_B[0] < 0:
-            print("Waring "+axis_name[2]+" is out of range", tr_B[0])
-        if tr_B[1] < 0:
-            print("Waring "+axis_name[3]+" is out of range", tr_B[1])
-
-        if tr_A[0] > HWS_Machine.XLength:
-            print("Waring "+axis_name[0]+" is out of range", tr_A[0])
-        if tr_A[1] > HWS_Machine.YLength:
-            print("Waring "+axis_name[1]+" is out of range", tr_A[1])
-        if tr_B[0] > HWS_Machine.XLength:
-            print("Waring "+axis_name[2]+" is out of range", tr_B[0])
-        if tr_B[1] > HWS_Machine.YLength:
-            print("Waring "+axis_name[3]+" is out of range", tr_B[1])
-        
-        
-        if i < len(wirepath[0]) - 1:
-            #print(i, tr_A, tr_B)
-            line = Part.makeLine(tr_A, tr_B)
-            s1 = line
-            s2 = base.Shape
+    if hasattr(directory, 'write'):
+        with HWS_Profile.span('write G-Code', route.count):
+            return writeGCodeLines(lines, directory, progress, cancel, total)
 
-            cs = s1.common(s2)
-        
-            if cs.Vertexes:
-                print("Warning, found intersection point with base plate")
-                """
-                for v in cs.Vertexes:
-                    print("intersection point : ", v.Point)
-                else:
-                    print("can't find an intersection point")
-                """
-       
-        if not(G93) and wirepath[2][i][3] != wirepath[2][i - 1][3] and i > 0:
-            h = 'M3 S' + str(heat) + '\n'
-            f = 'G1 F '+str(speed) + '\n'
-        elif not(G93) and i < 1:
-            h = 'M3 S' + str(heat) + '\n'
-            f = 'G1 F '+str(speed) + '\n'
-        elif G93:
-            dA = 0
-            dB = 0
-            vA1 = 0
-            vA2 = 0
-            vB1 = 0
-            vB2 = 0
-            i_next = i - 1
-
-            if i_next < len(wirepath[0]) and i > 0:
-                vA1 = FreeCAD.Vector(wirepath[0][i_next][0], wirepath[0][i_next][1], wirepath[0][i_next][2])
-                vA2 = FreeCAD.Vector(wirepath[0][i][0], wirepath[0][i][1], wirepath[0][i_next][2])
-                dA = vA1.distanceToPoint(vA2)
-
-                vB1 = FreeCAD.Vector(wirepath[1][i_next][0], wirepath[1][i_next][1], wirepath[1][i_next][2])
-                vB2 = FreeCAD.Vector(wirepath[1][i][0], wirepath[1][i][1], wirepath[1][i_next][2])
-                dB = vB1.distanceToPoint(vB2)
-
-            elif i == 0:
-                vA1 = FreeCAD.Vector(zeroPoint.x, zeroPoint.y, wirepath[0][i][2])
-                vA2 = FreeCAD.Vector(wirepath[0][i][0], wirepath[0][i][1], wirepath[0][i][2])
-                dA = vA1.distanceToPoint(vA2)
-
-                vB1 = FreeCAD.Vector(zeroPoint.x, zeroPoint.y, wirepath[1][i][2])
-                vB2 = FreeCAD.Vector(wirepath[1][i][0], wirepath[1][i][1], wirepath[1][i][2])
-                dB = vB1.distanceToPoint(vB2)
-           
-            profileALength = float(FreeCAD.ActiveDocument.getObject(wirepath[2][i][3]).PathALength)
-            profileBLength = float(FreeCAD.ActiveDocument.getObject(wirepath[2][i][3]).PathBLength)
-            
-            #print(dA, dB)
-            #print(speed)
+    if directory.endswith('.gz'):
+        gcode_file = gzip.open(directory, 'wt')
+    else:
+        gcode_file = open(directory, 'w', buffering=GCODE_CHUNK_SIZE)
 
-            if profileALength >= profileBLength:
-                f_G93 = ' F '+str(1 / ((dA / speed) / 60))
-            else:
-                f_G93 = ' F '+str(1 / ((dB / speed) / 60))
-            
-            if i_next < len(wirepath[0]) and i > 0:
-                if wirepath[2][i][2] == wirepath[2][i_next][2]:
-                    h = ''
-                else:
-                    h = 'M3 S' + str(heat) + '\n'
-            else:
-                h = 'M3 S' + str(heat) + '\n'
+    with gcode_file, HWS_Profile.span('write G-Code', route.count):
+        done = writeGCodeLines(lines, gcode_file, progress, cancel, total)
 
-        else:
-            h = ''
-            f = ''
-            f_G93 = ''
-
-        AX = axis_name[0]+' '+str(round(tr_A.x, 6)) + ' '
-        AY = axis_name[1]+' '+str(round(tr_A.y, 6)) + ' '
-        BX = axis_name[2]+' '+str(round(tr_B.x, 6)) + ' '
-        BY = axis_name[3]+' '+str(round(tr_B.y, 6))
-        
-        ins += h + f + 'G1 ' + AX + AY + BX + BY + f_G93 + '\n'
-    
-    ins += Gcode_final
-    gcode_file = open(directory, 'w')    
-    gcode_file.write(ins)
-    gcode_file.close()
+    if not done:
+        # don't leave a partial program that could be sent to the machine
+        os.remove(directory)
+        FreeCAD.Console.PrintMessage('G-Code export cancelled\n')
 
     #FreeCAD.Console.PrintMessage('G-Code generated succesfully\n')
+    return done
 
 
 def saveGCodeFile():
@@ -1816,20 +2142,35 @@ def saveGCodeFile():
         directory = FreeCAD.ConfigGet("UserHomePath") #directory = FreeCAD.ConfigGet("UserAppData")
         HWS_Mch.SaveFilePath = FreeCAD.ConfigGet("UserHomePath") #directory = FreeCAD.ConfigGet("UserAppData")
     
+    import FreeCADGui
+    from PySide import QtGui
     FCW = FreeCADGui.getMainWindow()
   
     save_directory = QtGui.QFileDialog.getSaveFileName(FCW,
                                                     'Save G-Code as:',
                                                     directory,
                                                     'All files  (*.*);;GCode files (*.nc)')
-        
-    full_path = traceObjectsAndLinksForRawPath(G93)
+    if save_directory[0] == '':
+        # dialog cancelled
+        return
 
-    writeGCodeFile(full_path, str(save_directory[0]), G93)
+    exportGCode(str(save_directory[0]), G93)
     FreeCAD.Console.PrintMessage('G-Code code saved to: ' + str(save_directory[0]) + '\n')
 
 
+def exportGCode(file_path, G93=None, progress=None, cancel=None):
+    # trace the route of the active document and write it to file_path
+    # (no GUI needed, used by saveGCodeFile and HWS_Batch)
+    if G93 is None:
+        G93 = FreeCAD.ActiveDocument.HWS_Machine.G93
+    full_path = traceObjectsAndLinksForRawPath(G93)
+    writeGCodeFile(full_path, file_path, G93, progress, cancel)
+    return full_path
+
+
 def importNiCrFile():
+    import FreeCADGui
+    from PySide import QtGui
     FCW = FreeCADGui.getMainWindow()
     file_dir = QtGui.QFileDialog.getOpenFileName(FCW,
                                                  'Load .nicr file:',
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+# Profiling of the workbench commands, see hws_core.profiling.
+# Switched on with the preference Profiling (bool) in
+#   Tools > Edit parameters > BaseApp/Preferences/Mod/HWS
+# the JSON reports go to ProfileDirectory (string, default the temp directory).
+
+import functools
+import os
+import tempfile
+import FreeCAD
+from hws_core.profiling import profiler
+
+PREFERENCES = 'User parameter:BaseApp/Preferences/Mod/HWS'
+
+
+def readPreferences():
+    params = FreeCAD.ParamGet(PREFERENCES)
+    profiler.enabled = params.GetBool('Profiling', False)
+    profiler.report_dir = params.GetString('ProfileDirectory', '') or os.path.join(tempfile.gettempdir(), 'hws_profiles')
+    profiler.output = FreeCAD.Console.PrintMessage
+
+
+def command(name):
+    # context around a user command, prints and saves its report if profiling
+    # is on
+    readPreferences()
+    return profiler.command(name)
+
+
+def span(name, points=0):
+    return profiler.span(name, points)
+
+
+def count(name, value=1):
+    profiler.count(name, value)
+
+
+def profiled(name):
+    return profiler.profiled(name)
+
+
+def profiledCommand(name):
+    # decorator for the Activated method of a command
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with command(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+# RawPath moved to hws_core.rawpath, this module stays so documents saved with
+# RawPath properties of HWS_RawPath.RawPath can still be opened.
+
+from hws_core.rawpath import *
+from hws_core.rawpath import RawPath
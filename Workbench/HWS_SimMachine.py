@@ -29,6 +29,12 @@
 import FreeCAD
 import Part
 import json
+import time
+import bisect
+import numpy as np
+from hws_core import rawpath as HWS_RawPath
+from hws_core import projection as HWS_Projection
+import HWS_Profile
 
 default_table_cfg = [] #["Default", 500.0, 400.0, 400.0, 10.0, 50.0, 2.0, 200.0, 20.0, 200.0, 0.0]
 default_foam_cfg = [] #["Default", 1.6, 4, 1.9, 75]
@@ -77,6 +83,57 @@ class HWS_Machine:
         obj.addProperty( 'App::PropertyBool',
                          'G93',
                          'Table and Foam Settings' ).G93 = True
+
+        obj.addProperty( 'App::PropertyFloat',
+                         'SimplifyTolerance',
+                         'Table and Foam Settings',
+                         'Max distance in mm a point can be removed from the traced route (0.0 = keep all points)' ).SimplifyTolerance = 0.0
+
+        obj.addProperty( 'App::PropertyBool',
+                         'ArcFitting',
+                         'Table and Foam Settings',
+                         'Export circular runs as G2/G3, the runs side B can follow as set in ArcPlanes' ).ArcFitting = False
+
+        obj.addProperty( 'App::PropertyEnumeration',
+                         'ArcPlanes',
+                         'Table and Foam Settings',
+                         'XY only: A/Z move in a straight line during an arc (grbl-mega-5x), only runs where side B stays on that line are fitted. XY and AZ: the controller cuts the same arc on side B, untapered sections are fitted' )
+        obj.ArcPlanes = ['XY only', 'XY and AZ']
+
+        obj.addProperty( 'App::PropertyFloat',
+                         'ArcTolerance',
+                         'Table and Foam Settings',
+                         'Max distance in mm between the path and a fitted arc' ).ArcTolerance = 0.01
+
+        obj.addProperty( 'App::PropertyBool',
+                         'FeedPlanning',
+                         'Table and Foam Settings',
+                         'Feed per move from the foam cut speed and the table Speed_Max instead of one speed' ).FeedPlanning = False
+
+        obj.addProperty( 'App::PropertyBool',
+                         'CompactGCode',
+                         'Table and Foam Settings',
+                         'Leave out repeated modal words, unchanged axes and spaces in the G-Code' ).CompactGCode = False
+
+        obj.addProperty( 'App::PropertyInteger',
+                         'GCodePrecision',
+                         'Table and Foam Settings',
+                         'Decimals of the numbers in compact G-Code, match the step resolution of the machine' ).GCodePrecision = 3
+
+        obj.addProperty( 'App::PropertyBool',
+                         'StockFromCutConfig',
+                         'Table and Foam Settings',
+                         'Without Stock objects use the block of the Cut Settings as foam stock' ).StockFromCutConfig = False
+
+        obj.addProperty( 'App::PropertyBool',
+                         'RapidTravel',
+                         'Table and Foam Settings',
+                         'Export moves outside the foam stock as G0 rapids' ).RapidTravel = False
+
+        obj.addProperty( 'App::PropertyFloat',
+                         'TravelSpeed',
+                         'Table and Foam Settings',
+                         'Speed of moves outside the foam stock with FeedPlanning (0.0 = table Speed_Max)' ).TravelSpeed = 0.0
        
 
         # geometric properties
@@ -119,7 +176,12 @@ class HWS_Machine:
         obj.addProperty('App::PropertyFloat',
                         'AnimationDelay',
                         'Animation',
-                        'Time between animation frames (0.0 = max speed)').AnimationDelay = 0.01
+                        'Time between animation frames').AnimationDelay = 0.01
+
+        obj.addProperty('App::PropertyFloat',
+                        'AnimationTimeScale',
+                        'Animation',
+                        'Machine seconds shown per second (0.0 = every point, one per frame)').AnimationTimeScale = 10.0
         
             #foam_type -> index, name, PWM_controlled_heat, high_cutting_speed[speed, heat], low_cutting_speed[speed, heat], kerf_root, kerf_tip
             #foam_cfg = []
@@ -141,8 +203,12 @@ class HWS_Machine:
                 clearWireTrack()
 
             if prop == 'HideWireTrajectory':
-                for obj in FreeCAD.ActiveDocument.WireTrajectory.Group:
-                    obj.ViewObject.Visibility = not fp.HideWireTrajectory
+                wire_tr = FreeCAD.ActiveDocument.WireTrajectory
+                if isWireTrajectory(wire_tr):
+                    wire_tr.ViewObject.Visibility = not fp.HideWireTrajectory
+                else:
+                    for obj in wire_tr.Group:
+                        obj.ViewObject.Visibility = not fp.HideWireTrajectory
 
             if prop == 'HideWire':
                 FreeCAD.ActiveDocument.Wire.ViewObject.Visibility = not fp.HideWire
@@ -249,16 +315,17 @@ class HWS_Machine:
         obj_XB.Shape = machine_shapes[2]
         obj_YA.Shape = machine_shapes[3]
         obj_YB.Shape = machine_shapes[4]
-        obj_frame.ViewObject.ShapeColor = (0.67, 0.78, 0.85)
-        obj_XA.ViewObject.ShapeColor = (0.00, 0.67, 1.00)
-        obj_XB.ViewObject.ShapeColor = (0.00, 0.67, 1.00)
-        obj_YA.ViewObject.ShapeColor = (0.00, 1.00, 0.00)
-        obj_YB.ViewObject.ShapeColor = (0.00, 1.00, 0.00)
-        obj_frame.ViewObject.Selectable = False
-        obj_XA.ViewObject.Selectable = False
-        obj_XB.ViewObject.Selectable = False
-        obj_YA.ViewObject.Selectable = False
-        obj_YB.ViewObject.Selectable = False
+        if FreeCAD.GuiUp:
+            obj_frame.ViewObject.ShapeColor = (0.67, 0.78, 0.85)
+            obj_XA.ViewObject.ShapeColor = (0.00, 0.67, 1.00)
+            obj_XB.ViewObject.ShapeColor = (0.00, 0.67, 1.00)
+            obj_YA.ViewObject.ShapeColor = (0.00, 1.00, 0.00)
+            obj_YB.ViewObject.ShapeColor = (0.00, 1.00, 0.00)
+            obj_frame.ViewObject.Selectable = False
+            obj_XA.ViewObject.Selectable = False
+            obj_XB.ViewObject.Selectable = False
+            obj_YA.ViewObject.Selectable = False
+            obj_YB.ViewObject.Selectable = False
         mfolder.addObject(obj_frame)
         mfolder.addObject(obj_XA)
         mfolder.addObject(obj_XB)
@@ -274,7 +341,8 @@ class HWS_Machine:
         base_center_z =  obj_base.Height / 2
         new_base_z = float(machine_center_z) - float(base_center_z)
         obj_base.Placement = FreeCAD.Placement(FreeCAD.Vector(0, 0, new_base_z), FreeCAD.Rotation(0, 0, 0))
-        obj_base.ViewObject.Selectable = False
+        if FreeCAD.GuiUp:
+            obj_base.ViewObject.Selectable = False
         mfolder.addObject(obj_base)
 
 
@@ -292,179 +360,343 @@ class HWS_MachineViewProvider:
         __dir__ = os.path.dirname(__file__)
         return __dir__ + '/icons/CreateMachine.svg'
 
+
+class WireTrajectory:
+    # single object holding the wire trace of the animation, the trace itself
+    # only lives in the coin scene of WireTrajectoryViewProvider
+    def __init__(self, obj):
+        obj.Proxy = self
+
+    def execute(self, fp):
+        pass
+
+    def __getstate__(self):
+        return None
+
+    def __setstate__(self, state):
+        return None
+
+
+class WireTrajectoryViewProvider:
+    # draws the wire positions as one SoLineSet, every wire position is a two
+    # vertex line with its own colour (PER_PART binding). Segments are appended
+    # to the coin fields so each animation frame costs the same
+    def __init__(self, obj):
+        obj.Proxy = self
+
+    def attach(self, vobj):
+        from pivy import coin
+        self.ViewObject = vobj
+        self.Object = vobj.Object
+        self.root = coin.SoSeparator()
+        self.material = coin.SoMaterial()
+        self.binding = coin.SoMaterialBinding()
+        self.binding.value = coin.SoMaterialBinding.PER_PART
+        self.coords = coin.SoCoordinate3()
+        self.lines = coin.SoLineSet()
+        self.root.addChild(self.binding)
+        self.root.addChild(self.material)
+        self.root.addChild(self.coords)
+        self.root.addChild(self.lines)
+        self.clear()
+        vobj.addDisplayMode(self.root, 'Wireframe')
+
+    def clear(self):
+        self.segments = 0
+        self.coords.point.setNum(0)
+        self.lines.numVertices.setNum(0)
+        self.material.diffuseColor.setNum(0)
+
+    def addSegment(self, pa, pb, color):
+        self.addSegments([pa], [pb], [color])
+
+    def addSegments(self, list_A, list_B, colors):
+        n = self.segments
+        points = []
+        for pa, pb in zip(list_A, list_B):
+            points.append((pa[0], pa[1], pa[2]))
+            points.append((pb[0], pb[1], pb[2]))
+        self.coords.point.setValues(2*n, len(points), points)
+        self.lines.numVertices.setValues(n, len(colors), [2] * len(colors))
+        self.material.diffuseColor.setValues(n, len(colors), [tuple(c) for c in colors])
+        self.segments = n + len(colors)
+
+    def getDisplayModes(self, vobj):
+        return ['Wireframe']
+
+    def getDefaultDisplayMode(self):
+        return 'Wireframe'
+
+    def setDisplayMode(self, mode):
+        return mode
+
+    def getIcon(self):
+        import os
+        __dir__ = os.path.dirname(__file__)
+        return __dir__ + '/icons/AnimateMachine.svg'
+
+    def __getstate__(self):
+        return None
+
+    def __setstate__(self, state):
+        return None
+
+
+def getWireTrajectory():
+    # returns the (empty) wire trajectory object, documents from older versions
+    # have a WireTrajectory folder with one Part::Feature per route command
+    doc = FreeCAD.ActiveDocument
+    wire_tr = doc.getObject('WireTrajectory')
+    if wire_tr != None and not(isWireTrajectory(wire_tr)):
+        delWithChildren(wire_tr)
+        wire_tr = None
+
+    if wire_tr == None:
+        wire_tr = doc.addObject('App::FeaturePython', 'WireTrajectory')
+        WireTrajectory(wire_tr)
+        if FreeCAD.GuiUp:
+            WireTrajectoryViewProvider(wire_tr.ViewObject)
+        doc.HWS_Machine.addObject(wire_tr)
+    elif FreeCAD.GuiUp:
+        wire_tr.ViewObject.Proxy.clear()
+
+    if FreeCAD.GuiUp:
+        wire_tr.ViewObject.Visibility = not doc.HWS_Machine.HideWireTrajectory
+    return wire_tr
+
+
+def isWireTrajectory(obj):
+    return isinstance(getattr(obj, 'Proxy', None), WireTrajectory)
+
+
 def dbm(ms):
     # debug messages
     FreeCAD.Console.PrintMessage( '\n' + ms + '\n' )
 
 
 # Machine animation ----------------------------------------------------------
-def runSimulation(complete_raw_path):
-    # FreeCAD.ActiveDocument.WirePath.ViewObject.Visibility = False
-    projected_trajectory_A = []
-    projected_trajectory_B = []
-    Z0 = FreeCAD.ActiveDocument.HWS_Machine.FrameDiameter*1.1*0
-    #print("Z0:",Z0)
-    ZL = FreeCAD.ActiveDocument.HWS_Machine.ZLength
-    Z1 = ZL + Z0 - FreeCAD.ActiveDocument.HWS_Machine.FrameDiameter*0.2
-    #print("Z1:",Z1)
-    for i in range(len(complete_raw_path[0])):
-        PA = complete_raw_path[0][i]
-        PB = complete_raw_path[1][i]
-        proj_A, proj_B = projectEdgeToTrajectory(PA, PB, Z0, Z1)
-        projected_trajectory_A.append(proj_A)
-        projected_trajectory_B.append(proj_B)
-
-    machine_path = (projected_trajectory_A, projected_trajectory_B)
-
-    # simulate machine path
-    import time
-    # create wire
-    try:
-        wire = FreeCAD.ActiveDocument.Wire
-    except:
-        wire = FreeCAD.ActiveDocument.addObject('Part::Feature', 'Wire')
-
-
-
-    try:
-        # remove previous trajectories
-        for obj in FreeCAD.ActiveDocument.WireTrajectory.Group:
-            FreeCAD.ActiveDocument.removeObject(obj.Name)
-
-        FreeCAD.ActiveDocument.removeObject('WireTrajectory')
-
-    except:
-        pass
-
-    wire_tr_folder = FreeCAD.ActiveDocument.addObject('App::DocumentObjectGroup', 'WireTrajectory')
-    FreeCAD.ActiveDocument.HWS_Machine.addObject(wire_tr_folder)
-    
-    # retrieve machine shapes
-    XA = FreeCAD.ActiveDocument.XA
-    XB = FreeCAD.ActiveDocument.XB
-    YA = FreeCAD.ActiveDocument.YA
-    YB = FreeCAD.ActiveDocument.YB
-    # ofsets
-    xoff = FreeCAD.ActiveDocument.HWS_Machine.FrameDiameter*1.5*0
-    yoff = FreeCAD.ActiveDocument.HWS_Machine.FrameDiameter*1.8*0
-    wire_t_list = []
-    animation_delay = FreeCAD.ActiveDocument.HWS_Machine.AnimationDelay
-    #wire_trajectory = FreeCAD.ActiveDocument.addObject('Part::Feature','wire_tr')
-    #wire_tr_folder.addObject(wire_trajectory)
-    # n iterator (for wire color)
-    n = 0
-    # visualization color
-    vcolor = FreeCAD.ActiveDocument.WirePath.TrajectoryColor
-    # determine the first value for the wire color
-    if vcolor == 'Speed':
-        mxspeed = FreeCAD.ActiveDocument.WirePath.MaxCutSpeed
-        cpspeed = 4 #complete_raw_path[2][n][1]
-        wire_color = WireColor(cpspeed, mxspeed, 'Speed')
-
-    if vcolor == 'Temperature':
-        mxtemp = FreeCAD.ActiveDocument.WirePath.MaxWireTemp
-        cptemp = 4 #complete_raw_path[2][n][1]
-        wire_color = WireColor(cptemp, mxtemp, 'Temperature')
-
-    # animation loop
-    for i in range(0, len(machine_path[0])):
-        pa = machine_path[0][i]
-        pb = machine_path[1][i]
+# The animation is played by a QTimer so FreeCAD stays responsive. Every tick
+# the player looks at the wall clock, scales it to the estimated machine time
+# and jumps to the point the machine would be at, the trace of skipped points
+# is drawn in one go and the machine is moved once per tick.
+
+# player of the running (or paused) animation
+simulation_player = None
+
+
+class SimulationPlayer:
+    @HWS_Profile.profiled('simulation setup')
+    def __init__(self, route, time_scale=10.0, interval=0.01):
+        HWS_Machine = FreeCAD.ActiveDocument.HWS_Machine
+        route_commands = route.commands
+        Z0 = HWS_Machine.FrameDiameter*1.1*0
+        #print("Z0:",Z0)
+        ZL = HWS_Machine.ZLength
+        Z1 = ZL + Z0 - HWS_Machine.FrameDiameter*0.2
+        #print("Z1:",Z1)
+        # same cached projection as the G-Code export (planes 0 and ZLength),
+        # moved along the wire to the planes of the wire carriages
+        wire_A, wire_B = HWS_Projection.projectRoute(route.points, 0, ZL)
+        projected_A = HWS_Projection.pointsAtZ(wire_A, wire_B, 0, ZL, Z0)
+        projected_B = HWS_Projection.pointsAtZ(wire_A, wire_B, 0, ZL, Z1)
+
+        self.machine_path = (projected_A.tolist(), projected_B.tolist())
+        self.count = route.count
+
+        # estimated machine time at every point, the slowest side moves at
+        # cutting speed
+        import HWS_Foam
+        heat, speed = HWS_Foam.getFoamProperties(FreeCAD.ActiveDocument.WirePath)
+        if speed <= 0:
+            speed = 1.0
+        dA = np.linalg.norm(np.diff(projected_A, axis=0), axis=1)
+        dB = np.linalg.norm(np.diff(projected_B, axis=0), axis=1)
+        self.times = np.concatenate(([0.0], np.cumsum(np.maximum(dA, dB) / speed))).tolist()
+
+        self.colors = self.wireColors(route_commands)
+        self.time_scale = time_scale
+        self.interval = max(0, int(interval * 1000))
+
+        self.timer = None
+        self.clock_start = 0.0
+        self.machine_time = 0.0
+        self.drawn = -1
+        self.finished = False
+
+    def wireColors(self, route_commands):
+        # color of the wire at every point
+        colors = []
+        wire_color = (0.0, 0.0, 1.0)
+        # n iterator (for wire color)
+        n = 0
+        # visualization color
+        vcolor = FreeCAD.ActiveDocument.WirePath.TrajectoryColor
+        for i in range(self.count):
+            if n < len(route_commands) and i >= route_commands[n][0]:
+                # new route command, establish wire color
+                if vcolor == 'Speed':
+                    mxspeed = FreeCAD.ActiveDocument.WirePath.MaxCutSpeed
+                    cpspeed = 4 #route_commands[n][1]
+                    wire_color = WireColor(cpspeed, mxspeed, 'Speed')
+
+                if vcolor == 'Temperature':
+                    mxtemp = FreeCAD.ActiveDocument.WirePath.MaxWireTemp
+                    cptemp = 4 #route_commands[n][1]
+                    wire_color = WireColor(cptemp, mxtemp, 'Temperature')
+                n += 1  #out of range if range starts at 1
+            colors.append(wire_color)
+        return colors
+
+    def attach(self):
+        # document objects the frames draw on, without the GUI there is no
+        # trace to draw
+        try:
+            self.wire = FreeCAD.ActiveDocument.Wire
+        except:
+            self.wire = FreeCAD.ActiveDocument.addObject('Part::Feature', 'Wire')
+
+        # remove previous trajectory
+        wire_tr = getWireTrajectory()
+        self.trace = wire_tr.ViewObject.Proxy if FreeCAD.GuiUp else None
+
+        # retrieve machine shapes
+        self.XA = FreeCAD.ActiveDocument.XA
+        self.XB = FreeCAD.ActiveDocument.XB
+        self.YA = FreeCAD.ActiveDocument.YA
+        self.YB = FreeCAD.ActiveDocument.YB
+
+    def start(self):
+        from PySide import QtCore
+        self.attach()
+        self.timer = QtCore.QTimer()
+        self.timer.timeout.connect(self.tick)
+        self.resume()
+
+    def isRunning(self):
+        return self.timer != None and self.timer.isActive()
+
+    def pause(self):
+        if self.isRunning():
+            self.timer.stop()
+            self.machine_time = self.currentMachineTime()
+            FreeCAD.Console.PrintMessage('Simulation paused\n')
+
+    def resume(self):
+        if self.timer != None and not(self.finished):
+            self.clock_start = time.time()
+            self.timer.start(self.interval)
+
+    def stop(self):
+        if self.timer != None:
+            self.timer.stop()
+        self.finished = True
+
+    def currentMachineTime(self):
+        return self.machine_time + (time.time() - self.clock_start) * self.time_scale
+
+    def tick(self):
+        self.frame(self.currentMachineTime())
+
+    def frame(self, machine_time):
+        # draws the points reached at machine_time
+        if self.time_scale > 0:
+            target = bisect.bisect_right(self.times, machine_time) - 1
+        else:
+            # no time scale, show every point (one per frame)
+            target = self.drawn + 1
+        target = min(max(target, 0), self.count - 1)
+
+        if target > self.drawn:
+            self.showPoints(self.drawn + 1, target)
+            self.drawn = target
+
+        if self.drawn >= self.count - 1:
+            self.stop()
+            FreeCAD.Console.PrintMessage('Simulation finished\n')
+            returnHome()
+
+    def showPoints(self, first, last):
+        # draws the trace of points first..last and moves the machine to last
+        if self.trace != None:
+            self.trace.addSegments(self.machine_path[0][first:last + 1],
+                                   self.machine_path[1][first:last + 1],
+                                   self.colors[first:last + 1])
+        pa = FreeCAD.Vector(*self.machine_path[0][last])
+        pb = FreeCAD.Vector(*self.machine_path[1][last])
         # draw wire
-        w = Part.makeLine(pa, pb)
-        wire.Shape = w
-        wire.ViewObject.LineColor = wire_color
-        
-        #TODO make wire end points red when negative
-        #print(pa,pb)
-        
-        if i < complete_raw_path[2][n][0]:
-            # draw wire trajectory
-            wire_t_list.append(w)
-            wire_trajectory.Shape = Part.makeCompound(wire_t_list)
-            wire_trajectory.ViewObject.LineColor = wire_color
+        self.wire.Shape = Part.makeLine(pa, pb)
+        if FreeCAD.GuiUp:
+            self.wire.ViewObject.LineColor = self.colors[last]
 
-        else:
-            # create new wire trajectory object
-            wire_trajectory = FreeCAD.ActiveDocument.addObject('Part::Feature', 'wire_tr')
-            wire_tr_folder.addObject(wire_trajectory)
-            # reset compound list
-            wire_t_list = []
-            wire_t_list.append(w)
-            wire_trajectory.Shape = Part.makeCompound(wire_t_list)
-            # establish wire color
-            #print(n)
-            if vcolor == 'Speed':
-                mxspeed = FreeCAD.ActiveDocument.WirePath.MaxCutSpeed
-                #print(n,len(complete_raw_path[2][n]))
-                #print(complete_raw_path[2][n][1])
-                cpspeed = 4 #complete_raw_path[2][n][1]
-                wire_color = WireColor(cpspeed, mxspeed, 'Speed')
-
-            if vcolor == 'Temperature':
-                mxtemp = FreeCAD.ActiveDocument.WirePath.MaxWireTemp
-                cptemp = 4 #complete_raw_path[2][n][1]
-                wire_color = WireColor(cptemp, mxtemp, 'Temperature')
-            n += 1  #out of range if range starts at 1
-            # assign wire color
-            wire_trajectory.ViewObject.LineColor = wire_color
+        #TODO make wire end points red when negative
 
         # move machine ---------------------------------------------------
+        # ofsets
+        xoff = 0
+        yoff = 0
         # side A
         # -XA
-        base_XA = XA.Placement.Base
-        rot_XA = XA.Placement.Rotation
+        base_XA = self.XA.Placement.Base
+        rot_XA = self.XA.Placement.Rotation
         base_XA = FreeCAD.Vector(pa.x-xoff, base_XA.y, base_XA.z)
-        XA.Placement = FreeCAD.Placement(base_XA, rot_XA)
         # -YA
-        base_YA = YA.Placement.Base
-        rot_YA = YA.Placement.Rotation
         base_YA = FreeCAD.Vector(pa.x-xoff, pa.y-yoff, base_XA.z)
-        YA.Placement = FreeCAD.Placement(base_YA, rot_XA)
         # -XB
-        base_XB = XB.Placement.Base
-        rot_XB = XB.Placement.Rotation
+        base_XB = self.XB.Placement.Base
+        rot_XB = self.XB.Placement.Rotation
         base_XB = FreeCAD.Vector(pb.x-xoff, base_XB.y, base_XB.z)
-        XB.Placement = FreeCAD.Placement(base_XB, rot_XB)
         # -YB
-        base_YB = YB.Placement.Base
-        rot_YB = YB.Placement.Rotation
         base_YB = FreeCAD.Vector(pb.x-xoff, pb.y-yoff, base_XB.z)
-        YB.Placement = FreeCAD.Placement(base_YB, rot_XB)
-        # gui update -------------------------------------------------------
-        FreeCAD.Gui.updateGui()
-        time.sleep(animation_delay)
-        #input("Press Enter to continue...")
+        # the scene is redrawn once when the tick returns to the event loop
+        self.XA.Placement = FreeCAD.Placement(base_XA, rot_XA)
+        self.YA.Placement = FreeCAD.Placement(base_YA, rot_XA)
+        self.XB.Placement = FreeCAD.Placement(base_XB, rot_XB)
+        self.YB.Placement = FreeCAD.Placement(base_YB, rot_XB)
 
 
-def projectEdgeToTrajectory(PA, PB, Z0, Z1):
-    # aux function of runSimulation
-    # projects shape points to machine workplanes
-    
-    # DONE fix so wire streches out to match machine width (ZLength)
-    
-    pa = FreeCAD.Vector(PA[0], PA[1], PA[2])
-    pb = FreeCAD.Vector(PB[0], PB[1], PB[2])
-    #line_vector = FreeCAD.Vector(PA[0]-PB[0], PA[1]-PB[1], PA[2]-PB[2]).normalize()
-    #print(pa + line_vector*(pa[2] - Z0), " - ", line_vector*(pa[2] - Z0))
-    #input("press enter\n")
-    
-    vx = pb[2] - pa[2] #z
-    vy = pb[1] - pa[1] #y
-    vz = pb[0] - pa[0] #x
-
-    scale = -(pa[2] - Z0) / vx
-    newA_y = pa[1] + vy * scale
-    newA_z = pa[0] + vz * scale
-
-    scale = -(pb[2] - Z1) / vx
-    newB_y = pb[1] + vy * scale
-    newB_z = pb[0] + vz * scale
+def runSimulation(complete_raw_path):
+    # starts the animation and returns without waiting for it to finish
+    global simulation_player
+    stopSimulation()
+    HWS_Machine = FreeCAD.ActiveDocument.HWS_Machine
+    route = HWS_RawPath.asRawPath(complete_raw_path)
+    if route.count == 0:
+        return None
+    # the profile report covers the setup, the frames run later from the
+    # event loop and are left out
+    with HWS_Profile.command('Simulation'):
+        simulation_player = SimulationPlayer(route,
+                                             getattr(HWS_Machine, 'AnimationTimeScale', 10.0),
+                                             HWS_Machine.AnimationDelay)
+        simulation_player.start()
+    return simulation_player
+
+
+def toggleSimulation():
+    # pause a running animation or resume a paused one, returns False if there
+    # is no animation to pause or resume
+    player = simulation_player
+    if player == None or player.finished:
+        return False
+    if player.isRunning():
+        player.pause()
+    else:
+        player.resume()
+    return True
+
+
+def stopSimulation():
+    global simulation_player
+    if simulation_player != None:
+        simulation_player.stop()
+        simulation_player = None
 
-    new_pa = FreeCAD.Vector(newA_z, newA_y, Z0)
-    new_pb = FreeCAD.Vector(newB_z, newB_y, Z1)
 
-    return new_pa, new_pb
+def projectEdgeToTrajectory(PA, PB, Z0, Z1):
+    # aux function of runSimulation
+    # projects shape points to machine workplanes, see hws_core.projection
+    new_pa, new_pb = HWS_Projection.projectPoint(PA, PB, Z0, Z1)
+    return FreeCAD.Vector(*new_pa), FreeCAD.Vector(*new_pb)
 
 
 def WireColor(value, crange, ctype):
@@ -490,9 +722,14 @@ def delWithChildren(obj):
 
 def clearWireTrack():
     
+    stopSimulation()
     group_obj = FreeCAD.ActiveDocument.getObject('WireTrajectory')
     if group_obj != None:
-        delWithChildren(FreeCAD.ActiveDocument.getObject('WireTrajectory'))
+        if isWireTrajectory(group_obj):
+            if FreeCAD.GuiUp:
+                group_obj.ViewObject.Proxy.clear()
+        else:
+            delWithChildren(group_obj)
         #delWithChildren(FreeCAD.ActiveDocument.getObject('Wire'))
         returnHome()
         FreeCAD.ActiveDocument.getObject('HWS_Machine').ClearTrajectory = False
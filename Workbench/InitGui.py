@@ -44,6 +44,7 @@ class HWS_Workbench(Workbench):
         self.tools = ['CreateHWSMachine',
                       'CreateToolPath',
                       'CreatePathLink',
+                      'PlanCutOrder',
                       'SaveGCode',
                       'CutGCode',
                       'RunPathSimulation',
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+# FreeCAD independent kernel of the workbench: paths as (N, 2, 3) arrays,
+# projection to the machine, kerf offset, arc fitting, feed planning,
+# collision check, cut order and G-Code generation. Everything only needs
+# numpy, takes plain arrays and config lists and keeps no document state, so
+# it can run in worker processes or outside FreeCAD.
+# The HWS_* modules of the workbench read the document and call into it.
+
+from . import rawpath
+from . import spatial
+from . import cache
+from . import collision
+from . import arcs
+from . import feed
+from . import offset
+from . import projection
+from . import gcode
+from . import ordering
+from . import profiling
+from . import workers
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+# Arc fitting of the projected wire trajectory for G2/G3 export.
+# A run of points is replaced by one arc move when side A follows a circle
+# within tolerance and side B moves the way the controller takes it:
+#   congruent  the controller cuts the same arc (same I J, from its own start)
+#              on the AZ plane, side B has to be the side A run moved by a
+#              constant offset. The case of untapered sections: ribs, round
+#              profiles, constant chord wings
+#   otherwise  the A and Z axes move in a straight line in step with the
+#              angle of side A (G17 arcs of grbl-mega-5x), side B has to stay
+#              on that chord
+
+import numpy as np
+
+
+# fewest moves worth replacing by an arc
+ARC_MIN_MOVES = 3
+# radius above which a run is treated as a straight line
+ARC_MAX_RADIUS = 10000.0
+
+
+def circleFrom3Points(p1, p2, p3):
+    # center and radius of the circle through three XY points, None if they
+    # are collinear
+    ax, ay = p1
+    bx, by = p2
+    cx, cy = p3
+    d = 2.0 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    if abs(d) < 1e-12:
+        return None, None
+    a2 = ax * ax + ay * ay
+    b2 = bx * bx + by * by
+    c2 = cx * cx + cy * cy
+    ux = (a2 * (by - cy) + b2 * (cy - ay) + c2 * (ay - by)) / d
+    uy = (a2 * (cx - bx) + b2 * (ax - cx) + c2 * (bx - ax)) / d
+    center = np.array([ux, uy])
+    return center, float(np.linalg.norm(np.asarray(p1) - center))
+
+
+def fitArc(xy_A, xy_B, s, e, tolerance, congruent=False):
+    # (center, ccw) of the arc from point s to point e if side A fits it and
+    # side B the same arc (congruent) or the chord the controller moves it on
+    # within tolerance, otherwise None
+    run_A = xy_A[s:e + 1]
+    center, radius = circleFrom3Points(run_A[0], run_A[(e - s) // 2], run_A[-1])
+    if center is None or radius > ARC_MAX_RADIUS:
+        return None
+    rel = run_A - center
+    if np.abs(np.hypot(rel[:, 0], rel[:, 1]) - radius).max() > tolerance:
+        return None
+    # every move has to turn the same way and less than half a turn, the
+    # whole arc less than a full turn
+    step = np.arctan2(rel[:-1, 0] * rel[1:, 1] - rel[:-1, 1] * rel[1:, 0],
+                      (rel[:-1] * rel[1:]).sum(axis=1))
+    if not (np.all(step > 0) or np.all(step < 0)):
+        return None
+    if abs(step.sum()) >= 2 * np.pi - 1e-6:
+        return None
+    # sagitta of the moves, the arc must not bulge away from the polyline
+    if radius - radius * np.cos(np.abs(step).max() / 2) > tolerance:
+        return None
+    run_B = xy_B[s:e + 1]
+    if congruent:
+        # side B on the same arc around its own start
+        moved = run_A + (run_B[0] - run_A[0])
+        if np.hypot(*(run_B - moved).T).max() > tolerance:
+            return None
+        return center, bool(step[0] > 0)
+    # side B at the same fraction of the arc angle along its chord
+    fraction = np.concatenate(([0.0], np.cumsum(step) / step.sum()))
+    chord = run_B[0] + fraction[:, None] * (run_B[-1] - run_B[0])
+    if np.hypot(*(run_B - chord).T).max() > tolerance:
+        return None
+    return center, bool(step[0] > 0)
+
+
+def fitArcs(xy_A, xy_B, tolerance, groups=None, min_moves=ARC_MIN_MOVES, congruent=False):
+    # arcs found along the (N, 2) projected trajectories as
+    # {first move: (last point, center A, ccw)}, the move to point i starts at
+    # point i - 1. Runs never cross a change of groups (route owner).
+    # congruent -> the controller cuts side B on the same arc (see fitArc)
+    xy_A = np.asarray(xy_A, dtype=float)
+    xy_B = np.asarray(xy_B, dtype=float)
+    n = len(xy_A)
+    arcs = {}
+    s = 0
+    while s + min_moves < n:
+        if groups is not None and groups[s + 1] != groups[s + min_moves]:
+            s += 1
+            continue
+        e = s + min_moves
+        fit = fitArc(xy_A, xy_B, s, e, tolerance, congruent)
+        if fit is None:
+            s += 1
+            continue
+        # grow the run while it still fits, doubling and then bisecting
+        good = e
+        step = min_moves
+        while True:
+            e = min(good + step, n - 1)
+            if e == good or (groups is not None and groups[e] != groups[s + 1]):
+                break
+            candidate = fitArc(xy_A, xy_B, s, e, tolerance, congruent)
+            if candidate is None:
+                break
+            good, fit = e, candidate
+            step *= 2
+        low, high = good, e
+        while high - low > 1:
+            mid = (low + high) // 2
+            candidate = None
+            if groups is None or groups[mid] == groups[s + 1]:
+                candidate = fitArc(xy_A, xy_B, s, mid, tolerance, congruent)
+            if candidate is None:
+                high = mid
+            else:
+                low, fit = mid, candidate
+        arcs[s + 1] = (low, fit[0], fit[1])
+        s = low
+    return arcs
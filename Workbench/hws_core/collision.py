@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+
+# Collision check of the wire against the base plate and clamps.
+# Between two consecutive positions the wire sweeps a ruled quad
+# (A[i], B[i], B[i+1], A[i+1]) that is split in two triangles. The triangles
+# are tested against axis aligned boxes with the separating axis theorem, all
+# triangles at once, after a bounding box broad phase.
+# The same test against the foam stock tells which moves go through air.
+
+import numpy as np
+
+
+def sweptTriangles(wire_A, wire_B):
+    # (2 * (N - 1), 3, 3) triangles of the surface swept by the wire,
+    # triangles 2i and 2i + 1 belong to the segment from position i to i + 1
+    a = np.asarray(wire_A, dtype=float).reshape(-1, 3)
+    b = np.asarray(wire_B, dtype=float).reshape(-1, 3)
+    if len(a) == 1:
+        # the wire never moves, check it as a degenerated triangle
+        return np.stack((a, b, b), axis=1)
+    tris = np.empty((len(a) - 1, 2, 3, 3))
+    tris[:, 0, 0] = a[:-1]
+    tris[:, 0, 1] = b[:-1]
+    tris[:, 0, 2] = b[1:]
+    tris[:, 1, 0] = a[:-1]
+    tris[:, 1, 1] = b[1:]
+    tris[:, 1, 2] = a[1:]
+    return tris.reshape(-1, 3, 3)
+
+
+def trianglesHitBox(tris, box, tolerance=0.001):
+    # True for every triangle that intersects the box, touching the box or
+    # entering it less than tolerance is not a hit
+    center = (box[0] + box[1]) / 2
+    half = np.maximum((box[1] - box[0]) / 2 - tolerance, 0)
+    hit = np.zeros(len(tris), dtype=bool)
+
+    # box axes, same as comparing bounding boxes
+    v = tris - center
+    broad = np.all((v.min(axis=1) <= half) & (v.max(axis=1) >= -half), axis=1)
+    candidates = np.flatnonzero(broad)
+    if not len(candidates):
+        return hit
+
+    v = v[candidates]
+    edges = np.stack((v[:, 1] - v[:, 0], v[:, 2] - v[:, 1], v[:, 0] - v[:, 2]), axis=1)
+    separated = np.zeros(len(v), dtype=bool)
+
+    # triangle normal
+    axes = [np.cross(edges[:, 0], edges[:, 1])]
+    # cross products of the box axes and the triangle edges
+    for k in range(3):
+        box_axis = np.zeros(3)
+        box_axis[k] = 1
+        for j in range(3):
+            axes.append(np.cross(box_axis, edges[:, j]))
+
+    for axis in axes:
+        p = np.einsum('tvc,tc->tv', v, axis)
+        r = np.abs(axis) @ half
+        separated |= (p.min(axis=1) > r) | (p.max(axis=1) < -r)
+
+    hit[candidates] = ~separated
+    return hit
+
+
+def collidingSegments(wire_A, wire_B, boxes, tolerance=0.001):
+    # indexes i of the wire segments (position i to i + 1) that hit any box,
+    # wire_A and wire_B are the (N, 3) wire end positions in machine space
+    tris = sweptTriangles(wire_A, wire_B)
+    hit = np.zeros(len(tris), dtype=bool)
+    for box in boxes:
+        hit |= trianglesHitBox(tris, np.asarray(box, dtype=float), tolerance)
+    if len(np.asarray(wire_A).reshape(-1, 3)) == 1:
+        return np.flatnonzero(hit)
+    return np.flatnonzero(hit.reshape(-1, 2).any(axis=1))
+
+
+def movesInAir(wire_A, wire_B, stock_boxes, margin=1.0):
+    # True for every move that stays outside all stock boxes grown by margin.
+    # Move i goes from position i - 1 to i, move 0 is the wire standing at
+    # position 0, so the result lines up with the moves of the G-Code
+    a = np.asarray(wire_A, dtype=float).reshape(-1, 3)
+    b = np.asarray(wire_B, dtype=float).reshape(-1, 3)
+    in_air = np.ones(len(a), dtype=bool)
+    if not len(a) or not len(stock_boxes):
+        return in_air
+    # negative tolerance grows the boxes
+    if len(a) > 1:
+        in_air[collidingSegments(a, b, stock_boxes, -margin) + 1] = False
+    in_air[0] = not len(collidingSegments(a[:1], b[:1], stock_boxes, -margin))
+    return in_air
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+# Feed planning per move of the wire.
+# Every move gets the shortest duration where
+#   - the wire end that moves furthest on the foam stays at the cut speed,
+#     moves in air (in_air mask) may go at the air speed instead, the max
+#     table speed when no air speed is given
+#   - no axis (X, Y, A, Z) moves faster than the max table speed
+# so the job is no longer cut at the speed of the slowest case everywhere.
+
+import numpy as np
+
+
+# shortest move duration in seconds, keeps the feed of zero length moves finite
+MIN_MOVE_TIME = 1e-6
+
+
+def planMoves(dist_A, dist_B, axes, cut_speed, max_speed, in_air=None, air_speed=None, start=None):
+    # dist_A, dist_B -> (N,) length of every move on the foam at side A and B
+    # axes -> (N, 4) X Y A Z machine position after every move
+    # in_air -> (N,) True for the moves outside the foam stock
+    # start -> X Y A Z position the first move starts at, machine zero (the
+    #          origin xyDistances measures the first move from) by default
+    # returns (durations in seconds, XYAZ lengths) of the N moves
+    dist_A = np.asarray(dist_A, dtype=float)
+    dist_B = np.asarray(dist_B, dtype=float)
+    axes = np.asarray(axes, dtype=float)
+    if start is None:
+        start = np.zeros(4)
+    delta = np.abs(np.diff(axes, axis=0, prepend=np.reshape(np.asarray(start, dtype=float), (1, 4))))
+
+    speed = np.full(len(dist_A), float(cut_speed))
+    if in_air is not None:
+        if not air_speed or air_speed <= 0:
+            air_speed = max_speed if max_speed > 0 else cut_speed
+        speed[np.asarray(in_air, dtype=bool)] = air_speed
+    durations = np.maximum(dist_A, dist_B) / speed
+    if max_speed > 0:
+        durations = np.maximum(durations, delta.max(axis=1) / max_speed)
+    durations = np.maximum(durations, MIN_MOVE_TIME)
+    return durations, np.linalg.norm(delta, axis=1)
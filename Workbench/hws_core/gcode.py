@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+# G-Code for grbl based 4 axis foam cutters from plain arrays.
+# The program is generated one line at a time so it never has to be held in
+# memory, every input is a list or array, no document is needed.
+
+import re
+import numpy as np
+
+
+AXIS_NAMES = ['X', 'Y', 'A', 'Z']
+
+
+def initLines(G93):
+    if G93:
+        return ['G21\n', 'G17\n', 'G90\n', 'G93\n']
+    return ['G21\n', 'G17\n', 'G90\n', 'G94\n']
+
+
+def finalLines():
+    return ['M5\n', 'G94']
+
+
+def xyDistances(points, zero_xy):
+    # distance moved in the XY plane by every point of the (N, 3) points, the
+    # first move starts at zero_xy
+    points = np.asarray(points, dtype=float)
+    return np.linalg.norm(points[:, :2] - np.vstack(([zero_xy], points[:-1, :2])), axis=1)
+
+
+def inverseTimeFeed(distance, speed):
+    # G93 feed of a move of distance at speed (units per second)
+    return 1 / ((distance / speed) / 60)
+
+
+def formatAxes(position, axis_name=AXIS_NAMES):
+    # 'X x Y y A a Z z' of a machine position
+    return (axis_name[0]+' '+str(round(position[0], 6)) + ' ' +
+            axis_name[1]+' '+str(round(position[1], 6)) + ' ' +
+            axis_name[2]+' '+str(round(position[2], 6)) + ' ' +
+            axis_name[3]+' '+str(round(position[3], 6)))
+
+
+def iterGCodeLines(axes, dist_A, dist_B, owner_index, owner_lengths, heat, speed, G93,
+                   arcs=None, move_times=None, move_lengths=None, axis_name=AXIS_NAMES, rapids=None,
+                   precision=6):
+    # axes -> (N, 4) X Y A Z machine position of every point
+    # dist_A, dist_B -> length of the move to every point on side A and B
+    # owner_index -> owner of every point, owner_lengths -> [A, B] profile
+    #                lengths of every owner
+    # heat, speed -> foam settings, G93 -> inverse time feed
+    # arcs -> {first move: (last point, center, ccw)} from arcs.fitArcs
+    # move_times, move_lengths -> planned moves from feed.planMoves, every move
+    #                             gets its own feed
+    # rapids -> True for the moves written as G0 (travel outside the foam)
+    # Moves that go nowhere (same position as written before, the first move
+    # without distance from machine zero) are left out, they would need a
+    # zero (G94) or infinite (G93) feed
+    # precision -> decimals the positions end up with in the file, arc
+    #              centers are given from the start point the controller reads
+    axes = np.asarray(axes, dtype=float).tolist()
+    dist_A = list(dist_A)
+    dist_B = list(dist_B)
+    if arcs is None:
+        arcs = {}
+    feed_planning = move_times is not None
+    if feed_planning:
+        move_times = list(move_times)
+        move_lengths = list(move_lengths)
+
+    for line in initLines(G93):
+        yield line
+    f = ''
+    f_G93 = ''
+    arc_end = -1
+    written = None
+    for i in range(len(axes)):
+        if i <= arc_end:
+            # point already reached by an arc move
+            continue
+        arc = arcs.get(i)
+        last = i
+        if arc:
+            last = arc[0]
+
+        new_owner = i < 1 or owner_index[i] != owner_index[i - 1]
+        position = formatAxes(axes[last], axis_name)
+        if i < 1:
+            still = not(arc) and dist_A[i] == 0 and dist_B[i] == 0
+        else:
+            still = not(arc) and position == written
+
+        if not(G93) and new_owner:
+            h = 'M3 S' + str(heat) + '\n'
+            f = 'G1 F '+str(speed) + '\n'
+        elif G93 and not(still):
+            dA = sum(dist_A[i:last + 1])
+            dB = sum(dist_B[i:last + 1])
+
+            profileALength, profileBLength = owner_lengths[owner_index[i]]
+            if profileALength >= profileBLength:
+                f_G93 = ' F '+str(inverseTimeFeed(dA, speed))
+            else:
+                f_G93 = ' F '+str(inverseTimeFeed(dB, speed))
+
+            if i > 0:
+                h = ''
+            else:
+                h = 'M3 S' + str(heat) + '\n'
+        elif G93 and i < 1:
+            h = 'M3 S' + str(heat) + '\n'
+        else:
+            h = ''
+            f = ''
+            f_G93 = ''
+
+        if feed_planning:
+            # own feed on every move, F is inverse time in G93. A G94 move
+            # without length keeps the feed of the move before
+            move_time = sum(move_times[i:last + 1])
+            f = ''
+            f_G93 = ''
+            if G93:
+                f_G93 = ' F '+str(60 / move_time)
+            elif sum(move_lengths[i:last + 1]) > 0:
+                f_G93 = ' F '+str(sum(move_lengths[i:last + 1]) / move_time)
+
+        if arc:
+            arc_end = last
+
+        if h:
+            yield h
+        if f:
+            yield f
+        if still:
+            continue
+        written = position
+        if rapids is not None and rapids[i] and not arc:
+            yield 'G0 ' + position + '\n'
+        elif arc:
+            # center relative to the start point as written, side B moves
+            # on the same arc from its own start or on the chord, depending
+            # on the controller (arcs.fitArcs)
+            start = [round(v, precision) for v in axes[i - 1][:2]]
+            I = ' I '+str(round(arc[1][0] - start[0], precision))
+            J = ' J '+str(round(arc[1][1] - start[1], precision))
+            yield ('G3 ' if arc[2] else 'G2 ') + position + I + J + f_G93 + '\n'
+        else:
+            yield 'G1 ' + position + f_G93 + '\n'
+
+    for line in finalLines():
+        yield line
+
+
+# word of a G-Code line, letter and number ('X -1.5', 'F 4.0', 'I 1e-05')
+WORD = re.compile(r'([A-Z])\s*([-+]?[0-9.]+(?:e[-+]?[0-9]+)?)')
+# modal groups kept by compactLines, the word is only written when it changes
+MODAL_GROUPS = {'G17': 'plane', 'G18': 'plane', 'G19': 'plane',
+                'G20': 'units', 'G21': 'units',
+                'G90': 'distance', 'G91': 'distance',
+                'G93': 'feed', 'G94': 'feed'}
+
+
+def fixedPoint(value, precision):
+    # value with at most precision decimals, no trailing zeros
+    text = '%.*f' % (precision, float(value))
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    if text in ('-0', ''):
+        text = '0'
+    return text
+
+
+def compactLines(lines, precision=3, axis_name=AXIS_NAMES):
+    # rewrites G-Code lines without the words that don't change anything:
+    # repeated motion (G1) and modal words, axes at the same position, M3 with
+    # the same heat and F with the same feed (G94, in G93 every move needs F).
+    # Numbers get precision decimals at most and the spaces are removed.
+    # A standalone 'G1 F' line is merged into the next G1/G2/G3 move
+    state = {}
+    motion = None
+    position = {}
+    feed = None
+    pending_feed = None
+    heat = None
+    for line in lines:
+        end = '\n' if line.endswith('\n') else ''
+        text = line.strip()
+        if not text:
+            continue
+        if '(' in text:
+            # comments and messages are kept as they are
+            yield text + end
+            continue
+        words = WORD.findall(text)
+        letters = [w[0] for w in words]
+
+        if letters[0] == 'M':
+            code = int(float(words[0][1]))
+            if code == 3:
+                s = fixedPoint(words[1][1], precision) if len(words) > 1 else None
+                if heat == s:
+                    continue
+                heat = s
+            elif code in (5, 2, 30):
+                heat = None
+            yield ''.join(w[0] + fixedPoint(w[1], precision) if w[0] == 'S' else w[0] + w[1] for w in words) + end
+            continue
+
+        if letters[0] == 'G' and int(float(words[0][1])) not in (0, 1, 2, 3):
+            g = 'G' + str(int(float(words[0][1])))
+            group = MODAL_GROUPS.get(g)
+            if group and state.get(group) == g:
+                continue
+            if group:
+                state[group] = g
+            yield ''.join(w[0] + w[1] for w in words) + end
+            continue
+
+        # move, words after the motion word
+        out = ''
+        word_motion = motion
+        values = {}
+        for letter, value in words:
+            if letter == 'G':
+                word_motion = 'G' + str(int(float(value)))
+            else:
+                values[letter] = fixedPoint(value, precision)
+
+        axes = ''
+        for letter in axis_name:
+            if letter in values and position.get(letter) != values[letter]:
+                axes += letter + values[letter]
+                position[letter] = values[letter]
+        center = ''.join(letter + values[letter] for letter in ('I', 'J') if letter in values)
+
+        if 'F' in values:
+            pending_feed = values['F']
+        if not axes and not center:
+            # nothing moves (or only the feed was set), keep the feed for the next move
+            continue
+
+        if word_motion != motion:
+            out += word_motion
+            motion = word_motion
+        out += axes + center
+        if word_motion != 'G0':
+            # rapids don't use the feed, it waits for the next feed move
+            if pending_feed is not None and (state.get('feed') == 'G93' or pending_feed != feed):
+                out += 'F' + pending_feed
+                feed = pending_feed
+            pending_feed = None
+        yield out + end
+
+
+def countLines(point_count, owner_count, G93):
+    # number of lines written by iterGCodeLines without arcs, init and final
+    # lines, one G1 line per point plus the M3 (and F) lines written when a
+    # new object starts
+    if G93:
+        return 4 + point_count + 1 + 2
+    return 4 + point_count + 2 * owner_count + 2
@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+# Kerf offset of the closed side A and side B polylines of a part.
+# A convex vertex is moved to the corner of the offset lines of its two
+# segments (miter), corners where the miter would be longer than
+# OFFSET_MITER_LIMIT kerfs get more points instead, on the polygon around
+# the kerf circle of the vertex. A concave vertex gets the ends of both
+# offset segments. The loops this raw path makes where it crosses itself
+# (concave corners, features smaller than the kerf) are cut off by keeping
+# only the pieces between crossings that don't come closer to the part than
+# the kerf. Side A and B get the same number of points at every vertex and
+# stay in step, trimmed points are moved rather than dropped.
+# Near duplicate points are dropped first (on both sides at once) and zero
+# length segments take the direction of their neighbours.
+
+import numpy as np
+
+
+# points closer than this on both sides are merged
+OFFSET_MERGE_DISTANCE = 0.001
+# max length of a miter in kerfs, sharper corners get more points
+OFFSET_MITER_LIMIT = 2.0
+# points measured at once in polylineDistances
+OFFSET_DISTANCE_CHUNK = 256
+# kept pieces trimLoops tries to start its walk on
+OFFSET_WALK_STARTS = 8
+
+
+def mergeDuplicates(A, B, eps=OFFSET_MERGE_DISTANCE):
+    # drops points of the closed polylines A and B (N, 3) that are within eps
+    # of the previous point on both sides, the closing point included
+    A = np.asarray(A, dtype=float)
+    B = np.asarray(B, dtype=float)
+    keep = np.ones(len(A), dtype=bool)
+    if len(A) > 1:
+        near = ((np.linalg.norm(A - np.roll(A, 1, axis=0), axis=1) < eps) &
+                (np.linalg.norm(B - np.roll(B, 1, axis=0), axis=1) < eps))
+        keep[1:] = ~near[1:]
+        # closing point equal to the first one
+        if near[0]:
+            keep[-1] = False
+    return A[keep], B[keep]
+
+
+def signedArea(P):
+    # XY area of the closed polyline P, positive if counter clockwise
+    x = P[:, 0]
+    y = P[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def segmentDirections(P, eps=OFFSET_MERGE_DISTANCE):
+    # unit XY direction of the segment leaving every vertex of the closed
+    # polyline P, zero length segments get the direction of the next segment.
+    # Returns (incoming, outgoing) directions of every vertex
+    seg = np.roll(P[:, :2], -1, axis=0) - P[:, :2]
+    length = np.hypot(seg[:, 0], seg[:, 1])
+    valid = length >= eps
+    n = len(P)
+    if not valid.any():
+        raise ValueError('polyline has no segment longer than ' + str(eps))
+    direction = np.zeros_like(seg)
+    direction[valid] = seg[valid] / length[valid, None]
+    index = np.arange(n)
+    # first valid segment at or after every segment (cyclic)
+    valid_index = np.where(valid, index, 2 * n)
+    following = np.minimum.accumulate(np.concatenate((valid_index, valid_index + n))[::-1])[::-1][:n] % n
+    # last valid segment at or before every segment (cyclic)
+    valid_index = np.where(valid, index, -1)
+    preceding = np.maximum.accumulate(np.concatenate((valid_index - n, valid_index)))[n:] % n
+    outgoing = direction[following]
+    incoming = np.roll(direction[preceding], 1, axis=0)
+    return incoming, outgoing
+
+
+def cornerTurns(P, distance):
+    # (start angle, signed turn, gap) of the offset corner at every vertex of
+    # the closed polyline P. The corner turns from the offset direction of
+    # the incoming segment to that of the outgoing one, gap is True where the
+    # offset lines don't meet (convex side), a full turn back is a gap
+    incoming, outgoing = segmentDirections(P)
+    side = 1.0 if (signedArea(P) >= 0) == (distance >= 0) else -1.0
+    # right hand normals point outwards of a counter clockwise polyline
+    m_in = side * np.column_stack((incoming[:, 1], -incoming[:, 0]))
+    m_out = side * np.column_stack((outgoing[:, 1], -outgoing[:, 0]))
+    cross = m_in[:, 0] * m_out[:, 1] - m_in[:, 1] * m_out[:, 0]
+    dot = (m_in * m_out).sum(axis=1)
+    turn = np.arctan2(cross, dot)
+    back = 1.0 + dot < 1e-9
+    # around the tip of a full turn back, on the side the path came from
+    towards = m_in[:, 0] * incoming[:, 1] - m_in[:, 1] * incoming[:, 0]
+    turn[back] = np.where(towards[back] < 0, -np.pi, np.pi)
+    gap = ((m_in * outgoing).sum(axis=1) < 0) | back
+    return np.arctan2(m_in[:, 1], m_in[:, 0]), turn, gap
+
+
+def cornerCounts(turn, gap, miter_limit=OFFSET_MITER_LIMIT):
+    # number of offset points of every corner: a convex corner gets enough
+    # points to keep the miter of every piece within the limit, a concave
+    # corner the ends of both offset segments
+    max_turn = 2 * np.arccos(1.0 / max(miter_limit, 1.0))
+    counts = np.full(len(turn), 2, dtype=int)
+    if max_turn > 0:
+        counts[gap] = np.maximum(np.ceil(np.abs(turn[gap]) / max_turn - 1e-9), 1).astype(int)
+    else:
+        counts[gap] = 1
+    return counts
+
+
+def cornerPoints(P, distance, corners, counts):
+    # raw offset points of the closed polyline P, counts[i] points for vertex
+    # i (at least the count cornerCounts gives this side). A convex corner
+    # turned in counts[i] pieces gets the corners of the polygon around its
+    # kerf circle, every segment touches the circle, one piece is the plain
+    # miter. A concave corner gets the end of the incoming and the start of
+    # the outgoing offset segment, they cross and trimLoops cuts them back
+    index = np.repeat(np.arange(len(P)), counts)
+    offset = P[index].copy()
+    if distance == 0 or not len(P):
+        return offset
+    start, turn, gap = corners
+    piece = np.arange(len(index)) - np.repeat(np.cumsum(counts) - counts, counts)
+    pieces = counts[index]
+    h = turn[index] / pieces
+    angle = np.where(gap[index], start[index] + (piece + 0.5) * h,
+                     np.where(piece == 0, start[index], start[index] + turn[index]))
+    radius = np.where(gap[index], abs(distance) / np.maximum(np.cos(h / 2), 1e-12), abs(distance))
+    offset[:, 0] += radius * np.cos(angle)
+    offset[:, 1] += radius * np.sin(angle)
+    return offset
+
+
+def crossings(P, eps=1e-9):
+    # (i, j, t, u) of the segments i < j of the closed polyline P that
+    # cross in the XY plane, t and u are the positions on segment i and j.
+    # Neighbouring and zero length segments are left out, touching ends
+    # don't count. Segments running over each other in the same direction
+    # cross where j starts
+    a = P[:, :2]
+    d = np.roll(a, -1, axis=0) - a
+    n = len(a)
+    length = np.hypot(d[:, 0], d[:, 1])
+    live = length > OFFSET_MERGE_DISTANCE
+    low = np.minimum(a, a + d) - OFFSET_MERGE_DISTANCE
+    high = np.maximum(a, a + d) + OFFSET_MERGE_DISTANCE
+    # pairs with overlapping bounding boxes, sweep over the segments sorted
+    # by their lowest x
+    order = np.argsort(low[:, 0], kind='stable')
+    end = np.searchsorted(low[order, 0], high[order, 0], side='right')
+    start = np.arange(1, n + 1)
+    counts = np.maximum(end - start, 0)
+    first = np.repeat(np.arange(n), counts)
+    second = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + start[first]
+    i = np.minimum(order[first], order[second])
+    j = np.maximum(order[first], order[second])
+    near = ((j > i + 1) & ~((i == 0) & (j == n - 1)) & live[i] & live[j] &
+            (low[i, 1] <= high[j, 1]) & (low[j, 1] <= high[i, 1]))
+    i = i[near]
+    j = j[near]
+    di = d[i]
+    dj = d[j]
+    w = a[j] - a[i]
+    denom = di[:, 0] * dj[:, 1] - di[:, 1] * dj[:, 0]
+    side = w[:, 0] * di[:, 1] - w[:, 1] * di[:, 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (w[:, 0] * dj[:, 1] - w[:, 1] * dj[:, 0]) / denom
+        u = side / denom
+        # start of j on segment i
+        along = (w * di).sum(axis=1) / length[i] ** 2
+    parallel = np.abs(denom) <= 1e-12 * length[i] * length[j]
+    crossing = ~parallel & (t > eps) & (t < 1 - eps) & (u > eps) & (u < 1 - eps)
+    overlap = (parallel & (np.abs(side) <= OFFSET_MERGE_DISTANCE * length[i]) &
+               ((di * dj).sum(axis=1) > 0) & (along > eps) & (along < 1 - eps))
+    t = np.where(overlap, along, t)
+    u = np.where(overlap, 0.0, u)
+    hit = np.flatnonzero(crossing | overlap)
+    return list(zip(i[hit].tolist(), j[hit].tolist(), t[hit].tolist(), u[hit].tolist()))
+
+
+def polylineDistances(points, P, radius=None):
+    # XY distance of every point to the closed polyline P. With a radius
+    # only the segments closer than about radius are measured, points
+    # further away than radius from all of them get inf
+    a = P[:, :2]
+    d = np.roll(a, -1, axis=0) - a
+    dd = np.maximum((d * d).sum(axis=1), 1e-18)
+    if radius != None:
+        return nearDistances(points[:, :2], a, d, dd, radius)
+    result = np.empty(len(points))
+    for first in range(0, len(points), OFFSET_DISTANCE_CHUNK):
+        p = points[first:first + OFFSET_DISTANCE_CHUNK, None, :2]
+        t = np.clip(((p - a) * d).sum(axis=-1) / dd, 0.0, 1.0)
+        q = a + t[..., None] * d
+        result[first:first + OFFSET_DISTANCE_CHUNK] = np.hypot(*(p - q).transpose(2, 0, 1)).min(axis=1)
+    return result
+
+
+def nearDistances(p, a, d, dd, radius):
+    # polylineDistances of the points p to the segments a + d limited to
+    # radius: the segments are put in the square cells their box grown by
+    # radius covers, every point is measured to the segments of its cell
+    result = np.full(len(p), np.inf)
+    if not len(p) or not len(a):
+        return result
+    size = max(radius, np.median(np.sqrt(dd)), 1e-9)
+    low = np.floor((np.minimum(a, a + d) - radius) / size).astype(np.int64)
+    high = np.floor((np.maximum(a, a + d) + radius) / size).astype(np.int64)
+    span = high - low + 1
+    cells = span[:, 0] * span[:, 1]
+    segment = np.repeat(np.arange(len(a)), cells)
+    k = np.arange(len(segment)) - np.repeat(np.cumsum(cells) - cells, cells)
+    cx = low[segment, 0] + k // span[segment, 1]
+    cy = low[segment, 1] + k % span[segment, 1]
+    base = np.minimum(low.min(axis=0), np.floor(p.min(axis=0) / size).astype(np.int64))
+    width = max(high[:, 1].max(), int(np.floor(p[:, 1].max() / size))) - base[1] + 1
+    key = (cx - base[0]) * width + (cy - base[1])
+    order = np.argsort(key, kind='stable')
+    key = key[order]
+    segment = segment[order]
+    point_key = ((np.floor(p / size).astype(np.int64) - base) * [width, 1]).sum(axis=1)
+    first = np.searchsorted(key, point_key, side='left')
+    counts = np.searchsorted(key, point_key, side='right') - first
+    point = np.repeat(np.arange(len(p)), counts)
+    pair = segment[np.arange(len(point)) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(first, counts)]
+    t = np.clip(((p[point] - a[pair]) * d[pair]).sum(axis=1) / dd[pair], 0.0, 1.0)
+    np.minimum.at(result, point, np.hypot(*(p[point] - a[pair] - t[:, None] * d[pair]).T))
+    return result
+
+
+def trimLoops(P, original, distance):
+    # cuts off the loops of the closed raw offset polyline P where it
+    # crosses itself. P is split at every crossing, a piece is kept when it
+    # doesn't come closer to the original polyline than distance. Starting
+    # on the longest kept piece the kept pieces are followed, at the end of
+    # a piece the walk goes on along the other segment of the crossing when
+    # that piece is kept. The points jumped over are all moved to the
+    # crossing, so the point count (and the pairing with the other side)
+    # stays the same. A walk that doesn't close starts again on the next
+    # longest kept piece
+    P = np.array(P, dtype=float)
+    n = len(P)
+    limit = abs(distance) * (1 - 1e-6)
+    found = crossings(P)
+    if not found or limit <= 0:
+        return P
+    found = np.array(found)
+    i = found[:, 0].astype(int)
+    j = found[:, 1].astype(int)
+    point = P[i] + found[:, 2, None] * (P[(i + 1) % n] - P[i])
+    # both ends of every crossing sorted along P
+    segment = np.concatenate((i, j))
+    position = np.concatenate((found[:, 2], found[:, 3]))
+    cross = np.tile(np.arange(len(found)), 2)
+    order = np.lexsort((position, segment))
+    segment = segment[order]
+    cross = cross[order]
+    events = len(order)
+    partner = np.empty(events, dtype=int)
+    first_end = np.argsort(order)
+    partner[first_end[:len(found)]] = first_end[len(found):]
+    partner[first_end[len(found):]] = first_end[:len(found)]
+    # the piece e runs from the crossing of event e over the points of P
+    # after it to the crossing of event e + 1
+    after = np.roll(np.arange(events), -1)
+    inner = (segment[after] - segment) % n
+    nodes = inner + 2
+    piece = np.repeat(np.arange(events), nodes)
+    step = np.arange(len(piece)) - np.repeat(np.cumsum(nodes) - nodes, nodes)
+    node = P[(segment[piece] + step) % n]
+    node[step == 0] = point[cross]
+    node[step == nodes[piece] - 1] = point[cross[after]]
+    within = piece[1:] == piece[:-1]
+    samples = np.concatenate((node[1:][within & (step[1:] < nodes[piece[1:]] - 1)],
+                              (node[1:] + node[:-1])[within] / 2))
+    owner = np.concatenate((piece[1:][within & (step[1:] < nodes[piece[1:]] - 1)], piece[1:][within]))
+    closest = np.full(events, np.inf)
+    np.minimum.at(closest, owner, polylineDistances(samples, original, abs(distance)))
+    kept = closest >= limit
+    if not kept.any():
+        return P
+    length = np.zeros(events)
+    np.add.at(length, piece[1:][within], np.hypot(*(node[1:] - node[:-1])[within, :2].T))
+    for start in np.argsort(np.where(kept, -length, np.inf))[:min(kept.sum(), OFFSET_WALK_STARTS)]:
+        jumps = walkKept(segment, partner, kept, n, start)
+        if jumps != None:
+            break
+    else:
+        return P
+    for end, target in jumps:
+        skipped = (np.arange((segment[target] - segment[end]) % n) + segment[end] + 1) % n
+        P[skipped] = point[cross[end]]
+    return P
+
+
+def walkKept(segment, partner, kept, n, start):
+    # (end, target) jumps of the walk of trimLoops over the kept pieces
+    # from the piece start once around the n points, None when it doesn't
+    # come back to start after exactly one round
+    after = np.roll(np.arange(len(segment)), -1)
+    e = start
+    walked = 0
+    jumps = []
+    while walked <= n:
+        end = after[e]
+        walked += (segment[end] - segment[e]) % n
+        target = partner[end]
+        # a jump must not go around P once more, the pieces behind it
+        # belong to a pocket of their own
+        if not kept[target] or walked + (segment[target] - segment[end]) % n > n:
+            target = end
+            # no kept way on at a crossing the pocket is reached from, cut
+            # straight across to the next kept piece
+            while not kept[target]:
+                target = after[target]
+        if target != end:
+            jumps.append((end, target))
+            walked += (segment[target] - segment[end]) % n
+        e = target
+        if e == start:
+            break
+    if e != start or walked != n:
+        return None
+    return jumps
+
+
+def offsetClosedPolyline(P, distance, miter_limit=OFFSET_MITER_LIMIT):
+    # offsets the closed polyline P (N, 3) in its XY plane, a positive
+    # distance grows the enclosed area. Z is kept, sharp convex corners get
+    # more than one point
+    P = np.asarray(P, dtype=float)
+    corners = cornerTurns(P, distance)
+    counts = cornerCounts(corners[1], corners[2], miter_limit)
+    return trimLoops(cornerPoints(P, distance, corners, counts), P, distance)
+
+
+def offsetSides(A, B, distance_A, distance_B, miter_limit=OFFSET_MITER_LIMIT):
+    # kerf offset of the closed side A and B polylines (first point not
+    # repeated at the end), returns the offset A and B with the same count.
+    # A vertex gets the points of the side needing the most at that corner
+    A, B = mergeDuplicates(A, B)
+    corners_A = cornerTurns(A, distance_A)
+    corners_B = cornerTurns(B, distance_B)
+    counts = np.maximum(cornerCounts(corners_A[1], corners_A[2], miter_limit),
+                        cornerCounts(corners_B[1], corners_B[2], miter_limit))
+    offset_A = trimLoops(cornerPoints(A, distance_A, corners_A, counts), A, distance_A)
+    offset_B = trimLoops(cornerPoints(B, distance_B, corners_B, counts), B, distance_B)
+    # points a trimmed loop moved onto each other on both sides
+    return mergeDuplicates(offset_A, offset_B)
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+# Cut order of the parts of a layout, planned to keep the travel short.
+# Every closed path is entered and left at the same point, so a part is one
+# node of an open tour from the start to the end position of the wire:
+#   - nearest neighbour construction over all entry points of all parts
+#   - 2-opt and Or-opt moves on the order, with the entry points fixed
+#   - every entry point moved to the best one between its two neighbours
+# repeated until the tour stops getting shorter. The cost of a move is the
+# longer of the side A and side B moves in the XY plane, both sides travel
+# together. The holes of a part are cut from its entry point before the part
+# itself, parts lying inside another part are cut before that part.
+
+import numpy as np
+
+
+# max entry points tried per path, evenly spread over long paths
+ORDER_MAX_ENTRIES = 200
+# max rounds of order improvement and entry point choice
+ORDER_MAX_ROUNDS = 10
+# smaller improvements of the tour cost are ignored
+ORDER_MIN_GAIN = 1e-6
+
+
+def travelCost(P, Q):
+    # cost of moving the wire between the (..., 2, 3) side A and B points P
+    # and Q, the longer of the two XY moves
+    d = np.asarray(P, dtype=float)[..., :2] - np.asarray(Q, dtype=float)[..., :2]
+    return np.sqrt((d ** 2).sum(axis=-1)).max(axis=-1)
+
+
+def entryCandidates(points, max_count=ORDER_MAX_ENTRIES):
+    # point indexes a path can be entered at, the closing point of a closed
+    # path is the first point again and is left out
+    count = len(points)
+    if count > 1 and np.allclose(points[0], points[-1]):
+        count -= 1
+    if count <= max_count:
+        return np.arange(count)
+    return np.unique(np.linspace(0, count - 1, max_count).round().astype(int))
+
+
+def nearestEntry(points, position):
+    # index of the entry point of the (N, 2, 3) path closest to position
+    candidates = entryCandidates(points, len(points))
+    return int(candidates[np.argmin(travelCost(points[candidates], position))])
+
+
+def holeCosts(points, candidates, holes):
+    # cost of cutting the holes from every candidate entry point, the wire
+    # goes to the closest point of every hole and comes back the same way
+    cost = np.zeros(len(candidates))
+    entry_points = points[candidates][:, None]
+    for hole in holes:
+        hole_points = hole[entryCandidates(hole)][None]
+        cost += 2 * travelCost(entry_points, hole_points).min(axis=1)
+    return cost
+
+
+def pointInPolygon(xy, polygon):
+    # True if the XY point is inside the closed (N, 2) polygon, even-odd rule
+    px = polygon[:, 0]
+    py = polygon[:, 1]
+    qx = np.roll(px, -1)
+    qy = np.roll(py, -1)
+    crosses = (py > xy[1]) != (qy > xy[1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = px + (xy[1] - py) * (qx - px) / (qy - py)
+    return bool(np.count_nonzero(crosses & (xy[0] < x)) % 2)
+
+
+def nestedParts(parts):
+    # (a, b) for every part a lying inside part b on side A and B, a has to
+    # be cut first or it is still inside when b comes loose. Parts lying
+    # inside each other (the same outline twice) are cut in list order
+    boxes = [(p[:, :, :2].min(axis=0), p[:, :, :2].max(axis=0)) for p in parts]
+    pairs = []
+    for a in range(len(parts)):
+        for b in range(len(parts)):
+            if a == b or len(parts[b]) < 3:
+                continue
+            if not (np.all(boxes[a][0] >= boxes[b][0]) and np.all(boxes[a][1] <= boxes[b][1])):
+                continue
+            if all(pointInPolygon(parts[a][0, side, :2], parts[b][:, side, :2]) for side in range(2)):
+                pairs.append((a, b))
+    return [(a, b) for a, b in pairs if a < b or (b, a) not in pairs]
+
+
+def validOrder(seq, before):
+    # True if every (a, b) of before has a in front of b in seq
+    position = dict((node, i) for i, node in enumerate(seq))
+    return all(position[a] < position[b] for a, b in before)
+
+
+def tourCost(seq, D):
+    return float(sum(D[seq[i], seq[i + 1]] for i in range(len(seq) - 1)))
+
+
+def nearestNeighbourOrder(parts, candidates, hole_cost, start, before):
+    # parts in the order of the closest next entry point, a part is only
+    # taken when the parts inside it are cut. If no part is free (parts
+    # nested in a cycle) the closest one is taken anyway. Returns (order,
+    # choice), choice is the position of the entry point in the candidates of
+    # every part
+    n = len(parts)
+    choice = [0] * n
+    order = []
+    done = set()
+    position = np.asarray(start, dtype=float)
+    while len(order) < n:
+        best = None
+        for free_only in (True, False):
+            for k in range(n):
+                if k in done or (free_only and any(b == k and a not in done for a, b in before)):
+                    continue
+                cost = travelCost(parts[k][candidates[k]], position) + hole_cost[k]
+                c = int(np.argmin(cost))
+                if best is None or cost[c] < best[0]:
+                    best = (cost[c], k, c)
+            if best is not None:
+                break
+        k, c = best[1], best[2]
+        order.append(k)
+        done.add(k)
+        choice[k] = c
+        position = parts[k][candidates[k][c]]
+    return order, choice
+
+
+def improveOrder(seq, D, before):
+    # 2-opt (reverse a run) and Or-opt (move a run of 1 to 3 parts, also
+    # reversed) on seq, first and last node stay in place. D is symmetric
+    seq = list(seq)
+    m = len(seq)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, m - 2):
+            for j in range(i + 1, m - 1):
+                delta = (D[seq[i - 1], seq[j]] + D[seq[i], seq[j + 1]] -
+                         D[seq[i - 1], seq[i]] - D[seq[j], seq[j + 1]])
+                if delta < -ORDER_MIN_GAIN:
+                    new_seq = seq[:i] + seq[i:j + 1][::-1] + seq[j + 1:]
+                    if validOrder(new_seq, before):
+                        seq = new_seq
+                        improved = True
+
+        for length in (1, 2, 3):
+            i = 1
+            while i + length < m:
+                run = seq[i:i + length]
+                gain = D[seq[i - 1], run[0]] + D[run[-1], seq[i + length]] - D[seq[i - 1], seq[i + length]]
+                rest = seq[:i] + seq[i + length:]
+                best = None
+                for p in range(len(rest) - 1):
+                    x = rest[p]
+                    y = rest[p + 1]
+                    for r in (run, run[::-1]):
+                        delta = D[x, r[0]] + D[r[-1], y] - D[x, y] - gain
+                        if delta < -ORDER_MIN_GAIN and (best is None or delta < best[0]):
+                            new_seq = rest[:p + 1] + r + rest[p + 1:]
+                            if validOrder(new_seq, before):
+                                best = (delta, new_seq)
+                if best is not None:
+                    seq = best[1]
+                    improved = True
+                i += 1
+    return seq
+
+
+def planCutOrder(parts, start, end=None, holes=None, max_rounds=ORDER_MAX_ROUNDS):
+    # parts -> (N, 2, 3) points of side A and B of every outer path
+    # holes -> list of the (M, 2, 3) inner paths of every part
+    # start, end -> (2, 3) wire position before the first and after the
+    #               last part, end = start when not given
+    # returns (order, entries, hole_entries, cost): the part indexes in cut
+    # order, the entry (and exit) point index of every part, the entry point
+    # of every hole of every part and the travel cost of the tour
+    parts = [np.asarray(p, dtype=float) for p in parts]
+    n = len(parts)
+    if holes is None:
+        holes = [[] for p in parts]
+    holes = [[np.asarray(h, dtype=float) for h in part_holes] for part_holes in holes]
+    start = np.asarray(start, dtype=float)
+    end = start if end is None else np.asarray(end, dtype=float)
+    if not n:
+        return [], [], [], float(travelCost(start, end))
+
+    candidates = [entryCandidates(p) for p in parts]
+    hole_cost = [holeCosts(parts[k], candidates[k], holes[k]) for k in range(n)]
+    before = nestedParts(parts)
+
+    order, choice = nearestNeighbourOrder(parts, candidates, hole_cost, start, before)
+    # a nesting cycle is broken where the first order broke it
+    before = [(a, b) for a, b in before if order.index(a) < order.index(b)]
+    # node n is the start and node n + 1 the end position
+    seq = [n] + order + [n + 1]
+    nodes = np.empty((n + 2, 2, 3))
+    nodes[n] = start
+    nodes[n + 1] = end
+
+    def entryPoints():
+        for k in range(n):
+            nodes[k] = parts[k][candidates[k][choice[k]]]
+
+    def cost():
+        return (tourCost(seq, travelCost(nodes[:, None], nodes[None])) +
+                sum(float(hole_cost[k][choice[k]]) for k in range(n)))
+
+    entryPoints()
+    best_cost = cost()
+    for r in range(max_rounds):
+        D = travelCost(nodes[:, None], nodes[None])
+        seq = improveOrder(seq, D, before)
+        # best entry point of every part between its neighbours
+        for i in range(1, len(seq) - 1):
+            k = seq[i]
+            c = (travelCost(parts[k][candidates[k]], nodes[seq[i - 1]]) +
+                 travelCost(parts[k][candidates[k]], nodes[seq[i + 1]]) + hole_cost[k])
+            choice[k] = int(np.argmin(c))
+            nodes[k] = parts[k][candidates[k][choice[k]]]
+        new_cost = cost()
+        if new_cost > best_cost - ORDER_MIN_GAIN:
+            best_cost = min(best_cost, new_cost)
+            break
+        best_cost = new_cost
+
+    entries = [int(candidates[k][choice[k]]) for k in range(n)]
+    hole_entries = [[nearestEntry(h, nodes[k]) for h in holes[k]] for k in range(n)]
+    return seq[1:-1], entries, hole_entries, best_cost
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+# Timing spans and counters for the pipeline stages.
+#
+#   with profiler.command('Route'):         one report per user command
+#       with profiler.span('kerf', points):  wall time, calls, points, memory
+#           ...
+#       profiler.count('kerf cache hit')
+#   @profiler.profiled('faces')              every call of a function
+#
+# Switched off (the default) span() returns one shared empty context and
+# count() returns at once, so the hooks can stay in the code.
+# Switched on, every command prints a table and writes a JSON report. Memory
+# is traced with tracemalloc while the command runs, the peak of a stage is
+# what it allocated on top of the memory in use when it started.
+
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_no_span = _NoSpan()
+
+
+class _Span:
+    def __init__(self, profiler, name, points):
+        self.profiler = profiler
+        self.name = name
+        self.points = points
+
+    def __enter__(self):
+        self.peak = 0
+        self.base = 0
+        p = self.profiler
+        if p._tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            # the enclosing stage keeps its peak so far, reset_peak drops it
+            if p._stack:
+                p._stack[-1].peak = max(p._stack[-1].peak, peak)
+            self.base = current
+            tracemalloc.reset_peak()
+        p._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        wall = time.perf_counter() - self.start
+        p = self.profiler
+        p._stack.pop()
+        if p._tracing:
+            # own peak since the last inner stage started, the peaks before
+            # and of the inner stages are in self.peak already
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            # the peak of a stage includes the stages run inside it
+            if p._stack:
+                p._stack[-1].peak = max(p._stack[-1].peak, self.peak)
+        stage = p.stages.setdefault(self.name, {'wall_time': 0.0, 'calls': 0, 'points': 0, 'peak_memory': 0})
+        stage['wall_time'] += wall
+        stage['calls'] += 1
+        stage['points'] += self.points or 0
+        # memory allocated on top of what was in use when the stage started
+        stage['peak_memory'] = max(stage['peak_memory'], self.peak - self.base)
+        return False
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        # JSON reports are written here, no file if empty
+        self.report_dir = ''
+        # called with the text of every report
+        self.output = sys.stdout.write
+        self.stages = {}
+        self.counters = {}
+        self.last_report = None
+        self._stack = []
+        self._command = None
+        self._tracing = False
+
+    def span(self, name, points=0):
+        # context timing the stage name, points -> points handled by it
+        if not self.enabled or self._command is None:
+            return _no_span
+        return _Span(self, name, points)
+
+    def profiled(self, name):
+        # decorator timing every call of a function as the stage name
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or self._command is None:
+                    return function(*args, **kwargs)
+                with _Span(self, name, 0):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def count(self, name, value=1):
+        if not self.enabled or self._command is None:
+            return
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def command(self, name):
+        # context around a whole user command, commands inside another
+        # command are a span of it
+        if not self.enabled:
+            return _no_span
+        if self._command is not None:
+            return self.span(name)
+        return _Command(self, name)
+
+    def report(self, name, wall_time):
+        stages = sorted(self.stages.items(), key=lambda s: -s[1]['wall_time'])
+        return {'command': name,
+                'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'wall_time': wall_time,
+                'stages': [dict(stage, name=stage_name) for stage_name, stage in stages],
+                'counters': dict(self.counters)}
+
+    def formatReport(self, report):
+        lines = ['HWS profile: %s %.3f s' % (report['command'], report['wall_time']),
+                 '%-32s %10s %7s %10s %10s' % ('stage', 'time ms', 'calls', 'points', 'peak KiB')]
+        for stage in report['stages']:
+            lines.append('%-32s %10.2f %7d %10d %10.1f' % (stage['name'], stage['wall_time'] * 1000,
+                                                          stage['calls'], stage['points'],
+                                                          stage['peak_memory'] / 1024.0))
+        for name in sorted(report['counters']):
+            lines.append('%-32s %10s' % (name, report['counters'][name]))
+        return '\n'.join(lines) + '\n'
+
+    def writeReport(self, report):
+        # returns the path of the JSON file
+        if not self.report_dir:
+            return None
+        os.makedirs(self.report_dir, exist_ok=True)
+        name = 'hws_profile_%s_%s.json' % (report['command'].replace(' ', '_'), time.strftime('%Y%m%d_%H%M%S'))
+        path = os.path.join(self.report_dir, name)
+        with open(path, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+        return path
+
+
+class _Command:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        p = self.profiler
+        p.stages = {}
+        p.counters = {}
+        p._command = self.name
+        p._tracing = not tracemalloc.is_tracing()
+        if p._tracing:
+            tracemalloc.start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        p = self.profiler
+        wall = time.perf_counter() - self.start
+        if p._tracing:
+            tracemalloc.stop()
+            p._tracing = False
+        p._command = None
+        p._stack = []
+        p.last_report = p.report(self.name, wall)
+        self.text = p.formatReport(p.last_report)
+        self.path = p.writeReport(p.last_report)
+        if p.output:
+            p.output(self.text + ('report: ' + self.path + '\n' if self.path else ''))
+        return False
+
+
+# the profiler used by the workbench
+profiler = Profiler()
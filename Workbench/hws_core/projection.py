@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+# Projection of the path to the machine sides.
+# The wire through a point of side A and the matching point of side B is
+# extended to the planes of the two machine sides (z = Z0 and z = Z1), the
+# crossing points are the X Y and A Z positions of the machine.
+# projectRoute caches the projection of whole routes, export and simulation
+# share it (the simulation planes are found on the same wire lines).
+
+import hashlib
+import numpy as np
+from .cache import LRUCache
+
+
+# projected routes by route content and planes
+route_cache = LRUCache(8)
+
+
+def projectPoints(A, B, Z0, Z1):
+    # A, B -> (N, 3) points of side A and B
+    # returns the (N, 3) crossing points with the planes z = Z0 and z = Z1
+    A = np.asarray(A, dtype=float)
+    B = np.asarray(B, dtype=float)
+    vx = B[:, 2] - A[:, 2] #z
+    vy = B[:, 1] - A[:, 1] #y
+    vz = B[:, 0] - A[:, 0] #x
+
+    scale = -(A[:, 2] - Z0) / vx
+    new_A = np.column_stack((A[:, 0] + vz * scale, A[:, 1] + vy * scale, np.full(len(A), float(Z0))))
+
+    scale = -(B[:, 2] - Z1) / vx
+    new_B = np.column_stack((B[:, 0] + vz * scale, B[:, 1] + vy * scale, np.full(len(B), float(Z1))))
+    return new_A, new_B
+
+
+def projectPoint(PA, PB, Z0, Z1):
+    # projectPoints for one pair of points, returns two (x, y, z) tuples
+    vx = PB[2] - PA[2] #z
+    vy = PB[1] - PA[1] #y
+    vz = PB[0] - PA[0] #x
+
+    scale = -(PA[2] - Z0) / vx
+    new_A = (PA[0] + vz * scale, PA[1] + vy * scale, Z0)
+
+    scale = -(PB[2] - Z1) / vx
+    new_B = (PB[0] + vz * scale, PB[1] + vy * scale, Z1)
+    return new_A, new_B
+
+
+def machineAxes(A, B, Z0, Z1):
+    # (N, 4) X Y A Z machine positions of the path
+    new_A, new_B = projectPoints(A, B, Z0, Z1)
+    return np.column_stack((new_A[:, :2], new_B[:, :2]))
+
+
+def projectRoute(points, Z0, Z1):
+    # cached projectPoints of a (N, 2, 3) route, the arrays returned are
+    # shared and read only
+    points = np.ascontiguousarray(points, dtype=float)
+    key = (hashlib.sha1(points.tobytes()).hexdigest(), points.shape, float(Z0), float(Z1))
+    projected = route_cache.get(key)
+    if projected is None:
+        projected = projectPoints(points[:, 0], points[:, 1], Z0, Z1)
+        for array in projected:
+            array.flags.writeable = False
+        route_cache.put(key, projected)
+    return projected
+
+
+def pointsAtZ(wire_A, wire_B, Z0, Z1, z):
+    # (N, 3) points at height z of the wire lines through wire_A (at z = Z0)
+    # and wire_B (at z = Z1)
+    points = wire_A + (wire_B - wire_A) * ((z - Z0) / (Z1 - Z0))
+    points[:, 2] = z
+    return points
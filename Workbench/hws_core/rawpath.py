@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+# Array backed container for wire paths.
+# A path is stored as one (N, 2, 3) float64 array: points[i][side] = [x, y, z]
+# where side 0 is machine side A (lower z) and side 1 is machine side B.
+# The owner table maps point ranges to the document object that produced them
+# (ShapePath, InnerPath, Link_, InitialPath, FinalPath) as [[start_index, name], ...]
+# sorted by start_index, the owner of a point is the last entry starting at or
+# before it.
+#
+# For compatibility with code (and documents) written for the old
+# ([[x, y, z], ...], [[x, y, z], ...]) representation a RawPath can be indexed
+# and iterated like that pair: raw_path[0] is a (N, 3) view of side A and
+# raw_path[1] a view of side B.
+
+import bisect
+import numpy as np
+
+
+class RawPath:
+    def __init__(self, points=None, owners=None, commands=None):
+        if points is None:
+            points = np.zeros((0, 2, 3))
+        self.points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 2, 3)
+        self.owners = [] if owners is None else [[int(o[0]), o[1]] for o in owners]
+        # route commands of a traced route, see traceObjectsAndLinksForRawPath
+        self.commands = commands
+
+    @classmethod
+    def fromSides(cls, side_A, side_B, owners=None, commands=None):
+        # build from two lists of points (lists, tuples, arrays or FreeCAD.Vector)
+        n = len(side_A)
+        points = np.empty((n, 2, 3))
+        if n:
+            points[:, 0] = [(p[0], p[1], p[2]) for p in side_A]
+            points[:, 1] = [(p[0], p[1], p[2]) for p in side_B]
+        return cls(points, owners, commands)
+
+    @property
+    def A(self):
+        return self.points[:, 0]
+
+    @property
+    def B(self):
+        return self.points[:, 1]
+
+    @property
+    def count(self):
+        return self.points.shape[0]
+
+    # legacy pair behaviour ----------------------------------------------------
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, side):
+        if side not in (0, 1, -1, -2):
+            raise IndexError('RawPath side index out of range')
+        return self.points[:, side]
+
+    def __iter__(self):
+        yield self.A
+        yield self.B
+
+    def point(self, side, index):
+        # single point as a list of python floats
+        return self.points[index, side].tolist()
+
+    def toLists(self):
+        return [self.A.tolist(), self.B.tolist()]
+
+    # owner table --------------------------------------------------------------
+    def ownerAt(self, index):
+        if not(self.owners):
+            return None
+        starts = [o[0] for o in self.owners]
+        i = bisect.bisect_right(starts, index) - 1
+        return self.owners[max(i, 0)][1]
+
+    def ownerIndexes(self):
+        # per point index into self.owners (-1 if the path has no owners)
+        idx = np.full(self.count, -1, dtype=np.int64)
+        if self.owners:
+            starts = np.array([o[0] for o in self.owners])
+            idx = np.searchsorted(starts, np.arange(self.count), side='right') - 1
+            idx = np.maximum(idx, 0)
+        return idx
+
+    def simplified(self, tolerance):
+        # copy without the points both sides can drop within tolerance, see
+        # simplifyIndexes. The first and last point of every owner are kept
+        # and the owner table and route commands are remapped
+        keep = set()
+        for o in self.owners:
+            keep.update((o[0] - 1, o[0]))
+        idx = simplifyIndexes(self.points, tolerance, keep)
+        new_index = lambda i: int(np.searchsorted(idx, i))
+        commands = self.commands
+        if commands is not None:
+            commands = [[new_index(c[0])] + list(c[1:]) for c in commands]
+        return RawPath(self.points[idx],
+                       [[new_index(o[0]), o[1]] for o in self.owners],
+                       commands)
+
+    # serialization (App::PropertyPythonObject) --------------------------------
+    def __getstate__(self):
+        return {'A': self.A.tolist(),
+                'B': self.B.tolist(),
+                'owners': self.owners}
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            tmp = RawPath.fromSides(state['A'], state['B'], state.get('owners'))
+        else:
+            tmp = RawPath.fromSides(state[0], state[1])
+        self.points = tmp.points
+        self.owners = tmp.owners
+        self.commands = None
+
+    # newer FreeCAD (0.22/1.0) uses dumps/loads for python objects stored in
+    # properties, older versions __getstate__/__setstate__. Keep both pairs
+    def dumps(self):
+        return self.__getstate__()
+
+    def loads(self, state):
+        self.__setstate__(state)
+
+
+def asRawPath(path):
+    # returns path as a RawPath. Accepts a RawPath, the old [side_A, side_B]
+    # lists stored in documents, or a traced route (side_A, side_B, route_commands)
+    if isinstance(path, RawPath):
+        return path
+    if isinstance(path, dict):
+        raw = RawPath()
+        raw.__setstate__(path)
+        return raw
+    commands = None
+    if len(path) > 2:
+        commands = path[2]
+    raw = RawPath.fromSides(path[0], path[1], commands=commands)
+    if commands:
+        raw.owners = commandsToOwners(commands)
+    return raw
+
+
+def commandsToOwners(route_commands):
+    # route_commands -> [[start_index, owner_name], ...], consecutive entries of
+    # the same owner are merged
+    owners = []
+    for rc in route_commands:
+        if owners and owners[-1][1] == rc[3]:
+            continue
+        if owners and owners[-1][0] == rc[0]:
+            owners[-1][1] = rc[3]
+        else:
+            owners.append([int(rc[0]), rc[3]])
+    return owners
+
+
+def polylineLengths(points):
+    # segment lengths of a (N, 3) or (N, 2) polyline
+    points = np.asarray(points, dtype=np.float64)
+    if points.shape[0] < 2:
+        return np.zeros(0)
+    return np.linalg.norm(np.diff(points, axis=0), axis=1)
+
+
+def segmentDistances(points, a, b):
+    # distance of every point of points (N, 3) to the segment a-b
+    ab = b - a
+    ab_2 = ab.dot(ab)
+    if ab_2 == 0:
+        return np.linalg.norm(points - a, axis=1)
+    t = np.clip((points - a).dot(ab) / ab_2, 0.0, 1.0)
+    return np.linalg.norm(points - (a + t[:, None] * ab), axis=1)
+
+
+def simplifyIndexes(points, tolerance, keep=()):
+    # indexes of the points of a (N, 2, 3) path kept by a Douglas-Peucker
+    # simplification of side A and B together: a point is only dropped if both
+    # sides stay within tolerance of the simplified path, so both sides keep
+    # the same points. Indexes in keep are never dropped
+    n = len(points)
+    if n < 3 or tolerance <= 0:
+        return np.arange(n)
+    fixed = sorted(set(k for k in keep if 0 <= k < n) | set((0, n - 1)))
+    kept = np.zeros(n, dtype=bool)
+    kept[fixed] = True
+    spans = [(fixed[i], fixed[i + 1]) for i in range(len(fixed) - 1)]
+    while spans:
+        i, j = spans.pop()
+        if j - i < 2:
+            continue
+        d = np.maximum(segmentDistances(points[i + 1:j, 0], points[i, 0], points[j, 0]),
+                       segmentDistances(points[i + 1:j, 1], points[i, 1], points[j, 1]))
+        k = int(np.argmax(d))
+        if d[k] > tolerance:
+            k += i + 1
+            kept[k] = True
+            spans.append((i, k))
+            spans.append((k, j))
+    return np.flatnonzero(kept)
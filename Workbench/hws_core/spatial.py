@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+# Hashed spatial index used to find coincident geometry (edge centers, vertexes)
+# without comparing every element against every other element.
+# Points are bucketed in cubic cells with the size of the tolerance, so two
+# points closer than the tolerance are always in the same or in a neighbour cell.
+
+import math
+
+
+def _xyz(p):
+    # accepts FreeCAD.Vector, Vertex.Point or any [x, y, z] sequence
+    try:
+        return p.x, p.y, p.z
+    except AttributeError:
+        return p[0], p[1], p[2]
+
+
+class PointGrid:
+    def __init__(self, tolerance=0.001):
+        self.tolerance = tolerance
+        self.cells = {}
+        self.points = []
+        self.data = []
+        # range of used cell keys, bounds the nearest point search
+        self.key_min = None
+        self.key_max = None
+
+    def key(self, x, y, z):
+        t = self.tolerance
+        return (int(math.floor(x / t)), int(math.floor(y / t)), int(math.floor(z / t)))
+
+    def add(self, point, data=None):
+        # store point with an optional payload, returns the insertion index
+        x, y, z = _xyz(point)
+        i = len(self.points)
+        self.points.append((x, y, z))
+        self.data.append(data)
+        k = self.key(x, y, z)
+        self.cells.setdefault(k, []).append(i)
+        if self.key_min is None:
+            self.key_min = list(k)
+            self.key_max = list(k)
+        else:
+            for c in range(3):
+                self.key_min[c] = min(self.key_min[c], k[c])
+                self.key_max[c] = max(self.key_max[c], k[c])
+        return i
+
+    def query(self, point, tolerance=None):
+        # returns insertion indexes of all points closer than tolerance, in
+        # insertion order
+        if tolerance is None:
+            tolerance = self.tolerance
+        x, y, z = _xyz(point)
+        kx, ky, kz = self.key(x, y, z)
+        r = max(1, int(math.ceil(tolerance / self.tolerance)))
+        tol2 = tolerance * tolerance
+        found = []
+        for ix in range(kx - r, kx + r + 1):
+            for iy in range(ky - r, ky + r + 1):
+                for iz in range(kz - r, kz + r + 1):
+                    for i in self.cells.get((ix, iy, iz), ()):
+                        px, py, pz = self.points[i]
+                        if (px - x)**2 + (py - y)**2 + (pz - z)**2 < tol2:
+                            found.append(i)
+        found.sort()
+        return found
+
+    def nearest(self, point):
+        # returns (insertion index, distance) of the closest point, the lowest
+        # index if several are at the same distance, (None, None) if empty.
+        # Cells are visited in rings around the cell of point, the search stops
+        # when no cell of the next ring can be closer than the best point found
+        if not self.points:
+            return None, None
+        x, y, z = _xyz(point)
+        k = self.key(x, y, z)
+        max_ring = max(max(abs(k[c] - self.key_min[c]), abs(k[c] - self.key_max[c])) for c in range(3))
+        best = None
+        best_d2 = 0.0
+        for r in range(max_ring + 1):
+            if best is not None and ((r - 1) * self.tolerance)**2 > best_d2:
+                break
+            if (2*r + 1)**3 - (2*r - 1)**3 > len(self.points):
+                # the ring has more cells than there are points, checking
+                # every remaining point is cheaper
+                candidates = range(len(self.points))
+            else:
+                candidates = [i for cell in self._ring(k, r) for i in self.cells.get(cell, ())]
+            for i in candidates:
+                px, py, pz = self.points[i]
+                d2 = (px - x)**2 + (py - y)**2 + (pz - z)**2
+                if best is None or d2 < best_d2 or (d2 == best_d2 and i < best):
+                    best = i
+                    best_d2 = d2
+            if isinstance(candidates, range):
+                break
+        return best, math.sqrt(best_d2)
+
+    def _ring(self, k, r):
+        # keys of the cells at chebyshev distance r from cell k
+        kx, ky, kz = k
+        if r == 0:
+            yield k
+            return
+        for ix in range(kx - r, kx + r + 1):
+            for iy in range(ky - r, ky + r + 1):
+                if abs(ix - kx) == r or abs(iy - ky) == r:
+                    for iz in range(kz - r, kz + r + 1):
+                        yield (ix, iy, iz)
+                else:
+                    yield (ix, iy, kz - r)
+                    yield (ix, iy, kz + r)
+
+    def queryData(self, point, tolerance=None):
+        return [self.data[i] for i in self.query(point, tolerance)]
+
+    def __len__(self):
+        return len(self.points)
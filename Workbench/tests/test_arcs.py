@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+import numpy as np
+
+from hws_core import arcs
+from hws_core import gcode
+
+
+def arcPoints(center, radius, start, stop, count):
+    angle = np.linspace(start, stop, count)
+    return np.column_stack((center[0] + radius * np.cos(angle), center[1] + radius * np.sin(angle)))
+
+
+def test_arc_taken_when_side_b_moves_on_the_chord():
+    xy_A = arcPoints((10.0, 5.0), 20.0, 0.0, np.pi / 2, 30)
+    # side B in a straight line, evenly in step with the angle of side A
+    xy_B = np.linspace((0.0, 0.0), (8.0, 3.0), 30)
+    found = arcs.fitArcs(xy_A, xy_B, 0.01)
+    assert list(found) == [1]
+    last, center, ccw = found[1]
+    assert last == 29
+    assert np.allclose(center, (10.0, 5.0))
+    assert ccw
+
+
+def test_arc_refused_when_side_b_follows_the_circle():
+    # untapered part, the controller would cut side B on the chord
+    xy_A = arcPoints((0.0, 0.0), 20.0, 0.0, np.pi / 2, 30)
+    xy_B = xy_A + (3.0, 1.0)
+    assert arcs.fitArcs(xy_A, xy_B, 0.01) == {}
+
+
+def test_congruent_arc_taken_when_the_controller_cuts_both_planes():
+    xy_A = arcPoints((0.0, 0.0), 20.0, 0.0, np.pi / 2, 30)
+    xy_B = xy_A + (3.0, 1.0)
+    found = arcs.fitArcs(xy_A, xy_B, 0.01, congruent=True)
+    assert list(found) == [1]
+    last, center, ccw = found[1]
+    assert last == 29
+    assert np.allclose(center, (0.0, 0.0))
+
+
+def test_congruent_arc_refused_on_tapered_run():
+    # side B a smaller circle, not the side A arc moved
+    xy_A = arcPoints((0.0, 0.0), 20.0, 0.0, np.pi / 2, 30)
+    xy_B = arcPoints((0.0, 0.0), 15.0, 0.0, np.pi / 2, 30)
+    assert arcs.fitArcs(xy_A, xy_B, 0.01, congruent=True) == {}
+
+
+def test_congruent_arcs_cut_the_lines_of_a_round_profile():
+    # untapered round rib, 0.5 mm between points
+    xy_A = arcPoints((60.0, 50.0), 40.0, 0.0, 2 * np.pi, 503)
+    xy_B = xy_A + (5.0, 0.0)
+    axes = np.column_stack((xy_A, xy_B))
+    count = len(axes)
+    dist = [0.5] * count
+
+    def moves(found):
+        lines = gcode.iterGCodeLines(axes, dist, dist, [0] * count, [[250.0, 250.0]], 100, 300, False, found)
+        return [line for line in lines if line[:2] in ('G1', 'G2', 'G3') and ' X ' in line]
+
+    found = arcs.fitArcs(xy_A, xy_B, 0.01, congruent=True)
+    assert len(moves(found)) * 10 <= len(moves({}))
+    # every arc move keeps side B on its circle around the same I J
+    for first, (last, center, ccw) in found.items():
+        center_B = center + (xy_B[first - 1] - xy_A[first - 1])
+        assert abs(np.hypot(*(xy_B[last] - center_B)) - 40.0) < 0.01
+
+
+def test_arc_short_enough_for_the_chord_error():
+    # a side B sagitta below the tolerance is fine
+    xy_A = arcPoints((0.0, 0.0), 100.0, 0.0, 0.02, 6)
+    xy_B = xy_A + (3.0, 1.0)
+    assert list(arcs.fitArcs(xy_A, xy_B, 0.01)) == [1]
+
+
+def test_arc_runs_stop_at_group_change():
+    xy_A = arcPoints((0.0, 0.0), 20.0, 0.0, np.pi / 2, 30)
+    xy_B = np.zeros_like(xy_A)
+    groups = [0] * 15 + [1] * 15
+    found = arcs.fitArcs(xy_A, xy_B, 0.01, groups)
+    assert all(groups[first] == groups[last] for first, (last, center, ccw) in found.items())
+
+
+def test_arc_center_from_written_start():
+    # I J are measured from the start point rounded like the file, the
+    # center the controller gets is only off by the rounding of I J
+    xy_A = arcPoints((10.0, 5.0), 20.0, 0.3, 1.3, 20) + 0.00037
+    xy_B = np.zeros_like(xy_A)
+    axes = np.column_stack((xy_A, xy_B))
+    found = arcs.fitArcs(xy_A, xy_B, 0.01)
+    lines = list(gcode.iterGCodeLines(axes, [1.0] * 20, [1.0] * 20, [0] * 20, [[20.0, 20.0]], 100, 300, False,
+                                      found, precision=3))
+    move = [line for line in gcode.compactLines(lines, 3) if line.startswith('G3')][0]
+    values = dict(gcode.WORD.findall(move))
+    start = np.round(axes[0, :2], 3)
+    end = np.array([float(values['X']), float(values['Y'])])
+    center = start + [float(values['I']), float(values['J'])]
+    assert np.abs(center - 10.00037 * np.array([1.0, 0.5])).max() <= 0.0005 + 1e-9
+    assert abs(np.hypot(*(end - center)) - np.hypot(*(start - center))) < 0.002
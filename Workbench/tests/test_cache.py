@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+
+from hws_core import cache
+
+
+def test_least_recently_used_entry_goes_first():
+    lru = cache.LRUCache(2)
+    lru.put('a', 1)
+    lru.put('b', 2)
+    assert lru.get('a') == 1
+    lru.put('c', 3)
+    assert 'b' not in lru
+    assert lru.get('a') == 1 and lru.get('c') == 3
+    assert len(lru) == 2
+
+
+def test_hits_and_misses():
+    lru = cache.LRUCache()
+    lru.put(('shape', 1.0), [1])
+    assert lru.get(('shape', 1.0)) == [1]
+    assert lru.get(('shape', 0.5)) is None
+    assert (lru.hits, lru.misses) == (1, 1)
+    lru.clear()
+    assert len(lru) == 0
+
+
+def test_brep_hash_follows_the_content():
+    assert cache.brepHash('DBRep_DrawableShape 1') == cache.brepHash('DBRep_DrawableShape 1')
+    assert cache.brepHash('DBRep_DrawableShape 1') != cache.brepHash('DBRep_DrawableShape 2')
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+import numpy as np
+
+from hws_core import collision
+
+
+BOX = np.array([[0.0, 0.0, 0.0], [10.0, 10.0, 10.0]])
+
+
+def triangles(*tris):
+    return np.asarray(tris, dtype=float)
+
+
+def test_triangle_inside_and_outside():
+    tris = triangles([[1, 1, 1], [2, 1, 1], [1, 2, 1]],
+                     [[20, 20, 20], [21, 20, 20], [20, 21, 20]])
+    assert collision.trianglesHitBox(tris, BOX).tolist() == [True, False]
+
+
+def test_triangle_through_box_without_vertex_inside():
+    # large triangle cutting through the box, all vertexes outside
+    tris = triangles([[-50, 5, -50], [50, 5, -50], [0, 5, 100]])
+    assert collision.trianglesHitBox(tris, BOX).tolist() == [True]
+
+
+def test_triangle_near_corner_separated_by_its_plane():
+    # the bounding boxes overlap but the triangle passes the corner
+    tris = triangles([[12, 0, 0], [0, 12, 0], [0, 0, 12]])
+    assert collision.trianglesHitBox(tris, BOX).tolist() == [True]
+    tris = triangles([[32, 0, 0], [0, 32, 0], [0, 0, 32]])
+    assert collision.trianglesHitBox(tris, BOX).tolist() == [False]
+
+
+def test_touching_the_box_is_not_a_hit():
+    tris = triangles([[10, 1, 1], [12, 1, 1], [10, 2, 1]],
+                     [[9.9, 1, 1], [12, 1, 1], [9.9, 2, 1]])
+    assert collision.trianglesHitBox(tris, BOX, 0.001).tolist() == [False, True]
+
+
+def test_colliding_segments_of_a_wire():
+    # wire across the box only on its second move
+    wire_A = np.array([[-20, -20, -5], [-20, 5, -5], [-20, 30, -5]], dtype=float)
+    wire_B = wire_A + [0, 0, 20]
+    wire_A[1:, 0] = 5
+    wire_B[1:, 0] = 5
+    hits = collision.collidingSegments(wire_A, wire_B, [BOX])
+    assert hits.tolist() == [0, 1]
+    assert collision.collidingSegments(wire_A + [0, 0, 100], wire_B + [0, 0, 100], [BOX]).tolist() == []
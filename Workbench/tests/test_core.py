@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+
+import os
+import re
+import subprocess
+import sys
+
+import hws_core
+
+WORKBENCH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_modules_do_not_import_freecad():
+    folder = os.path.dirname(hws_core.__file__)
+    for name in sorted(os.listdir(folder)):
+        if name.endswith('.py'):
+            with open(os.path.join(folder, name)) as source:
+                text = source.read()
+            assert not re.search(r'^\s*(import|from)\s+(FreeCAD|FreeCADGui|Part|PySide)\b', text, re.M), name
+
+
+def test_package_runs_with_freecad_blocked():
+    # a fresh interpreter where importing FreeCAD fails
+    script = ('import sys\n'
+              'for name in ("FreeCAD", "FreeCADGui", "Part"):\n'
+              '    sys.modules[name] = None\n'
+              'import numpy as np\n'
+              'from hws_core import rawpath, projection, gcode\n'
+              'route = rawpath.RawPath(np.array([[[0, 0, 0], [0, 0, 10]], [[1, 0, 0], [1, 0, 10]]]))\n'
+              'axes = projection.machineAxes(route.A, route.B, 0, 10)\n'
+              'print(len(list(gcode.iterGCodeLines(axes, [0, 1], [0, 1], [0, 0], [[1, 1]], 50, 10, True))))\n')
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=WORKBENCH)
+    assert int(output) > 0
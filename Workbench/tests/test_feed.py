@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+
+import numpy as np
+
+from hws_core import feed, gcode
+
+
+def program(axes, G93, owner_index=None):
+    # lines of a feed planned program from machine zero, every point 10 mm/s
+    axes = np.asarray(axes, dtype=float)
+    dist_A = gcode.xyDistances(axes[:, :2], [0, 0])
+    dist_B = gcode.xyDistances(axes[:, 2:], [0, 0])
+    if owner_index is None:
+        owner_index = [0] * len(axes)
+    times, lengths = feed.planMoves(dist_A, dist_B, axes, 10.0, 20.0)
+    return list(gcode.iterGCodeLines(axes, dist_A, dist_B, owner_index, [[1.0, 1.0]], 50, 10.0, G93,
+                                     None, times, lengths))
+
+
+def feeds(lines):
+    return [float(line.split(' F ')[1]) for line in lines if ' F ' in line and not line.startswith('G1 F')]
+
+
+def test_first_move_starts_at_machine_zero():
+    times, lengths = feed.planMoves([10.0], [10.0], [[10.0, 0.0, 10.0, 0.0]], 1.0, 2.0)
+    assert lengths[0] == np.linalg.norm([10.0, 0.0, 10.0, 0.0])
+    times, lengths = feed.planMoves([0.0], [0.0], [[5.0, 5.0, 5.0, 5.0]], 1.0, 2.0, start=[5.0, 5.0, 5.0, 5.0])
+    assert lengths[0] == 0.0
+
+
+def test_first_move_respects_max_speed():
+    # 100 mm on side A at cut speed 10 would be 10 s, the table needs 50 s
+    times, lengths = feed.planMoves([1.0], [1.0], [[100.0, 0.0, 100.0, 0.0]], 10.0, 2.0)
+    assert abs(times[0] - 50.0) < 1e-9
+
+
+def test_planned_feed_is_never_zero():
+    axes = [[10, 10, 10, 10], [10, 10, 10, 10], [20, 10, 20, 10], [20, 10, 20, 10]]
+    for G93 in (False, True):
+        lines = program(axes, G93)
+        moves = [line for line in lines if line.startswith('G1 X')]
+        assert len(moves) == 2
+        assert moves[0].startswith('G1 X 10.0 Y 10.0 A 10.0 Z 10.0 F ')
+        values = feeds(lines)
+        assert values and all(0 < value < 1e5 for value in values)
+
+
+def test_move_to_the_start_position_is_left_out():
+    for G93 in (False, True):
+        lines = program([[0, 0, 0, 0], [5, 0, 5, 0]], G93)
+        assert lines[4] == 'M3 S50\n'
+        assert [line for line in lines if line.startswith('G1 X')] == \
+            ['G1 X 5.0 Y 0.0 A 5.0 Z 0.0 F %s\n' % ('120.0' if G93 else str(np.hypot(5, 5) / 0.5))]
+
+
+def test_inverse_time_without_feed_planning_skips_still_moves():
+    axes = np.array([[5.0, 0, 5, 0], [5, 0, 5, 0], [10, 0, 10, 0]])
+    dist_A = gcode.xyDistances(axes[:, :2], [0, 0])
+    dist_B = gcode.xyDistances(axes[:, 2:], [0, 0])
+    lines = list(gcode.iterGCodeLines(axes, dist_A, dist_B, [0, 0, 0], [[1.0, 1.0]], 50, 10.0, True))
+    assert [line for line in lines if line.startswith('G1 X')] == ['G1 X 5.0 Y 0.0 A 5.0 Z 0.0 F 120.0\n',
+                                                                   'G1 X 10.0 Y 0.0 A 10.0 Z 0.0 F 120.0\n']
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+from hws_core import gcode
+
+
+def test_compact_lines_drops_repeated_words():
+    lines = ['G21\n', 'G17\n', 'G90\n', 'G94\n',
+             'M3 S 50\n', 'G1 F 300\n',
+             'G1 X 1.0 Y 2.0 A 1.0 Z 2.0\n',
+             'G1 X 1.0 Y 2.00001 A 1.5 Z 2.0\n',
+             'M3 S 50\n',
+             'G1 X 1.0 Y 2.0 A 1.5 Z 2.0\n',
+             'G1 X 3.0 Y 2.0 A 1.5 Z 2.0 F 400\n',
+             '(MSG done)\n',
+             'G94\n', 'M5\n', 'G94']
+    assert list(gcode.compactLines(lines, 3)) == ['G21\n', 'G17\n', 'G90\n', 'G94\n',
+                                                  'M3S50\n',
+                                                  'G1X1Y2A1Z2F300\n',
+                                                  'A1.5\n',
+                                                  'X3F400\n',
+                                                  '(MSG done)\n',
+                                                  'M5\n']
+
+
+def test_compact_lines_keeps_feed_of_every_inverse_time_move():
+    lines = ['G93\n', 'G1 X 1 Y 0 A 0 Z 0 F 10\n', 'G1 X 2 Y 0 A 0 Z 0 F 10\n']
+    assert list(gcode.compactLines(lines, 3)) == ['G93\n', 'G1X1Y0A0Z0F10\n', 'X2F10\n']
+
+
+def test_compact_lines_rapid_waits_with_the_feed():
+    lines = ['G94\n', 'G1 F 300\n', 'G0 X 5 Y 0 A 0 Z 0\n', 'G1 X 6 Y 0 A 0 Z 0\n', 'G1 X 7 Y 0 A 0 Z 0\n']
+    assert list(gcode.compactLines(lines, 3)) == ['G94\n', 'G0X5Y0A0Z0\n', 'G1X6F300\n', 'X7\n']
+
+
+def test_compact_lines_arc_and_precision():
+    lines = ['G1 X 0.12345 Y 0 A 0 Z 0 F 100\n', 'G2 X 1.00049 Y 1 A 0 Z 0 I 0.5 J -0.00001\n']
+    assert list(gcode.compactLines(lines, 3)) == ['G1X0.123Y0A0Z0F100\n', 'G2X1Y1I0.5J0\n']
+
+
+def test_fixed_point():
+    assert gcode.fixedPoint(1.0, 3) == '1'
+    assert gcode.fixedPoint(-0.0001, 3) == '0'
+    assert gcode.fixedPoint(2.5e-05, 6) == '0.000025'
+    assert gcode.fixedPoint('12.3400', 2) == '12.34'
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+import numpy as np
+import pytest
+
+from hws_core import offset
+
+
+def closed(points, z=0.0):
+    points = np.asarray(points, dtype=float)
+    return np.column_stack((points, np.full(len(points), z)))
+
+
+def pathDistance(path, part, samples=50):
+    # closest XY distance of the closed path, sampled along its segments,
+    # to the closed part polyline
+    a = path[:, :2]
+    b = np.roll(a, -1, axis=0)
+    s = np.linspace(0.0, 1.0, samples)[:, None, None]
+    return offset.polylineDistances((a + s * (b - a)).reshape(-1, 2), part).min()
+
+
+def wedge(angle=10.0, length=100.0):
+    # trailing edge like wedge, the tip at the origin
+    h = length * np.tan(np.radians(angle) / 2)
+    return closed([(0.0, 0.0), (length, -h), (length, h)])
+
+
+def notch(width=1.0):
+    # block with a notch narrower than two kerfs
+    return closed([(0, 0), (40, 0), (40, 20), (20 + width / 2, 20), (20 + width / 2, 5),
+                   (20 - width / 2, 5), (20 - width / 2, 20), (0, 20)])
+
+
+def star(points=12, inner=8.0, outer=20.0):
+    angle = np.linspace(0, 2 * np.pi, 2 * points, endpoint=False)
+    radius = np.where(np.arange(2 * points) % 2, inner, outer)
+    return closed(np.column_stack((radius * np.cos(angle), radius * np.sin(angle))))
+
+
+def circle(radius=20.0, count=200):
+    angle = np.linspace(0, 2 * np.pi, count, endpoint=False)
+    return closed(np.column_stack((radius * np.cos(angle), radius * np.sin(angle))))
+
+
+def naca(chord=200.0, thickness=0.12, count=150):
+    x = (1 - np.cos(np.linspace(0, np.pi, count))) / 2
+    y = 5 * thickness * (0.2969 * np.sqrt(x) - 0.126 * x - 0.3516 * x**2 + 0.2843 * x**3 - 0.1015 * x**4)
+    upper = np.column_stack((x[::-1], y[::-1]))
+    lower = np.column_stack((x[1:-1], -y[1:-1]))
+    return closed(np.concatenate((upper, lower)) * chord)
+
+
+PARTS = {
+    'wedge': wedge(),
+    'notch': notch(),
+    'star': star(),
+    'circle': circle(),
+    'naca': naca(),
+}
+
+
+@pytest.mark.parametrize('name', sorted(PARTS))
+@pytest.mark.parametrize('kerf', [0.8, -0.8, 2.0])
+def test_offset_keeps_kerf_distance(name, kerf):
+    part = PARTS[name]
+    path = offset.offsetClosedPolyline(part, kerf)
+    assert pathDistance(path, part) >= abs(kerf) * (1 - 1e-6)
+    assert offset.crossings(path) == []
+
+
+def test_wedge_tip_keeps_kerf_distance():
+    # a plain miter limited to a few kerfs comes closer than the kerf at the
+    # sides of a sharp tip
+    part = wedge(10.0)
+    path = offset.offsetClosedPolyline(part, 0.8)
+    assert pathDistance(path, part) == pytest.approx(0.8)
+    assert len(path) > len(part)
+
+
+@pytest.mark.parametrize('name', sorted(PARTS))
+def test_offset_sides_keep_kerf_distance_in_step(name):
+    # side B tapered, both sides cut with their own kerf
+    A = PARTS[name]
+    B = A * [0.6, 0.7, 1.0] + [5.0, 2.0, 500.0]
+    offset_A, offset_B = offset.offsetSides(A, B, 0.8, 1.2)
+    assert len(offset_A) == len(offset_B)
+    assert pathDistance(offset_A, A) >= 0.8 * (1 - 1e-6)
+    assert pathDistance(offset_B, B) >= 1.2 * (1 - 1e-6)
+    assert np.all(offset_B[:, 2] == 500.0)
+
+
+def test_smooth_outside_offset_keeps_points():
+    part = circle()
+    path = offset.offsetClosedPolyline(part, 0.8)
+    assert len(path) == len(part)
+    assert np.allclose(np.hypot(path[:, 0], path[:, 1]), 20.8, atol=1e-3)
+
+
+def test_concave_corner_is_trimmed_to_miter():
+    # L shaped part, the inner corner offset lands on the miter point
+    part = closed([(0, 0), (20, 0), (20, 10), (10, 10), (10, 20), (0, 20)])
+    A, B = offset.offsetSides(part, part, 1.0, 1.0)
+    assert len(A) == len(B)
+    assert np.any(np.all(np.isclose(A[:, :2], (11.0, 11.0)), axis=1))
+    assert pathDistance(A, part) >= 1.0 * (1 - 1e-6)
+
+
+def test_offset_direction_follows_sign():
+    part = circle()
+    grown = offset.offsetClosedPolyline(part, 1.0)
+    shrunk = offset.offsetClosedPolyline(part, -1.0)
+    assert abs(offset.signedArea(grown)) > abs(offset.signedArea(part)) > abs(offset.signedArea(shrunk))
+    reversed_part = part[::-1]
+    assert abs(offset.signedArea(offset.offsetClosedPolyline(reversed_part, 1.0))) > abs(offset.signedArea(part))
+
+
+def test_polyline_distances_radius_matches_full():
+    rng = np.random.default_rng(3)
+    part = closed(rng.uniform(-10, 10, (60, 2)))
+    points = rng.uniform(-12, 12, (400, 2))
+    full = offset.polylineDistances(points, part)
+    near = offset.polylineDistances(points, part, 2.0)
+    assert np.allclose(np.where(full < 2.0, full, np.inf), np.where(near < 2.0, near, np.inf))
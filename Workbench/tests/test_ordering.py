@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+import numpy as np
+import pytest
+
+from hws_core import ordering
+
+
+def square(x, y, size=10.0, count=40):
+    # closed square part, side B straight above side A
+    t = np.linspace(0.0, 4.0, count + 1)
+    u = np.clip(t, 0, 1) - np.clip(t - 2, 0, 1)
+    v = np.clip(t - 1, 0, 1) - np.clip(t - 3, 0, 1)
+    side_A = np.column_stack((x + size * u, y + size * v, np.zeros(count + 1)))
+    side_B = side_A + [0.0, 0.0, 500.0]
+    return np.stack((side_A, side_B), axis=1)
+
+
+def position(x, y):
+    return np.array([[x, y, 0.0], [x, y, 500.0]])
+
+
+def brute_force(parts, start):
+    # cost of the best order with every part entered at its point closest to
+    # start, the planned tour is not longer
+    import itertools
+    best = None
+    for order in itertools.permutations(range(len(parts))):
+        nodes = [start] + [parts[k][ordering.nearestEntry(parts[k], start)] for k in order] + [start]
+        cost = sum(float(ordering.travelCost(a, b)) for a, b in zip(nodes[:-1], nodes[1:]))
+        best = cost if best is None else min(best, cost)
+    return best
+
+
+def test_parts_in_a_row_are_cut_in_line():
+    parts = [square(60, 0), square(0, 0), square(30, 0), square(90, 0)]
+    order, entries, hole_entries, cost = ordering.planCutOrder(parts, position(-10, 0))
+    assert order in ([1, 2, 0, 3], [3, 0, 2, 1])
+    assert hole_entries == [[], [], [], []]
+    assert cost <= brute_force(parts, position(-10, 0)) + 1e-9
+
+
+def test_cost_matches_the_tour():
+    parts = [square(50, 40), square(0, 60), square(70, 0), square(20, 10), square(40, 80)]
+    start = position(0, 0)
+    order, entries, hole_entries, cost = ordering.planCutOrder(parts, start)
+    assert sorted(order) == [0, 1, 2, 3, 4]
+    nodes = [start] + [parts[k][entries[k]] for k in order] + [start]
+    assert cost == pytest.approx(sum(float(ordering.travelCost(a, b)) for a, b in zip(nodes[:-1], nodes[1:])))
+
+
+def test_inner_part_is_cut_first():
+    # part 0 lies inside part 1, it would come loose with it
+    parts = [square(40, 40, 20.0), square(0, 0, 100.0)]
+    order, entries, hole_entries, cost = ordering.planCutOrder(parts, position(-10, -10))
+    assert order == [0, 1]
+
+
+def test_identical_parts():
+    # the same outline twice, each one lies inside the other
+    parts = [square(10, 10, 30.0), square(10, 10, 30.0), square(60, 0)]
+    order, entries, hole_entries, cost = ordering.planCutOrder(parts, position(0, 0))
+    assert sorted(order) == [0, 1, 2]
+    assert order.index(0) < order.index(1)
+
+
+def test_nesting_cycle_takes_the_closest_part():
+    parts = [square(50, 0), square(0, 0), square(100, 0)]
+    candidates = [ordering.entryCandidates(p) for p in parts]
+    hole_cost = [np.zeros(len(c)) for c in candidates]
+    before = [(0, 1), (1, 2), (2, 0)]
+    order, choice = ordering.nearestNeighbourOrder(parts, candidates, hole_cost, position(-10, 0), before)
+    # no part is free, the closest one is taken, then 2 waits for 1 only
+    assert order == [1, 2, 0]
+
+
+def test_holes_get_the_closest_entry():
+    part = square(0, 0, 100.0)
+    hole = square(80, 40, 10.0)
+    order, entries, hole_entries, cost = ordering.planCutOrder([part], position(120, 45), holes=[[hole]])
+    entry = part[entries[0]]
+    assert entry[0, 0] == pytest.approx(100.0)
+    assert hole_entries[0][0] == ordering.nearestEntry(hole, entry)
+
+
+def test_no_parts():
+    assert ordering.planCutOrder([], position(0, 0), position(3, 4)) == ([], [], [], 5.0)
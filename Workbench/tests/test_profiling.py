@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+
+from hws_core import profiling
+
+
+def profile(stages):
+    # runs stages inside one command of a new profiler, returns its stages
+    profiler = profiling.Profiler()
+    profiler.enabled = True
+    profiler.output = None
+    with profiler.command('test'):
+        stages(profiler)
+    return dict((stage['name'], stage) for stage in profiler.last_report['stages'])
+
+
+def test_outer_peak_before_inner_stage_is_kept():
+    def stages(profiler):
+        with profiler.span('outer'):
+            block = bytearray(4 * 1024 * 1024)
+            del block
+            with profiler.span('inner'):
+                small = bytearray(1024)
+                del small
+    found = profile(stages)
+    assert found['outer']['peak_memory'] >= 4 * 1024 * 1024
+    assert found['inner']['peak_memory'] < 1024 * 1024
+
+
+def test_outer_peak_includes_inner_stage():
+    def stages(profiler):
+        with profiler.span('outer'):
+            with profiler.span('inner'):
+                block = bytearray(4 * 1024 * 1024)
+                del block
+    found = profile(stages)
+    assert found['inner']['peak_memory'] >= 4 * 1024 * 1024
+    assert found['outer']['peak_memory'] >= found['inner']['peak_memory']
+
+
+def test_switched_off():
+    profiler = profiling.Profiler()
+    with profiler.command('test'):
+        with profiler.span('stage'):
+            pass
+    assert profiler.last_report is None
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+
+import numpy as np
+import pytest
+
+from hws_core import projection
+
+
+def test_wire_extended_to_the_machine_planes():
+    # wire from (0, 0, 100) to (10, 20, 300), machine sides at z = 0 and 400
+    A = np.array([[0.0, 0.0, 100.0]])
+    B = np.array([[10.0, 20.0, 300.0]])
+    new_A, new_B = projection.projectPoints(A, B, 0.0, 400.0)
+    assert new_A.tolist() == [[-5.0, -10.0, 0.0]]
+    assert new_B.tolist() == [[15.0, 30.0, 400.0]]
+    assert np.allclose(projection.projectPoint(A[0], B[0], 0.0, 400.0), (new_A[0], new_B[0]))
+    assert projection.machineAxes(A, B, 0.0, 400.0).tolist() == [[-5.0, -10.0, 15.0, 30.0]]
+
+
+def test_route_projection_is_cached_and_read_only():
+    points = np.random.default_rng(3).uniform(0, 100, (50, 2, 3))
+    points[:, 1, 2] += 200.0
+    first = projection.projectRoute(points, 0.0, 500.0)
+    assert projection.projectRoute(points.copy(), 0.0, 500.0) is first
+    assert projection.projectRoute(points, 0.0, 400.0) is not first
+    expected = projection.projectPoints(points[:, 0], points[:, 1], 0.0, 500.0)
+    assert np.array_equal(first[0], expected[0]) and np.array_equal(first[1], expected[1])
+    with pytest.raises(ValueError):
+        first[0][0, 0] = 1.0
+
+
+def test_points_at_z_stay_on_the_wire():
+    # the simulation planes are found on the export projection
+    A = np.array([[0.0, 0.0, 50.0], [5.0, 5.0, 20.0]])
+    B = np.array([[10.0, 20.0, 300.0], [5.0, 15.0, 250.0]])
+    wire_A, wire_B = projection.projectPoints(A, B, 0.0, 500.0)
+    at_z = projection.pointsAtZ(wire_A, wire_B, 0.0, 500.0, 120.0)
+    expected = projection.projectPoints(A, B, 120.0, 0.0)[0]
+    assert np.allclose(at_z, expected)
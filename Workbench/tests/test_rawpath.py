@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+import numpy as np
+
+from hws_core import rawpath
+
+
+def path(side_A, side_B):
+    return np.stack((np.asarray(side_A, dtype=float), np.asarray(side_B, dtype=float)), axis=1)
+
+
+def line(count, z=0.0):
+    x = np.linspace(0.0, 10.0, count)
+    return np.column_stack((x, np.zeros(count), np.full(count, z)))
+
+
+def test_simplify_straight_line_keeps_ends():
+    points = path(line(11), line(11, 500.0))
+    assert rawpath.simplifyIndexes(points, 0.01).tolist() == [0, 10]
+
+
+def test_simplify_keeps_point_bent_on_one_side():
+    # only side B bends (a tent over the line), the point stays on both sides
+    side_B = line(11, 500.0)
+    side_B[:, 1] = 0.5 - 0.1 * np.abs(np.arange(11) - 5)
+    points = path(line(11), side_B)
+    assert rawpath.simplifyIndexes(points, 0.01).tolist() == [0, 5, 10]
+    assert rawpath.simplifyIndexes(points, 1.0).tolist() == [0, 10]
+
+
+def test_simplify_keeps_forced_indexes():
+    points = path(line(11), line(11, 500.0))
+    assert rawpath.simplifyIndexes(points, 0.01, keep=(3, 7, 42)).tolist() == [0, 3, 7, 10]
+
+
+def test_simplify_stays_within_tolerance():
+    t = np.linspace(0.0, np.pi, 200)
+    side_A = np.column_stack((10 * np.cos(t), 10 * np.sin(t), np.zeros(200)))
+    side_B = side_A * [0.5, 0.5, 1.0] + [0.0, 0.0, 500.0]
+    points = path(side_A, side_B)
+    kept = rawpath.simplifyIndexes(points, 0.05)
+    assert 2 < len(kept) < 200
+    for side in range(2):
+        for i, j in zip(kept[:-1], kept[1:]):
+            d = rawpath.segmentDistances(points[i:j + 1, side], points[i, side], points[j, side])
+            assert d.max() <= 0.05 + 1e-12
+
+
+def test_simplify_off_or_short_keeps_all():
+    points = path(line(5), line(5, 500.0))
+    assert rawpath.simplifyIndexes(points, 0.0).tolist() == [0, 1, 2, 3, 4]
+    assert rawpath.simplifyIndexes(points[:2], 1.0).tolist() == [0, 1]
+
+
+def test_owner_of_every_point():
+    raw = rawpath.RawPath(path(line(6), line(6, 10.0)), [[0, 'InitialPath'], [2, 'ShapePath'], [5, 'FinalPath']])
+    assert [raw.ownerAt(i) for i in range(6)] == ['InitialPath', 'InitialPath', 'ShapePath', 'ShapePath',
+                                                  'ShapePath', 'FinalPath']
+    assert raw.ownerIndexes().tolist() == [0, 0, 1, 1, 1, 2]
+    assert rawpath.RawPath(path(line(3), line(3))).ownerIndexes().tolist() == [-1, -1, -1]
+
+
+def test_commands_to_owners_merges_same_owner():
+    commands = [[0, 1, 1, 'InitialPath'], [2, 1, 1, 'ShapePath'], [4, 1, 1, 'ShapePath'], [4, 1, 1, 'Link_1']]
+    assert rawpath.commandsToOwners(commands) == [[0, 'InitialPath'], [2, 'ShapePath'], [4, 'Link_1']]
+
+
+def test_legacy_pair_access():
+    raw = rawpath.RawPath(path(line(4), line(4, 10.0)))
+    side_A, side_B = raw
+    assert len(raw) == 2
+    assert np.array_equal(side_A, raw.A) and np.array_equal(raw[1], raw.B)
+    assert raw.point(1, 3) == [10.0, 0.0, 10.0]
+    assert rawpath.asRawPath(raw.toLists()).points.tolist() == raw.points.tolist()
+
+
+def test_state_round_trip():
+    raw = rawpath.RawPath(path(line(4), line(4, 10.0)), [[0, 'ShapePath']])
+    for state in (raw.__getstate__(), raw.dumps()):
+        copy = rawpath.RawPath()
+        copy.loads(state)
+        assert copy.points.tolist() == raw.points.tolist()
+        assert copy.owners == raw.owners
+    # documents of the old [side_A, side_B] format
+    old = rawpath.RawPath()
+    old.__setstate__(raw.toLists())
+    assert old.points.tolist() == raw.points.tolist() and old.owners == []
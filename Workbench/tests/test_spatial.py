@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# HWS (Hot Wire Slicer) workbench for FreeCAD
+# (c) 2024 Peter Christensen
+
+# HWS is based on Javier Martínez García NiCr (Hot Wire CNC Cutter) workbench for FreeCAD
+# https://github.com/JMG1/NiCr
+
+#***************************************************************************
+#*   (c)  Peter Christensen 2024                                           *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU General Public License (GPL)            *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************/
+
+import numpy as np
+import pytest
+
+from hws_core.spatial import PointGrid
+
+
+def test_nearest_matches_brute_force():
+    rng = np.random.default_rng(7)
+    points = rng.uniform(-50, 50, (300, 3))
+    grid = PointGrid(2.0)
+    for p in points:
+        grid.add(p)
+    for q in rng.uniform(-80, 80, (100, 3)):
+        distances = np.linalg.norm(points - q, axis=1)
+        index, distance = grid.nearest(q)
+        assert index == int(np.argmin(distances))
+        assert distance == pytest.approx(distances.min())
+
+
+def test_nearest_far_from_all_points():
+    grid = PointGrid(0.001)
+    grid.add((0.0, 0.0, 0.0), 'a')
+    grid.add((1.0, 0.0, 0.0), 'b')
+    index, distance = grid.nearest((100.0, 0.0, 0.0))
+    assert index == 1
+    assert distance == pytest.approx(99.0)
+    assert grid.data[index] == 'b'
+
+
+def test_nearest_tie_gives_lowest_index():
+    grid = PointGrid(1.0)
+    grid.add((1.0, 0.0, 0.0))
+    grid.add((-1.0, 0.0, 0.0))
+    assert grid.nearest((0.0, 0.0, 0.0)) == (0, 1.0)
+
+
+def test_nearest_empty_grid():
+    assert PointGrid().nearest((0.0, 0.0, 0.0)) == (None, None)
+
+
+def test_query_within_tolerance_in_insertion_order():
+    grid = PointGrid(0.1)
+    grid.add((0.0, 0.0, 0.0))
+    grid.add((5.0, 0.0, 0.0))
+    grid.add((0.05, 0.0, 0.0))
+    assert grid.query((0.01, 0.0, 0.0)) == [0, 2]
+    assert grid.query((5.0, 0.0, 0.0), 0.01) == [1]